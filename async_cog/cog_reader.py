@@ -1,32 +1,204 @@
 from __future__ import annotations
 
-from struct import calcsize, pack, unpack
-from typing import Any, Iterator, List, Literal
+from asyncio import (
+    FIRST_COMPLETED,
+    Future,
+    Semaphore,
+    ensure_future,
+    gather,
+    get_running_loop,
+    shield,
+    sleep,
+    wait,
+)
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from math import ceil
+from re import fullmatch
+from struct import calcsize, unpack
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import numpy as np
 from aiohttp import ClientSession
 from pydantic import NonNegativeInt, PositiveInt
 
-from async_cog.decoders import DECODERS_MAPPING
+from async_cog.decoders import DECODERS_MAPPING, BlockFormat
 from async_cog.ifd import IFD
+from async_cog.io_planner import ByteRange, merge_ranges, split_merged
+from async_cog.metadata_index import Metadata, MetadataIndex
+from async_cog.metrics import IOStats, Phase, ReadEvent
+from async_cog.resampling import KERNELS, Resampling, floor_window, resample
+from async_cog.retry import HedgePolicy, RetryPolicy, first_successful
+from async_cog.sources import (
+    ConcurrencyController,
+    HTTPConnectionPool,
+    HTTPSource,
+    RangeSource,
+)
+from async_cog.sources.range_source import Buffer, RangeReadError
 from async_cog.tags import BytesTag, FractionsTag, ListTag, NumberTag, StringTag, Tag
-from async_cog.tags.tag_code import TagCode
+from async_cog.tags.tag_code import ARRAY_TAGS, BYTE_COUNTS_TAGS, TagCode
+from async_cog.tile_cache import TileCache
+from async_cog.tracing import NOOP_TRACER, Tracer
+
+T = TypeVar("T")
+
+# The first line of GDAL structural metadata, see _read_gdal_metadata()
+GDAL_METADATA_SIZE_LINE = rb"GDAL_STRUCTURAL_METADATA_SIZE=(\d{6}) bytes\n"
+GDAL_METADATA_SIZE_LINE_LENGTH = 43
+# BLOCK_LEADER=SIZE_AS_UINT4 is always little-endian
+GDAL_BLOCK_LEADER_FMT = "<I"
+# Blocks with leaders are read speculatively with this times their median size
+BLOCK_SIZE_HEADROOM = 1.5
+# Number of the last block sizes from leaders kept for every IFD
+BLOCK_SIZES_WINDOW = 256
 
 
 class COGReader:
     _version: Literal[42, 43]
     _first_ifd_pointer: PositiveInt
     _ifds: List[IFD]
+    # Image IFDs by level and their masks, see _classify_ifds()
+    _levels: List[IFD]
+    _masks: List[Optional[IFD]]
     # For characters meainng in *_fmt attributes see:
     # https://docs.python.org/3.10/library/struct.html#format-characters
     _byte_order_fmt: Literal["<", ">"]
     _pointer_fmt: Literal["I", "Q"]
     _n_fmt: Literal["H", "Q"]
-    _url: str
+    # NumPy dtype of IFD entries, see _get_entry_dtype()
+    _entry_dtype: np.dtype
+    _source: RangeSource
+    # GDAL structural metadata, see _read_gdal_metadata()
+    _gdal_metadata: Dict[str, str]
+    # Prefix of the file with headers and IFDs, see _read_metadata()
+    _metadata: bytes
+    _metadata_complete: bool
+    # Loading of IFDs tags data by IFD pointer, see _fill_ifd_with_data()
+    _ifd_data_loads: Dict[int, Future]
+    # Loading of blocks of tile index arrays by (IFD pointer, tag name, block),
+    # see _get_index_values()
+    _index_block_loads: Dict[Tuple[int, str, int], Future]
+    # Sizes of the last blocks from their leaders by IFD pointer,
+    # see _estimate_block_size()
+    _block_sizes: Dict[int, Deque[int]]
+    # Limits number of tiles waiting for or being decoded, see _decode_tile()
+    _decode_slots: Semaphore
+
+    def __init__(
+        self,
+        url: Union[str, RangeSource],
+        prefetch_size: NonNegativeInt = 16384,
+        max_gap: NonNegativeInt = 1024,
+        executor: Optional[Executor] = None,
+        max_pending_decodes: PositiveInt = 64,
+        tile_cache: Optional[TileCache] = None,
+        session: Union[ClientSession, HTTPConnectionPool, None] = None,
+        io_stats: Optional[IOStats] = None,
+        tracer: Optional[Tracer] = None,
+        tile_index_block_size: NonNegativeInt = 0,
+        metadata_index: Optional[MetadataIndex] = None,
+        use_block_leaders: bool = False,
+        retry: Optional[RetryPolicy] = None,
+        hedging: Optional[HedgePolicy] = None,
+        concurrency: Optional[ConcurrencyController] = None,
+    ):
+        """
+        `url` is either URL of the file on HTTP server or any other RangeSource,
+        e.g. FileSource for local files. For URLs requests are sent with `session`:
+        aiohttp session or HTTPConnectionPool shared by many readers. They aren't
+        closed by the reader. Without it every reader has its own session.
+        Simultaneous requests to the same host are limited by adaptive limits of
+        `concurrency`, which is shared by all readers by default.
+
+        Requests are recorded into `io_stats`, pass it to collect stats of many
+        readers together or to set callbacks. See COGReader.io_stats
+
+        `prefetch_size` is the number of bytes requested at once from the start of
+        the file to parse headers and IFDs from. Set it to 0 to read every metadata
+        structure with a separate request.
+
+        `max_gap` is the biggest number of unneeded bytes between two byte ranges
+        which still lets them to be read with a single request.
+
+        TileOffsets and TileByteCounts longer than `tile_index_block_size` values
+        aren't read with other tags. Only blocks of that many values covering
+        requested tiles are read and kept. 0 means the arrays are always read
+        entirely. Use it for huge files, where these arrays are megabytes.
+
+        Files written by GDAL have structural metadata after the header. When it
+        says that IFDs are before tiles data, all of them are read into the
+        metadata buffer. When it says that every tile has 4 bytes leader with its
+        size, `use_block_leaders` lets to skip reading TileByteCounts. Then tiles
+        are read with their leaders expecting sizes close to the median of known
+        ones, see _estimate_block_size().
+
+        Failed requests are retried according to `retry`, by default up to 3 times
+        for transient failures. Pass NO_RETRIES to fail on the first error.
+        With `hedging` slow requests are duplicated and the first response is used,
+        see HedgePolicy. Hedges and retries are counted in `io_stats`.
+
+        Parsed metadata is kept in `metadata_index` if it's set, so the next
+        opening of the same unchanged file doesn't read it at all. Sources are
+        asked for their fingerprint to check that the file is unchanged, it's HEAD
+        request for URLs.
+
+        Tiles are decoded in `executor`, event loop's default thread pool is used
+        when it's None. Decoders release the GIL, so threads decode tiles in
+        parallel. With ProcessPoolExecutor only the format of tiles is pickled
+        for every tile, see BlockFormat.
+        No more than `max_pending_decodes` tiles are submitted to it at once.
+
+        Decoded tiles are kept in `tile_cache` if it's set. It could be shared by
+        many readers
+        """
 
-    def __init__(self, url: str):
-        self._url: str = url
+        self._source = (
+            HTTPSource(url, session, concurrency=concurrency)
+            if isinstance(url, str)
+            else url
+        )
         self._ifds = []
+        self._levels = []
+        self._masks = []
+        self._prefetch_size = prefetch_size
+        self._max_gap = max_gap
+        self._metadata = b""
+        self._metadata_complete = False
+        self._ifd_data_loads = {}
+        self._tile_index_block_size = tile_index_block_size
+        self._metadata_index = metadata_index
+        self._use_block_leaders = use_block_leaders
+        self._retry = retry or RetryPolicy()
+        self._hedging = hedging
+        self._gdal_metadata = {}
+        self._fingerprint: Optional[str] = None
+        self._index_block_loads = {}
+        self._block_sizes = {}
+        self._executor = executor
+        self._max_pending_decodes = max_pending_decodes
+        self._tile_cache = tile_cache
+        self._io_stats = io_stats or IOStats()
+        self._tracer = tracer or NOOP_TRACER
 
     def __iter__(self) -> Iterator[IFD]:
         for ifd in self._ifds:
@@ -34,42 +206,208 @@ class COGReader:
 
     async def __aenter__(self) -> COGReader:
         """
-        Establish client session and read COG's metadata
+        Open the source and read COG's metadata
         """
 
-        self._client = ClientSession()
+        await self._source.open()
+        self._decode_slots = Semaphore(self._max_pending_decodes)
 
         try:
-            await self._read_header()
-            await self._read_idfs()
-        except AssertionError:
-            raise ValueError("Invalid file format")
+            if not await self._load_metadata_from_index():
+                await self._read_header()
+                await self._read_idfs()
+                await self._save_metadata_to_index()
+        except BaseException as error:
+            await self._source.close()
+
+            if isinstance(error, AssertionError):
+                raise ValueError("Invalid file format")
+
+            raise
+
+        self._classify_ifds()
 
         return self
 
+    def _classify_ifds(self) -> None:
+        """
+        Split IFDs into image levels (full resolution and overviews) and their
+        masks. A mask belongs to the level with the same size
+        """
+
+        self._levels = [ifd for ifd in self._ifds if not ifd.is_mask]
+        masks = {
+            (ifd.get("ImageWidth"), ifd.get("ImageHeight")): ifd
+            for ifd in self._ifds
+            if ifd.is_mask
+        }
+        self._masks = [
+            masks.get((ifd.get("ImageWidth"), ifd.get("ImageHeight")))
+            for ifd in self._levels
+        ]
+
+    async def _load_metadata_from_index(self) -> bool:
+        """
+        Restore parsed metadata from the metadata index without reading the file.
+        Return False if the index has no valid entry for the file
+        """
+
+        if self._metadata_index is None:
+            return False
+
+        self._fingerprint = await self._get_fingerprint()
+
+        if self._fingerprint is None:
+            return False
+
+        loop = get_running_loop()
+        metadata = await loop.run_in_executor(
+            None, self._metadata_index.get, self.url, self._fingerprint
+        )
+
+        if metadata is None:
+            return False
+
+        self._version = metadata.version
+        self._byte_order_fmt = metadata.byte_order_fmt
+        self._first_ifd_pointer = metadata.first_ifd_pointer
+        self._gdal_metadata = metadata.gdal_metadata
+        self._ifds = metadata.ifds
+        self._set_formats()
+
+        for ifd in self._ifds:
+            # The entry could be saved by a reader which skipped some arrays
+            if any(
+                tag.value is None
+                for tag in ifd.tags.values()
+                if tag.data_pointer and self._is_read_with_ifd(tag)
+            ):
+                continue
+
+            loaded = loop.create_future()
+            loaded.set_result(None)
+            self._ifd_data_loads[ifd.pointer] = loaded
+
+        return True
+
+    async def _get_fingerprint(self) -> Optional[str]:
+        """
+        Get fingerprint of the file from the source, None if it's unknown. It's
+        requested with retries and hedging and counted like header reads
+        """
+
+        start = perf_counter()
+
+        try:
+            fingerprint = await self._request(self._source.fingerprint, "header")
+        except RangeReadError:
+            return None
+
+        self._io_stats.record_read(
+            ReadEvent(
+                phase="header",
+                offset=0,
+                size=0,
+                ranges=0,
+                bytes_read=0,
+                duration=perf_counter() - start,
+            )
+        )
+
+        return fingerprint
+
+    async def _save_metadata_to_index(self) -> None:
+        """
+        Read data of all tags and store parsed metadata into the metadata index
+        """
+
+        if self._metadata_index is None or self._fingerprint is None:
+            return
+
+        await gather(*(self._fill_ifd_with_data(ifd) for ifd in self._ifds))
+
+        metadata = Metadata(
+            version=self._version,
+            byte_order_fmt=self._byte_order_fmt,
+            first_ifd_pointer=self._first_ifd_pointer,
+            gdal_metadata=self._gdal_metadata,
+            ifds=self._ifds,
+        )
+
+        try:
+            await get_running_loop().run_in_executor(
+                None, self._metadata_index.put, self.url, self._fingerprint, metadata
+            )
+        except OSError:
+            # The index is only a cache, the file is readable without it
+            pass
+
     async def __aexit__(self, *args: Any, **kwargs: Any) -> None:
-        await self._client.close()
+        await self._source.close()
 
     @property
     def url(self) -> str:
-        return self._url
+        return self._source.url
 
     @property
-    def is_bigtiff(self) -> bool:
+    def io_stats(self) -> IOStats:
         """
-        Is this GOG in the BigTIFF format
+        Number of requests, requested and used bytes, latency, retries and hedges of
+        reader's I/O by phase: header, ifd, tag_data and tile
         """
 
-        return self._version == 43
+        return self._io_stats
+
+    @property
+    def levels(self) -> List[IFD]:
+        """
+        IFDs of the full resolution image and its overviews without masks
+        """
+
+        return self._levels
+
+    def has_mask(self, level: NonNegativeInt) -> bool:
+        return self._masks[level] is not None
+
+    @property
+    def gdal_metadata(self) -> Dict[str, str]:
+        """
+        GDAL structural metadata, e.g. {"LAYOUT": "IFDS_BEFORE_DATA", ...}.
+        It's empty for files without it
+        """
+
+        return self._gdal_metadata
+
+    @property
+    def _gdal_layout_holds(self) -> bool:
+        """
+        GDAL marks files edited in place with KNOWN_INCOMPATIBLE_EDITION=YES.
+        Their structural metadata isn't trusted, e.g. IFDs could be appended to
+        the end of the file
+        """
+
+        return self._gdal_metadata.get("KNOWN_INCOMPATIBLE_EDITION") != "YES"
+
+    @property
+    def _ifds_before_data(self) -> bool:
+        layout = self._gdal_metadata.get("LAYOUT")
+
+        return self._gdal_layout_holds and layout == "IFDS_BEFORE_DATA"
+
+    @property
+    def _reads_block_leaders(self) -> bool:
+        if not self._use_block_leaders or not self._gdal_layout_holds:
+            return False
+
+        return self._gdal_metadata.get("BLOCK_LEADER") == "SIZE_AS_UINT4"
 
     @property
-    def _tag_format(self) -> str:
+    def is_bigtiff(self) -> bool:
         """
-        Return format string for struct.unpack(): two SHORTs and two pointer types.
-        For detailed tag structure see _tag_from_tag_bytes()
+        Is this GOG in the BigTIFF format
         """
 
-        return self._format(f"2H2{self._pointer_fmt}")
+        return self._version == 43
 
     def _format(self, format_str: str) -> str:
         """
@@ -78,16 +416,179 @@ class COGReader:
 
         return f"{self._byte_order_fmt}{format_str}"
 
-    async def _read(self, offset: int, size: int) -> bytes:
+    async def _request(self, request: Callable[[], Awaitable[T]], phase: Phase) -> T:
+        """
+        Make the request to the source. Transient failures are retried with
+        backoff and slow requests are hedged
+        """
+
+        retry = self._retry
+        attempt = 0
+
+        while True:
+            try:
+                return await self._hedged_request(request, phase)
+            except Exception as error:
+                if attempt >= retry.retries or not retry.is_retryable(error):
+                    raise
+
+            self._io_stats.record_retry(phase)
+            await sleep(retry.get_delay(attempt))
+            attempt += 1
+
+    async def _hedged_request(
+        self, request: Callable[[], Awaitable[T]], phase: Phase
+    ) -> T:
+        delay = self._hedging.get_delay() if self._hedging is not None else None
+        start = perf_counter()
+
+        if delay is None:
+            result = await request()
+        else:
+            result = await first_successful(
+                request, delay, partial(self._io_stats.record_hedge, phase)
+            )
+
+        if self._hedging is not None:
+            self._hedging.observe(perf_counter() - start)
+
+        return result
+
+    async def _read(self, offset: int, size: int, phase: Phase) -> Buffer:
+        """
+        Get the data from the source within the specific byte range
+        """
+
+        start = perf_counter()
+        data = await self._request(partial(self._source.read, offset, size), phase)
+
+        self._io_stats.record_read(
+            ReadEvent(
+                phase=phase,
+                offset=offset,
+                size=size,
+                ranges=1,
+                bytes_read=len(data),
+                duration=perf_counter() - start,
+            )
+        )
+
+        return data
+
+    async def _read_many(self, ranges: List[ByteRange], phase: Phase) -> List[Buffer]:
+        """
+        Get the data from the source for several byte ranges at once. Ranges are
+        split into batches, which the source reads with a single request each
+        """
+
+        step = self._source.ranges_per_request
+        batches = await gather(
+            *(
+                self._read_batch(ranges[idx : idx + step], phase)
+                for idx in range(0, len(ranges), step)
+            )
+        )
+
+        return [data for batch in batches for data in batch]
+
+    async def _read_batch(self, ranges: List[ByteRange], phase: Phase) -> List[Buffer]:
+        """
+        Get the data for byte ranges read with a single request
+        """
+
+        if len(ranges) == 1:
+            return [await self._read(*ranges[0], phase)]
+
+        start = perf_counter()
+        data = await self._request(partial(self._source.read_many, ranges), phase)
+
+        self._io_stats.record_read(
+            ReadEvent(
+                phase=phase,
+                offset=ranges[0][0],
+                size=sum(size for _, size in ranges),
+                ranges=len(ranges),
+                bytes_read=sum(len(range_data) for range_data in data),
+                duration=perf_counter() - start,
+            )
+        )
+
+        return data
+
+    async def _read_ranges(self, ranges: List[ByteRange], phase: Phase) -> List[Buffer]:
+        """
+        Get the data for several byte ranges. Ranges which are already in the
+        metadata buffer are taken from it, close ranges are merged and the rest are
+        requested concurrently. Result has the same order as `ranges`
+        """
+
+        buffered = [offset + size <= len(self._metadata) for offset, size in ranges]
+        to_read = [
+            (offset, size) if not is_buffered else (offset, 0)
+            for (offset, size), is_buffered in zip(ranges, buffered)
+        ]
+
+        merged = merge_ranges(to_read, self._max_gap)
+
+        with self._tracer.span("fetch", phase=phase, ranges=len(merged)):
+            data = await self._read_many(
+                [(rng.offset, rng.size) for rng in merged], phase
+            )
+
+        result = split_merged(to_read, merged, data)
+        self._io_stats.record_used(phase, sum(size for _, size in ranges))
+
+        for idx, (offset, size) in enumerate(ranges):
+            if buffered[idx]:
+                result[idx] = self._metadata[offset : offset + size]
+
+        return result
+
+    async def _read_metadata(self, offset: int, size: int, phase: Phase) -> Buffer:
         """
-        Get the data from URL within the specific byte range
+        Get the data of headers and IFDs from the prefetched start of the file.
+
+        The first call fetches `prefetch_size` bytes at once. When the requested
+        range ends outside of the buffer, the buffer grows twice. Ranges which
+        are too far from the buffer are read directly
         """
 
-        header = {"Range": f"bytes={offset}-{offset + size - 1}"}
+        end = offset + size
+        self._io_stats.record_used(phase, size)
 
-        async with self._client.get(self.url, headers=header) as response:
-            assert response.ok
-            return await response.read()
+        if not self._prefetch_size:
+            return await self._read(offset, size, phase)
+
+        if end > len(self._metadata) and not self._metadata_complete:
+            await self._grow_metadata(end, phase)
+
+        if end <= len(self._metadata):
+            return self._metadata[offset:end]
+
+        return await self._read(offset, size, phase)
+
+    async def _grow_metadata(self, end: int, phase: Phase) -> None:
+        """
+        Extend metadata buffer so it covers bytes up to `end` if it's possible to do
+        by doubling the buffer size. When IFDs are known to be before tiles data,
+        everything before `end` is metadata, so the buffer is extended anyway
+        """
+
+        buffer_size = len(self._metadata)
+        new_size = max(buffer_size * 2, self._prefetch_size)
+
+        if end > new_size:
+            if not self._ifds_before_data:
+                return
+
+            new_size = end
+
+        data = await self._read(buffer_size, new_size - buffer_size, phase)
+        self._metadata += data
+
+        # Server returned less data than requested — there is nothing left to read
+        if len(data) < new_size - buffer_size:
+            self._metadata_complete = True
 
     async def _read_header(self) -> None:
         """
@@ -95,17 +596,89 @@ class COGReader:
         """
 
         await self._read_first_header()
+        self._set_formats()
+
+        if self.is_bigtiff:
+            await self._read_bigtiff_second_header()
+        else:
+            await self._read_second_header()
+
+        await self._read_gdal_metadata()
+
+    async def _read_gdal_metadata(self) -> None:
+        """
+        GDAL structural metadata ("ghost area") is right after the header:
+
+            GDAL_STRUCTURAL_METADATA_SIZE=000140 bytes
+            LAYOUT=IFDS_BEFORE_DATA
+            BLOCK_ORDER=ROW_MAJOR
+            BLOCK_LEADER=SIZE_AS_UINT4
+            BLOCK_TRAILER=LAST_4_BYTES_REPEATED
+            KNOWN_INCOMPATIBLE_EDITION=NO
+
+        https://gdal.org/drivers/raster/cog.html#header-ghost-area
+        """
+
+        pointer = 16 if self.is_bigtiff else 8
+
+        # There is no space for it before the first IFD
+        if self._first_ifd_pointer < pointer + GDAL_METADATA_SIZE_LINE_LENGTH:
+            return
+
+        size_line = await self._read_metadata(
+            pointer, GDAL_METADATA_SIZE_LINE_LENGTH, "header"
+        )
+        match = fullmatch(GDAL_METADATA_SIZE_LINE, bytes(size_line))
+
+        if match is None:
+            return
+
+        content = await self._read_metadata(
+            pointer + len(size_line), int(match.group(1)), "header"
+        )
+
+        for line in bytes(content).decode("latin-1").splitlines():
+            name, separator, value = line.partition("=")
+
+            if separator:
+                self._gdal_metadata[name.strip()] = value.strip()
+
+    def _set_formats(self) -> None:
+        """
+        Set formats of structures depending on the version and the byte order
+        """
 
         if self.is_bigtiff:
             self._pointer_fmt = "Q"  # 8 byte unsigned int
             self._n_fmt = "Q"  # 8 byte unsigned int
-
-            await self._read_bigtiff_second_header()
         else:
             self._pointer_fmt = "I"  # 4 byte unsigned int
             self._n_fmt = "H"  # 2 byte unsigned int
 
-            await self._read_second_header()
+        self._entry_dtype = self._get_entry_dtype()
+
+    def _get_entry_dtype(self) -> np.dtype:
+        """
+        NumPy dtype of IFD entry: two SHORTs and two pointer types. The last field
+        is also available as raw bytes "inline". See _tags_from_data()
+        """
+
+        pointer_fmt = self._format(self._pointer_fmt)
+        pointer_size = calcsize(self._pointer_fmt)
+
+        return np.dtype(
+            {
+                "names": ["code", "type", "length", "pointer", "inline"],
+                "formats": [
+                    self._format("H"),
+                    self._format("H"),
+                    pointer_fmt,
+                    pointer_fmt,
+                    f"V{pointer_size}",
+                ],
+                "offsets": [0, 2, 4, 4 + pointer_size, 4 + pointer_size],
+            }
+        )
 
     async def _read_idfs(self) -> None:
         """
@@ -136,7 +709,7 @@ class COGReader:
 
         POINTER = 0
 
-        data = await self._read(POINTER, 4)
+        data = await self._read_metadata(POINTER, 4, "header")
 
         # Read first two bytes and skip the last two
         (first_bytest,) = unpack("2s2x", data)
@@ -169,7 +742,7 @@ class COGReader:
         POINTER = 4
         format_str = self._format(self._pointer_fmt)
 
-        data = await self._read(POINTER, calcsize(format_str))
+        data = await self._read_metadata(POINTER, calcsize(format_str), "header")
         (self._first_ifd_pointer,) = unpack(format_str, data)
 
     async def _read_bigtiff_second_header(self) -> None:
@@ -191,7 +764,7 @@ class COGReader:
         POINTER = 4
         format_str = self._format("HHQ")
 
-        data = await self._read(POINTER, calcsize(format_str))
+        data = await self._read_metadata(POINTER, calcsize(format_str), "header")
 
         bytesize, placeholder, self._first_ifd_pointer = unpack(format_str, data)
 
@@ -222,15 +795,15 @@ class COGReader:
         n_format_str = self._format(self._n_fmt)
 
         # Read nubmer of tags in the IFD
-        n_data = await self._read(ifd_pointer, calcsize(n_format_str))
+        n_data = await self._read_metadata(ifd_pointer, calcsize(n_format_str), "ifd")
         (n_tags,) = unpack(n_format_str, n_data)
 
-        tags_len = n_tags * calcsize(self._tag_format)
+        tags_len = n_tags * self._entry_dtype.itemsize
         tags_pointer = ifd_pointer + calcsize(n_format_str)
         format_str = self._format(f"{tags_len}s{self._pointer_fmt}")
 
         # Read tags data and pointer to next IFD
-        data = await self._read(tags_pointer, calcsize(format_str))
+        data = await self._read_metadata(tags_pointer, calcsize(format_str), "ifd")
 
         tags_data, next_ifd_pointer = unpack(format_str, data)
         tags = self._tags_from_data(n_tags, tags_data)
@@ -244,23 +817,7 @@ class COGReader:
 
     def _tags_from_data(self, n_tags: int, tags_bytes: bytes) -> Iterator[Tag]:
         """
-        Split data into tag-sized buffers and parse them
-        """
-
-        size = calcsize(self._tag_format)
-
-        # Split tags_bytes into n tag-sized chuncks
-        for tag_bytes in unpack(n_tags * f"{size}s", tags_bytes):
-            try:
-                tag = self._tag_from_tag_bytes(tag_bytes)
-            except ValueError:
-                continue
-
-            yield tag
-
-    def _tag_from_tag_bytes(self, tag_bytes: bytes) -> Tag:
-        """
-        Tag structure
+        Parse all IFD entries at once with NumPy structured dtype. Entry structure
 
         +--------------+------------+-----------------------------------+
         |        offset|        size|                              value|
@@ -276,80 +833,772 @@ class COGReader:
         +--------------+------------+-----------------------------------+
         """
 
-        code, tag_type, length, pointer = unpack(self._tag_format, tag_bytes)
+        entries = np.frombuffer(tags_bytes, dtype=self._entry_dtype, count=n_tags)
+        pointer_size = calcsize(self._pointer_fmt)
 
-        tag: Tag
+        # Last bytes of all entries, they are tags data when it fits into them
+        inline_bytes = entries["inline"].tobytes()
+        # Last bytes of all entries as lists of numbers of some type, by type format
+        inline_values: Dict[str, List[List[Any]]] = {}
+
+        fields = zip(
+            entries["code"].tolist(),
+            entries["type"].tolist(),
+            entries["length"].tolist(),
+            entries["pointer"].tolist(),
+        )
+
+        for idx, (code, tag_type, length, pointer) in enumerate(fields):
+            try:
+                tag = self._tag_from_entry(code, tag_type, length, pointer)
+            except ValueError:
+                continue
+
+            if tag.data_size <= pointer_size:
+                tag.data_pointer = None
+
+                if isinstance(tag, (ListTag, NumberTag)):
+                    fmt = tag.type.format
+
+                    if fmt not in inline_values:
+                        values = np.frombuffer(inline_bytes, dtype=self._format(fmt))
+                        inline_values[fmt] = values.reshape(n_tags, -1).tolist()
+
+                    tag.parse_values(inline_values[fmt][idx][:length])
+
+                else:
+                    start = idx * pointer_size
+                    data = inline_bytes[start : start + tag.data_size]
+                    tag.parse_data(data, self._byte_order_fmt)
+
+            yield tag
+
+    def _tag_from_entry(
+        self, code: int, tag_type: int, length: int, pointer: int
+    ) -> Tag:
+        """
+        Create tag of the class matching its type from IFD entry fields
+        """
 
         if tag_type == 2:  # ASCII string
-            tag = StringTag(code=code, length=length, data_pointer=pointer)
+            return StringTag(code=code, length=length, data_pointer=pointer)
 
-        elif tag_type == 7:  # bytes
-            tag = BytesTag(code=code, length=length, data_pointer=pointer)
+        if tag_type == 7:  # bytes
+            return BytesTag(code=code, length=length, data_pointer=pointer)
 
-        elif tag_type in (5, 10):  # fractions
-            tag = FractionsTag(
+        if tag_type in (5, 10):  # fractions
+            return FractionsTag(
                 code=code, type=tag_type, length=length, data_pointer=pointer
             )
 
         # GeoKeyDirectoryTag must be list tag because parsing it relies on indexing
-        elif TagCode(code).is_list or length > 1:
-            tag = ListTag(code=code, type=tag_type, length=length, data_pointer=pointer)
-
-        else:
-            tag = NumberTag(code=code, type=tag_type, data_pointer=pointer)
-
-        # If tag data type fits into it's data pointer size, then last bytes contain
-        # data, not it's pointer
-        if tag.data_size <= calcsize(self._pointer_fmt):
-            data = pack(self._pointer_fmt, pointer)[: tag.data_size]
-            tag.parse_data(data, self._byte_order_fmt)
-            tag.data_pointer = None
+        if TagCode.get(code).is_list or length > 1:
+            return ListTag(
+                code=code, type=tag_type, length=length, data_pointer=pointer
+            )
 
-        return tag
+        return NumberTag(code=code, type=tag_type, data_pointer=pointer)
 
-    async def _fill_tag_with_data(self, tag: Tag) -> None:
+    async def _fill_ifd_with_data(self, ifd: IFD) -> None:
         """
-        Read tag-related data from specific place in the file.
-        And parse values from it according to tag's format
+        Read data for all tags within IFD only once.
+        Concurrent calls for the same IFD wait for the same loading.
+        Failed loading is forgotten, so the next call tries again
         """
 
-        if tag.data_pointer:
-            data = await self._read(tag.data_pointer, tag.data_size)
-            tag.parse_data(data, self._byte_order_fmt)
+        load = self._ifd_data_loads.get(ifd.pointer)
 
-    async def _fill_ifd_with_data(self, ifd: IFD) -> None:
+        if load is None:
+            load = ensure_future(self._read_ifd_data(ifd))
+            self._ifd_data_loads[ifd.pointer] = load
+
+        try:
+            # Cancellation of one caller must not cancel loading for the others
+            await shield(load)
+        except Exception:
+            if self._ifd_data_loads.get(ifd.pointer) is load:
+                del self._ifd_data_loads[ifd.pointer]
+            raise
+
+    async def _read_ifd_data(self, ifd: IFD) -> None:
         """
         Read data for all tags within IFD. Parse GeoKeys tags
         """
 
+        tags = []
+        ranges: List[ByteRange] = []
+
         for tag in ifd.tags.values():
-            await self._fill_tag_with_data(tag)
+            if tag.data_pointer and self._is_read_with_ifd(tag):
+                tags.append(tag)
+                ranges.append((tag.data_pointer, tag.data_size))
+
+        for tag, data in zip(tags, await self._read_ranges(ranges, "tag_data")):
+            tag.parse_data(bytes(data), self._byte_order_fmt)
 
         ifd.parse_geokeys()
 
-    async def _read_tile_bytes(
+    def _is_read_with_ifd(self, tag: Tag) -> bool:
+        """
+        Tile index arrays could be read by blocks or not needed at all
+        """
+
+        if tag.code in BYTE_COUNTS_TAGS and self._reads_block_leaders:
+            return False
+
+        return not self._is_read_by_blocks(tag)
+
+    def _is_read_by_blocks(self, tag: Tag) -> bool:
+        block_size = self._tile_index_block_size
+
+        if not block_size or tag.code not in ARRAY_TAGS:
+            return False
+
+        return tag.length > block_size
+
+    async def _get_index_values(
+        self, ifd: IFD, names: Sequence[str], idxs: np.ndarray
+    ) -> List[List[int]]:
+        """
+        Get values of IFD's array tags by indexes. Tags which are read by blocks
+        get missing blocks with one merged read. Every block is read only once
+        """
+
+        block_size = self._tile_index_block_size
+        blocks = np.unique(idxs // block_size).tolist() if block_size else []
+        keys = [
+            (ifd.pointer, name, block)
+            for name in names
+            if self._is_read_by_blocks(ifd.tags[name])
+            for block in blocks
+        ]
+        to_read = [key for key in keys if key not in self._index_block_loads]
+
+        if to_read:
+            load: Future = ensure_future(self._read_index_blocks(ifd, to_read))
+
+            for key in to_read:
+                self._index_block_loads[key] = load
+
+        loaded: Dict[Tuple[int, str, int], np.ndarray] = {}
+
+        for key in keys:
+            load = self._index_block_loads[key]
+
+            try:
+                loaded[key] = (await shield(load))[key]
+            except Exception:
+                # Forget all blocks of the failed read, so they are read again
+                for failed_key, block_load in list(self._index_block_loads.items()):
+                    if block_load is load:
+                        del self._index_block_loads[failed_key]
+                raise
+
+        values = []
+
+        for name in names:
+            if not self._is_read_by_blocks(ifd.tags[name]):
+                values.append(np.asarray(ifd[name])[idxs].tolist())
+                continue
+
+            blocks_positions = zip(
+                (idxs // block_size).tolist(), (idxs % block_size).tolist()
+            )
+            values.append(
+                [
+                    int(loaded[(ifd.pointer, name, block)][position])
+                    for block, position in blocks_positions
+                ]
+            )
+
+        return values
+
+    async def _read_index_blocks(
+        self, ifd: IFD, keys: Sequence[Tuple[int, str, int]]
+    ) -> Dict[Tuple[int, str, int], np.ndarray]:
+        """
+        Read blocks of array tags. Block N of a tag is its values from
+        N * tile_index_block_size, they start at data_pointer + index * value size
+        """
+
+        block_size = self._tile_index_block_size
+        dtypes = []
+        ranges: List[ByteRange] = []
+
+        for _, name, block in keys:
+            tag = ifd.tags[name]
+            dtype = np.dtype(f"{self._byte_order_fmt}{tag.type.format}")
+            start = block * block_size
+            count = min(block_size, tag.length - start)
+            # Only tags with data outside of IFD entries are read by blocks
+            assert tag.data_pointer is not None
+
+            dtypes.append(dtype)
+            ranges.append(
+                (tag.data_pointer + start * dtype.itemsize, count * dtype.itemsize)
+            )
+
+        blocks = await self._read_ranges(ranges, "tag_data")
+
+        return {
+            key: np.frombuffer(bytes(data), dtype=dtype)
+            for key, dtype, data in zip(keys, dtypes, blocks)
+        }
+
+    async def _get_tile_ranges(
+        self, ifd: IFD, coords: Sequence[Tuple[int, int]]
+    ) -> List[ByteRange]:
+        offsets, sizes = await self._get_index_values(
+            ifd, (ifd.offsets_name, ifd.byte_counts_name), ifd.get_tile_idxs(coords)
+        )
+
+        return list(zip(offsets, sizes))
+
+    async def _get_sparse_tiles(
+        self, ifd: IFD, coords: Sequence[Tuple[int, int]]
+    ) -> np.ndarray:
+        """
+        Check which of (x, y) tiles are sparse, i.e. aren't written to the file
+        and have zero byte count. Zero offset is checked when byte counts aren't read
+        """
+
+        name = ifd.offsets_name if self._reads_block_leaders else ifd.byte_counts_name
+        (values,) = await self._get_index_values(
+            ifd, (name,), ifd.get_tile_idxs(coords)
+        )
+
+        return np.asarray(values, dtype=np.int64) == 0
+
+    async def _read_tiles_data(
+        self, ifd: IFD, coords: Sequence[Tuple[int, int]]
+    ) -> List[Buffer]:
+        """
+        Read data of (x, y) tiles with merged requests. Sparse tiles aren't read,
+        their data is empty
+        """
+
+        if not self._reads_block_leaders:
+            ranges = await self._get_tile_ranges(ifd, coords)
+            to_read = [idx for idx, (_, size) in enumerate(ranges) if size]
+            blocks = await self._read_ranges([ranges[idx] for idx in to_read], "tile")
+        else:
+            (offsets,) = await self._get_index_values(
+                ifd, (ifd.offsets_name,), ifd.get_tile_idxs(coords)
+            )
+            to_read = [idx for idx, offset in enumerate(offsets) if offset]
+            blocks = await self._read_blocks_with_leaders(
+                ifd, [offsets[idx] for idx in to_read]
+            )
+
+        result: List[Buffer] = [b""] * len(coords)
+
+        for idx, block in zip(to_read, blocks):
+            result[idx] = block
+
+        return result
+
+    async def _read_blocks_with_leaders(
+        self, ifd: IFD, offsets: Sequence[int]
+    ) -> List[Buffer]:
+        """
+        Read blocks of unknown size, which are preceded by 4 bytes leader with
+        their size. Leaders are read together with blocks of the estimated size.
+        Bigger blocks are read to the end with another request
+        """
+
+        leader_size = calcsize(GDAL_BLOCK_LEADER_FMT)
+        read_size = self._estimate_block_size(ifd)
+        ranges = [(offset - leader_size, leader_size + read_size) for offset in offsets]
+        sizes = self._block_sizes.setdefault(
+            ifd.pointer, deque(maxlen=BLOCK_SIZES_WINDOW)
+        )
+
+        blocks: List[Buffer] = []
+        incomplete = []
+
+        for offset, data in zip(offsets, await self._read_ranges(ranges, "tile")):
+            (size,) = unpack(GDAL_BLOCK_LEADER_FMT, data[:leader_size])
+            blocks.append(data[leader_size : leader_size + size])
+            sizes.append(size)
+
+            if len(blocks[-1]) < size:
+                incomplete.append((len(blocks) - 1, offset, size))
+
+        rest_ranges = [
+            (offset + len(blocks[idx]), size - len(blocks[idx]))
+            for idx, offset, size in incomplete
+        ]
+        rests = await self._read_ranges(rest_ranges, "tile") if rest_ranges else []
+
+        for (idx, _, _), rest in zip(incomplete, rests):
+            blocks[idx] = bytes(blocks[idx]) + bytes(rest)
+
+        return blocks
+
+    def _estimate_block_size(self, ifd: IFD) -> int:
+        """
+        Expected size of blocks of the IFD with some headroom. It's based on the
+        median of its byte counts when they are read, or of sizes from leaders read
+        before. It's the size of uncompressed block until any size is known
+        """
+
+        max_size = int(np.prod(ifd.numpy_shape)) * ifd.numpy_dtype.itemsize
+        sizes = ifd.get(ifd.byte_counts_name)
+
+        if sizes is None:
+            sizes = self._block_sizes.get(ifd.pointer, [])
+
+        # Sparse blocks have zero size
+        sizes = np.asarray(sizes, dtype=np.int64).reshape(-1)
+        sizes = sizes[sizes > 0]
+
+        if not sizes.size:
+            return max_size
+
+        return min(ceil(np.median(sizes) * BLOCK_SIZE_HEADROOM), max_size)
+
+    async def _read_tile(
         self, ifd: IFD, x: NonNegativeInt, y: NonNegativeInt
-    ) -> bytes:
-        idx = ifd.get_tile_idx(x, y)
+    ) -> np.ndarray:
+        (data,) = await self._read_tiles_data(ifd, [(x, y)])
 
-        offset = ifd["TileOffsets"][idx]
-        size = ifd["TileByteCounts"][idx]
+        return await self._decode_tile(ifd, data)
 
-        return await self._read(offset, size)
+    def _tile_loaders(
+        self, level: NonNegativeInt, ifd: IFD, coords: Sequence[Tuple[int, int]]
+    ) -> List[Awaitable[np.ndarray]]:
+        """
+        Start reading of all tiles which aren't in the cache with merged requests.
+        Return awaitable decoded tile for every coordinate in `coords`
+        """
 
-    async def get_tile_image(
+        cache = self._tile_cache
+        to_read = [
+            (x, y)
+            for x, y in dict.fromkeys(coords)
+            if cache is None or (self.url, level, x, y) not in cache
+        ]
+        positions = {coord: idx for idx, coord in enumerate(to_read)}
+        tiles_data = ensure_future(self._read_tiles_data(ifd, to_read))
+
+        async def _load(x: int, y: int) -> np.ndarray:
+            if (x, y) not in positions:
+                # The tile was evicted from the cache after reading had started
+                return await self._read_tile(ifd, x, y)
+
+            data = (await shield(tiles_data))[positions[(x, y)]]
+            return await self._decode_tile(ifd, data)
+
+        if cache is None:
+            return [_load(x, y) for x, y in coords]
+
+        return [
+            cache.get_or_load((self.url, level, x, y), partial(_load, x, y))
+            for x, y in coords
+        ]
+
+    async def _get_filled_ifd(
+        self, level: NonNegativeInt, coords: Sequence[Tuple[int, int]]
+    ) -> IFD:
+        """
+        Get IFD of the level with loaded tags data and check that it has the tiles
+        """
+
+        return await self._fill_and_check_ifd(self._levels[level], level, coords)
+
+    async def _fill_and_check_ifd(
+        self, ifd: IFD, level: NonNegativeInt, coords: Sequence[Tuple[int, int]]
+    ) -> IFD:
+        with self._tracer.span("fill_metadata", level=level):
+            await self._fill_ifd_with_data(ifd)
+
+        if coords:
+            missing = np.flatnonzero(~ifd.has_tiles(coords))
+
+            if missing.size:
+                x, y = coords[missing[0]]
+                raise ValueError(f"Tile ({x}, {y}) on the level {level} doesn't exist")
+
+        return ifd
+
+    async def _decode_tile(self, ifd: IFD, data: Buffer) -> np.ndarray:
+        """
+        Decode tile data in the executor without blocking the event loop.
+        Empty data of sparse tiles is decoded as zeros
+        """
+
+        if not len(data):
+            return np.zeros(ifd.numpy_shape, dtype=ifd.numpy_dtype)
+
+        decoder = DECODERS_MAPPING[ifd["Compression"]]
+        block_format = BlockFormat.from_ifd(ifd)
+        tracer = self._tracer
+        in_processes = isinstance(self._executor, ProcessPoolExecutor)
+
+        # Memory views, tracers and contexts can't be sent to other processes
+        if in_processes:
+            data = bytes(data)
+            tracer = NOOP_TRACER
+
+        with self._tracer.span("decode_queue"):
+            await self._decode_slots.acquire()
+
+        try:
+            with self._tracer.span("decode"):
+                loop = get_running_loop()
+
+                if in_processes:
+                    return await loop.run_in_executor(
+                        self._executor, decoder, block_format, data, tracer
+                    )
+
+                # Executors don't pass context variables, so decoding stages are
+                # run in the context of the decode span to be its children
+                return await loop.run_in_executor(
+                    self._executor,
+                    copy_context().run,
+                    decoder,
+                    block_format,
+                    data,
+                    tracer,
+                )
+        finally:
+            self._decode_slots.release()
+
+    async def _get_tile(
+        self, cache_level: Hashable, ifd: IFD, x: NonNegativeInt, y: NonNegativeInt
+    ) -> np.ndarray:
+        if self._tile_cache is None:
+            return await self._read_tile(ifd, x, y)
+
+        return await self._tile_cache.get_or_load(
+            (self.url, cache_level, x, y), partial(self._read_tile, ifd, x, y)
+        )
+
+    async def _get_mask_tile(
         self, level: NonNegativeInt, x: NonNegativeInt, y: NonNegativeInt
+    ) -> Optional[np.ndarray]:
+        """
+        Get mask tile of the level, where 0 means nodata. Missing and sparse tiles
+        of masks are entirely nodata. None if the level has no mask
+        """
+
+        mask_ifd = self._masks[level]
+
+        if mask_ifd is None:
+            return None
+
+        await self._fill_and_check_ifd(mask_ifd, level, [])
+
+        is_missing = not mask_ifd.has_tile(x, y)
+
+        if is_missing or (await self._get_sparse_tiles(mask_ifd, [(x, y)]))[0]:
+            return np.zeros(mask_ifd.numpy_shape, dtype=mask_ifd.numpy_dtype)
+
+        return await self._get_tile(("mask", level), mask_ifd, x, y)
+
+    async def get_tile_image(
+        self,
+        level: NonNegativeInt,
+        x: NonNegativeInt,
+        y: NonNegativeInt,
+        with_mask: bool = False,
     ) -> np.ndarray:
-        ifd = self._ifds[level]
+        """
+        Get image of the tile with (height, width, bands) shape. When `with_mask`
+        is True, the tile of the level's mask is read concurrently and the result
+        is a masked array, where nodata pixels are masked. It's not masked at all
+        if the level has no mask
+        """
+
+        async def _get_image() -> np.ndarray:
+            ifd = await self._get_filled_ifd(level, [(x, y)])
+            return await self._get_tile(level, ifd, x, y)
+
+        if not with_mask:
+            return await _get_image()
 
-        await self._fill_ifd_with_data(ifd)
+        image, mask = await gather(_get_image(), self._get_mask_tile(level, x, y))
+
+        if mask is None:
+            return np.ma.masked_array(image, mask=False)
+
+        return np.ma.masked_array(image, mask=np.broadcast_to(mask == 0, image.shape))
+
+    async def get_tiles(
+        self, level: NonNegativeInt, coords: Sequence[Tuple[int, int]]
+    ) -> List[np.ndarray]:
+        """
+        Get images of several tiles of the level by their (x, y) coordinates.
+        Tiles stored next to each other in the file are read with a single request.
+        Result has the same order as `coords`
+        """
+
+        ifd = await self._get_filled_ifd(level, coords)
+
+        return await gather(*self._tile_loaders(level, ifd, coords))
+
+    async def read_window(
+        self,
+        level: NonNegativeInt,
+        x_off: NonNegativeInt,
+        y_off: NonNegativeInt,
+        width: PositiveInt,
+        height: PositiveInt,
+    ) -> np.ndarray:
+        """
+        Get image of the pixel window of the level with (height, width, bands) shape.
+        Tiles intersecting the window are read concurrently and every decoded tile
+        is copied right into its place in the result.
+        Pixels of the window outside of the image are filled with zeros
+        """
+
+        if x_off < 0 or y_off < 0 or width <= 0 or height <= 0:
+            raise ValueError(
+                f"Invalid window ({x_off}, {y_off}, {width}, {height}) "
+                f"on the level {level}"
+            )
+
+        ifd = self._levels[level]
+        coords = ifd.get_window_tiles(x_off, y_off, width, height)
+        ifd = await self._get_filled_ifd(level, coords)
+
+        _, _, n_bands = ifd.numpy_shape
+        result = np.zeros((height, width, n_bands), dtype=ifd.numpy_dtype)
+
+        async def _read_tile_into_result(
+            x: int, y: int, tile: Awaitable[np.ndarray]
+        ) -> None:
+            self._paste_tile(result, ifd, x, y, await tile, x_off, y_off)
+
+        tiles = self._tile_loaders(level, ifd, coords)
+
+        await gather(
+            *(_read_tile_into_result(x, y, tile) for (x, y), tile in zip(coords, tiles))
+        )
+
+        return result
+
+    async def _file_ordered_tiles(self, ifd: IFD) -> List[Tuple[int, int]]:
+        """
+        Get (x, y) coordinates of all existing and not sparse tiles of the IFD
+        sorted by their position in the file. It's the row-major order if offsets
+        aren't read
+        """
 
-        if not ifd.has_tile(x, y):
-            raise ValueError(f"Tile ({x}, {y}) on the level {level} doesn't exist")
+        coords = [
+            (x, y) for y in range(ifd.y_tile_count) for x in range(ifd.x_tile_count)
+        ]
+        coords = [coord for coord, exist in zip(coords, ifd.has_tiles(coords)) if exist]
+        sparse = await self._get_sparse_tiles(ifd, coords)
+        coords = [coord for coord, is_sparse in zip(coords, sparse) if not is_sparse]
+        offsets = ifd[ifd.offsets_name]
 
-        compression = ifd["Compression"]
+        if offsets is None or not coords:
+            return coords
 
-        decoder = DECODERS_MAPPING[compression]
-        data = await self._read_tile_bytes(ifd, x, y)
+        order = np.argsort(
+            np.asarray(offsets)[ifd.get_tile_idxs(coords)], kind="stable"
+        )
+
+        return [coords[idx] for idx in order]
+
+    async def iter_tiles(
+        self,
+        level: NonNegativeInt,
+        concurrency: PositiveInt = 16,
+        ordered: bool = False,
+    ) -> AsyncIterator[Tuple[int, int, np.ndarray]]:
+        """
+        Stream (x, y, image) of every existing tile of the level, sparse tiles
+        aren't written to the file and are skipped. No more than
+        `concurrency` tiles are read and decoded at once, and new ones are started
+        only when the consumer takes the results. Tiles are read in the file order
+        and new tiles are started by groups of at least half of `concurrency`, so
+        adjacent tiles are read with merged requests.
+        Tiles are yielded as soon as they are decoded, or in the file order when
+        `ordered` is True
+        """
+
+        if concurrency <= 0:
+            raise ValueError(f"Invalid concurrency {concurrency}")
+
+        ifd = await self._get_filled_ifd(level, [])
+        coords = iter(await self._file_ordered_tiles(ifd))
+        # Tiles being loaded in the order of starting
+        loading: Dict[Future, Tuple[int, int]] = {}
+
+        def _start_tiles() -> None:
+            group = [
+                coord for _, coord in zip(range(concurrency - len(loading)), coords)
+            ]
+
+            if group:
+                loaders = self._tile_loaders(level, ifd, group)
+                loading.update(zip(map(ensure_future, loaders), group))
+
+        try:
+            _start_tiles()
+
+            while loading:
+                if ordered:
+                    done = [next(iter(loading))]
+                    await done[0]
+                else:
+                    done_set, _ = await wait(loading, return_when=FIRST_COMPLETED)
+                    done = [tile for tile in loading if tile in done_set]
+
+                for tile in done:
+                    x, y = loading.pop(tile)
+
+                    if len(loading) <= concurrency // 2:
+                        _start_tiles()
+
+                    yield x, y, tile.result()
+        finally:
+            for tile in loading:
+                tile.cancel()
+
+    async def iter_rows(
+        self, level: NonNegativeInt = 0, batch_rows: PositiveInt = 256
+    ) -> AsyncIterator[np.ndarray]:
+        """
+        Stream the whole image of the level by batches of rows with
+        (rows, width, bands) shape. Batches are rounded up to whole rows of tiles
+        or strips, so every one is read once. The next batch is read while the
+        current one is processed, so no more than two batches are in memory
+        """
+
+        ifd = self._levels[level]
+        width, height = ifd["ImageWidth"], ifd["ImageHeight"]
+        batch_rows = ceil(batch_rows / ifd.tile_height) * ifd.tile_height
+
+        def _read_batch(y_off: int) -> Future:
+            rows = min(batch_rows, height - y_off)
+            return ensure_future(self.read_window(level, 0, y_off, width, rows))
+
+        y_off = 0
+        batch: Optional[Future] = _read_batch(y_off)
+
+        try:
+            while batch is not None:
+                image = await batch
+                y_off += batch_rows
+                batch = _read_batch(y_off) if y_off < height else None
+
+                yield image
+        finally:
+            if batch is not None:
+                batch.cancel()
+
+    def _select_level(
+        self, bbox_width: int, bbox_height: int, out_width: int, out_height: int
+    ) -> NonNegativeInt:
+        """
+        Get the smallest level which has at least `out_width` x `out_height` pixels
+        in the bbox of the full resolution level. It's the full resolution level
+        when the result is upsampled
+        """
+
+        full_width = self._levels[0]["ImageWidth"]
+        full_height = self._levels[0]["ImageHeight"]
+
+        sufficient = []
+
+        for level, ifd in enumerate(self._levels):
+            enough_width = bbox_width * ifd["ImageWidth"] >= out_width * full_width
+            enough_height = bbox_height * ifd["ImageHeight"] >= out_height * full_height
+
+            if enough_width and enough_height:
+                sufficient.append(level)
+
+        if not sufficient:
+            return 0
+
+        return min(sufficient, key=lambda level: self._levels[level]["ImageWidth"])
+
+    async def read(
+        self,
+        bbox: Tuple[int, int, int, int],
+        out_shape: Tuple[PositiveInt, PositiveInt],
+        resampling: Resampling = "nearest",
+    ) -> np.ndarray:
+        """
+        Get image of the (left, top, right, bottom) bbox in pixels of the full
+        resolution level resampled into (height, width) `out_shape`.
+        Only tiles of the smallest level with enough resolution are read.
+        `resampling` is "nearest", "average" or "bilinear"
+        """
+
+        left, top, right, bottom = bbox
+        out_height, out_width = out_shape
+
+        if left < 0 or top < 0 or right <= left or bottom <= top:
+            raise ValueError(f"Invalid bbox {bbox}")
+
+        if out_height <= 0 or out_width <= 0:
+            raise ValueError(f"Invalid out_shape {out_shape}")
+
+        if resampling not in KERNELS:
+            raise ValueError(f"Unknown resampling {resampling!r}")
+
+        level = self._select_level(right - left, bottom - top, out_width, out_height)
+        level_size = (
+            self._levels[level]["ImageWidth"],
+            self._levels[level]["ImageHeight"],
+        )
+        x_scale = level_size[0] / self._levels[0]["ImageWidth"]
+        y_scale = level_size[1] / self._levels[0]["ImageHeight"]
+
+        # The bbox in pixels of the level, bilinear kernel needs neighbour pixels
+        window = (left * x_scale, top * y_scale, right * x_scale, bottom * y_scale)
+        x_off, y_off, width, height = floor_window(
+            window, margin=int(resampling == "bilinear"), image_size=level_size
+        )
+
+        image = await self.read_window(level, x_off, y_off, width, height)
+
+        window = (
+            window[0] - x_off,
+            window[1] - y_off,
+            window[2] - x_off,
+            window[3] - y_off,
+        )
+
+        with self._tracer.span("resample", resampling=resampling):
+            return await get_running_loop().run_in_executor(
+                self._executor, resample, image, window, out_shape, resampling
+            )
+
+    @staticmethod
+    def _paste_tile(
+        result: np.ndarray,
+        ifd: IFD,
+        x: NonNegativeInt,
+        y: NonNegativeInt,
+        tile: np.ndarray,
+        x_off: NonNegativeInt,
+        y_off: NonNegativeInt,
+    ) -> None:
+        """
+        Copy the part of the tile which is inside both the image and the window
+        with (x_off, y_off) origin and `result` shape into `result`
+        """
 
-        return decoder(ifd, data)
+        height, width = result.shape[:2]
+        tile_height, tile_width, n_bands = ifd.numpy_shape
+        # The last strip could be shorter
+        tile = tile.reshape(-1, tile_width, n_bands)
+
+        # Tile bounds in the level's pixels, without padding outside the image
+        left = x * tile_width
+        top = y * tile_height
+        right = min(left + tile_width, ifd["ImageWidth"], x_off + width)
+        bottom = min(top + tile_height, ifd["ImageHeight"], y_off + height)
+        left = max(left, x_off)
+        top = max(top, y_off)
+
+        result[top - y_off : bottom - y_off, left - x_off : right - x_off] = tile[
+            top - y * tile_height : bottom - y * tile_height,
+            left - x * tile_width : right - x * tile_width,
+        ]
@@ -1,4 +1,6 @@
-from typing import Any, Callable, Dict
+from dataclasses import dataclass
+from math import ceil
+from typing import Any, Callable, Dict, Optional, Tuple, Union, cast
 
 import numpy as np
 from imagecodecs import (
@@ -10,50 +12,134 @@ from imagecodecs import (
 )
 
 from async_cog.ifd import IFD
+from async_cog.sources.range_source import Buffer
+from async_cog.tracing import NOOP_TRACER, Tracer
 
 
-def _unpredict(ifd: IFD, array: np.ndarray) -> None:
-    if ifd.get("Predictor") == 2:
-        delta_decode(array, out=array, axis=-1)
+@dataclass(frozen=True)
+class BlockFormat:
+    """
+    Part of IFD needed to decode its tiles or strips. It's sent to decoders
+    instead of the whole IFD, which could have big tile index arrays
+    """
 
+    shape: Tuple[int, int, int]
+    dtype: np.dtype
+    is_tiled: bool
+    bits_per_sample: int
+    predictor: int
+    jpeg_tables: Optional[bytes]
 
-def decode_raw(ifd: IFD, data: bytes) -> np.ndarray:
-    return np.frombuffer(data, dtype=ifd.numpy_dtype).reshape(*ifd.numpy_shape)
+    @classmethod
+    def from_ifd(cls, ifd: IFD) -> "BlockFormat":
+        return cls(
+            shape=ifd.numpy_shape,
+            dtype=ifd.numpy_dtype,
+            is_tiled=ifd.is_tiled,
+            bits_per_sample=ifd["BitsPerSample"][0],
+            predictor=ifd.get("Predictor", 1),
+            jpeg_tables=ifd.get("JPEGTables"),
+        )
 
 
-def decode_lzw(ifd: IFD, data: bytes) -> np.ndarray:
-    raw_data = lzw_decode(data)
-    array = np.frombuffer(raw_data, dtype=ifd.numpy_dtype).reshape(*ifd.numpy_shape)
+def _unpredict(block_format: BlockFormat, array: np.ndarray, tracer: Tracer) -> None:
+    if block_format.predictor == 2:
+        with tracer.span("unpredict"):
+            delta_decode(array, out=array, axis=-1)
 
-    _unpredict(ifd, array)
+
+def _to_array(
+    block_format: BlockFormat,
+    raw_data: Union[bytes, bytearray, memoryview],
+    tracer: Tracer,
+) -> np.ndarray:
+    height, width, n_bands = block_format.shape
+
+    # The last strip has only remaining rows of the image
+    if not block_format.is_tiled:
+        height = -1
+
+    with tracer.span("reshape"):
+        if block_format.bits_per_sample == 1:
+            return _unpack_bits(raw_data, height, width, n_bands)
+
+        array = np.frombuffer(raw_data, dtype=block_format.dtype)
+        return array.reshape(height, width, n_bands)
+
+
+def _unpack_bits(
+    raw_data: Union[bytes, bytearray, memoryview],
+    height: int,
+    width: int,
+    n_bands: int,
+) -> np.ndarray:
+    """
+    Unpack bilevel samples into 0 or 1 bytes. Every row is padded to whole bytes
+    """
+
+    row_size = ceil(width * n_bands / 8)
+    rows = np.frombuffer(raw_data, dtype=np.uint8).reshape(height, row_size)
+    array = np.unpackbits(rows, axis=1, count=width * n_bands)
+
+    return array.reshape(height, width, n_bands)
+
+
+def decode_raw(
+    block_format: BlockFormat, data: Buffer, tracer: Tracer = NOOP_TRACER
+) -> np.ndarray:
+    return _to_array(block_format, data, tracer)
+
+
+def decode_lzw(
+    block_format: BlockFormat, data: Buffer, tracer: Tracer = NOOP_TRACER
+) -> np.ndarray:
+    with tracer.span("decompress", compression="lzw"):
+        # Decoders accept any buffer, memoryviews are decompressed without copying
+        raw_data = lzw_decode(cast(bytes, data))
+
+    array = _to_array(block_format, raw_data, tracer)
+
+    _unpredict(block_format, array, tracer)
 
     return array
 
 
-def decode_deflate(ifd: IFD, data: bytes) -> np.ndarray:
-    raw_data = zlib_decode(data)
-    array = np.frombuffer(raw_data, dtype=ifd.numpy_dtype).reshape(*ifd.numpy_shape)
+def decode_deflate(
+    block_format: BlockFormat, data: Buffer, tracer: Tracer = NOOP_TRACER
+) -> np.ndarray:
+    with tracer.span("decompress", compression="deflate"):
+        raw_data = zlib_decode(cast(bytes, data))
 
-    _unpredict(ifd, array)
+    array = _to_array(block_format, raw_data, tracer)
+
+    _unpredict(block_format, array, tracer)
 
     return array
 
 
-def decode_packbits(ifd: IFD, data: bytes) -> np.ndarray:
-    raw_data = packbits_decode(data)
-    return np.frombuffer(raw_data, dtype=ifd.numpy_dtype).reshape(*ifd.numpy_shape)
+def decode_packbits(
+    block_format: BlockFormat, data: Buffer, tracer: Tracer = NOOP_TRACER
+) -> np.ndarray:
+    with tracer.span("decompress", compression="packbits"):
+        raw_data = packbits_decode(cast(bytes, data))
+
+    return _to_array(block_format, raw_data, tracer)
 
 
-def decode_jpeg(ifd: IFD, data: bytes) -> np.ndarray:
-    jpeg_table = ifd["JPEGTables"]
+def decode_jpeg(
+    block_format: BlockFormat, data: Buffer, tracer: Tracer = NOOP_TRACER
+) -> np.ndarray:
+    jpeg_table = block_format.jpeg_tables or b""
 
-    # insert tables, first removing the SOI and EOI
-    data = data[0:2] + jpeg_table[2:-2] + data[2:]
+    with tracer.span("jpeg_tables"):
+        # insert tables, first removing the SOI and EOI
+        data = b"".join((data[0:2], jpeg_table[2:-2], data[2:]))
 
-    return jpeg_decode(data)
+    with tracer.span("decompress", compression="jpeg"):
+        return jpeg_decode(data)
 
 
-Decoder = Callable[[IFD, bytes], Any]
+Decoder = Callable[[BlockFormat, Buffer, Tracer], Any]
 
 DECODERS_MAPPING: Dict[int, Decoder] = {
     1: decode_raw,
@@ -1,17 +1,34 @@
 from typing import Any, Optional
 
-from pydantic import BaseModel
-
 from async_cog.geokeys.geokey_code import GeoKeyCode
+from async_cog.models import GeoKeyModel
+
 
+class GeoKey:
+    __slots__ = ("code", "value")
 
-class GeoKey(BaseModel):
     code: GeoKeyCode
     value: Optional[Any]
 
+    def __init__(self, code: int, value: Optional[Any] = None):
+        self.code = GeoKeyCode.get(code)
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, GeoKey):
+            return NotImplemented
+
+        return (self.code, self.value) == (other.code, other.value)
+
+    def __repr__(self) -> str:
+        return f"GeoKey(code={int(self.code)}, value={self.value!r})"
+
     def __str__(self) -> str:
         return f"{self.name}: {str(self.value)}"
 
     @property
     def name(self) -> str:
         return self.code.name
+
+    def to_model(self) -> GeoKeyModel:
+        return GeoKeyModel(code=self.code, name=self.name, value=self.value)
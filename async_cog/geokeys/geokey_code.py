@@ -1,17 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Iterator
+from functools import lru_cache
 
 
 class GeoKeyCode(int):
     name: str
 
     @classmethod
-    def __get_validators__(cls) -> Iterator[Any]:
-        yield cls.validate
+    @lru_cache(maxsize=None)
+    def get(cls, code: int) -> GeoKeyCode:
+        """
+        Instances are immutable, so they are created once for every value
+        """
 
-    @classmethod
-    def validate(cls, code: int) -> GeoKeyCode:
         return cls(code)
 
     def __init__(self, code: int):
@@ -1,20 +1,61 @@
 from math import ceil
-from typing import Any, Dict, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
-from pydantic import BaseModel, NonNegativeInt
+from pydantic import NonNegativeInt
 
 from async_cog.geokeys import GeoKey
+from async_cog.models import IFDModel
 from async_cog.tags import Tag
 from async_cog.tags.tag_code import GEOKEY_TAGS, TagCode
 
-
-class IFD(BaseModel):
-    pointer: NonNegativeInt
-    n_tags: NonNegativeInt
-    next_ifd_pointer: NonNegativeInt
-    tags: Dict[str, Tag] = {}
-    geokeys: Dict[str, GeoKey] = {}
+# Bit of NewSubfileType which marks transparency masks
+MASK_SUBFILE_TYPE = 4
+
+
+class IFD:
+    """
+    Parsed IFD with its tags and GeoKeys. Use to_model() to get pydantic model
+    """
+
+    __slots__ = ("pointer", "n_tags", "next_ifd_pointer", "tags", "geokeys")
+
+    pointer: int
+    n_tags: int
+    next_ifd_pointer: int
+    tags: Dict[str, Tag]
+    geokeys: Dict[str, GeoKey]
+
+    def __init__(
+        self,
+        pointer: int,
+        n_tags: int,
+        next_ifd_pointer: int,
+        tags: Optional[Dict[str, Tag]] = None,
+        geokeys: Optional[Dict[str, GeoKey]] = None,
+    ):
+        self.pointer = pointer
+        self.n_tags = n_tags
+        self.next_ifd_pointer = next_ifd_pointer
+        self.tags = tags if tags is not None else {}
+        self.geokeys = geokeys if geokeys is not None else {}
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, IFD):
+            return NotImplemented
+
+        return (self.pointer, self.n_tags, self.next_ifd_pointer) == (
+            other.pointer,
+            other.n_tags,
+            other.next_ifd_pointer,
+        ) and (self.tags, self.geokeys) == (other.tags, other.geokeys)
+
+    def __repr__(self) -> str:
+        return (
+            f"IFD(pointer={self.pointer}, n_tags={self.n_tags}, "
+            f"next_ifd_pointer={self.next_ifd_pointer}, tags={self.tags!r}, "
+            f"geokeys={self.geokeys!r})"
+        )
 
     def __getitem__(self, key: str) -> Any:
         if key in self.geokeys:
@@ -42,53 +83,156 @@ class IFD(BaseModel):
 
     def to_dict(self) -> Dict[str, Any]:
         tags = {
-            tag.name: tag.value
+            tag.name: (
+                tag.value.tolist() if isinstance(tag.value, np.ndarray) else tag.value
+            )
             for tag in self.tags.values()
             if not isinstance(tag.value, bytes) and tag.code not in GEOKEY_TAGS
         }
         geokeys = {geokey.name: geokey.value for geokey in self.geokeys.values()}
         return {**tags, **geokeys}
 
+    def to_model(self) -> IFDModel:
+        return IFDModel(
+            pointer=self.pointer,
+            n_tags=self.n_tags,
+            next_ifd_pointer=self.next_ifd_pointer,
+            tags={name: tag.to_model() for name, tag in self.tags.items()},
+            geokeys={name: geokey.to_model() for name, geokey in self.geokeys.items()},
+        )
+
+    @property
+    def is_tiled(self) -> bool:
+        """
+        Is the image organised in tiles. Otherwise it's organised in strips, which
+        are handled as tiles of the image width and RowsPerStrip height
+        """
+
+        return "TileWidth" in self
+
+    @property
+    def tile_width(self) -> int:
+        if self.is_tiled:
+            return self.get("TileWidth")
+
+        return self.get("ImageWidth")
+
+    @property
+    def tile_height(self) -> int:
+        if self.is_tiled:
+            return self.get("TileHeight")
+
+        # The whole image is a single strip by default
+        rows_per_strip = self.get("RowsPerStrip", 2**32 - 1)
+
+        return min(rows_per_strip, self.get("ImageHeight") or rows_per_strip)
+
+    @property
+    def offsets_name(self) -> str:
+        return "TileOffsets" if self.is_tiled else "StripOffsets"
+
+    @property
+    def byte_counts_name(self) -> str:
+        return "TileByteCounts" if self.is_tiled else "StripByteCounts"
+
     def get_tile_idx(self, x: NonNegativeInt, y: NonNegativeInt) -> NonNegativeInt:
         return (y * self.x_tile_count) + x
 
     @property
     def x_tile_count(self) -> NonNegativeInt:
-        if not self.get("ImageWidth") or not self.get("TileWidth"):
+        if not self.get("ImageWidth") or not self.tile_width:
             return 0
 
-        return ceil(self["ImageWidth"] / self["TileWidth"])
+        return ceil(self["ImageWidth"] / self.tile_width)
 
     @property
     def y_tile_count(self) -> NonNegativeInt:
-        if not self.get("ImageHeight") or not self.get("TileHeight"):
+        if not self.get("ImageHeight") or not self.tile_height:
             return 0
 
-        return ceil(self["ImageHeight"] / self["TileHeight"])
+        return ceil(self["ImageHeight"] / self.tile_height)
 
     def has_tile(self, x: NonNegativeInt, y: NonNegativeInt) -> bool:
-        idx = self.get_tile_idx(x, y)
-        tile_offsets = self.get("TileOffsets", [])
-        tile_byte_counts = self.get("TileByteCounts", [])
+        return bool(self.has_tiles([(x, y)])[0])
+
+    def has_tiles(self, coords: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """
+        Check existence of all (x, y) tiles at once, return array of booleans.
+        Lengths of TileOffsets and TileByteCounts (or StripOffsets and
+        StripByteCounts) are used, so their data may be not read yet
+        """
+
+        xs, ys = np.asarray(coords, dtype=np.int64).reshape(-1, 2).T
+        n_tiles = min(
+            self.tags[name].length if name in self.tags else 0
+            for name in (self.offsets_name, self.byte_counts_name)
+        )
 
-        tile_exist = self.x_tile_count > 0 and self.y_tile_count > 0
-        tile_data_exist = len(tile_offsets) > idx and len(tile_byte_counts) > idx
+        tile_exist = (xs < self.x_tile_count) & (ys < self.y_tile_count)
+        tile_data_exist = ys * self.x_tile_count + xs < n_tiles
 
-        return tile_exist and tile_data_exist
+        return tile_exist & tile_data_exist
+
+    def get_tile_idxs(self, coords: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """
+        Get indexes of (x, y) tiles in TileOffsets and TileByteCounts, or strips
+        in StripOffsets and StripByteCounts
+        """
+
+        xs, ys = np.asarray(coords, dtype=np.int64).reshape(-1, 2).T
+
+        return ys * self.x_tile_count + xs
+
+    def get_window_tiles(
+        self,
+        x_off: NonNegativeInt,
+        y_off: NonNegativeInt,
+        width: NonNegativeInt,
+        height: NonNegativeInt,
+    ) -> List[Tuple[int, int]]:
+        """
+        Get (x, y) coordinates of tiles intersecting the pixel window
+        """
+
+        tile_width, tile_height = self.tile_width, self.tile_height
+        x_end = min(x_off + width, self.x_tile_count * tile_width)
+        y_end = min(y_off + height, self.y_tile_count * tile_height)
+
+        x_tiles = range(x_off // tile_width, ceil(x_end / tile_width))
+        y_tiles = range(y_off // tile_height, ceil(y_end / tile_height))
+
+        return [(x, y) for y in y_tiles for x in x_tiles]
+
+    @property
+    def is_mask(self) -> bool:
+        """
+        Is it a transparency mask of another IFD, e.g. GDAL's internal nodata mask
+        """
+
+        subfile_type = self.get("NewSubfileType", 0)
+
+        # The tag could have any type in a broken file
+        return isinstance(subfile_type, int) and bool(subfile_type & MASK_SUBFILE_TYPE)
 
     @property
     def numpy_shape(self) -> tuple:
         n_bands = self.get("SamplesPerPixel")
-        width = self.get("TileWidth")
-        height = self.get("TileHeight")
 
-        return width, height, n_bands
+        return self.tile_height, self.tile_width, n_bands
 
     @property
     def numpy_dtype(self) -> np.dtype:
+        """
+        Type of decoded samples. Bilevel samples, e.g. of GDAL's masks, are
+        unpacked into bytes of 0 or 1
+        """
+
         sample_format = self["SampleFormat"][0]
         bits_per_sample = self["BitsPerSample"][0]
 
+        if bits_per_sample == 1:
+            return np.dtype("uint8")
+
         FORMAT_MAPPING = {1: "uint", 2: "int", 3: "float"}
 
         type_str = FORMAT_MAPPING.get(sample_format, "uint")
@@ -132,7 +276,7 @@ class IFD(BaseModel):
                 value = None
 
             if tag_code > 0:
-                tag_name = TagCode(tag_code).name
+                tag_name = TagCode.get(tag_code).name
                 tag_value = self[tag_name]
 
                 if tag_name == "GeoAsciiParamsTag":
@@ -0,0 +1,64 @@
+from typing import List, NamedTuple, Sequence, Tuple
+
+from async_cog.sources.range_source import Buffer
+
+# (offset, size) of the requested bytes
+ByteRange = Tuple[int, int]
+
+
+class MergedRange(NamedTuple):
+    offset: int
+    size: int
+    # Positions of the merged ranges in the list passed to merge_ranges()
+    indexes: List[int]
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+def merge_ranges(ranges: Sequence[ByteRange], max_gap: int) -> List[MergedRange]:
+    """
+    Merge byte ranges which overlap or are separated by no more than `max_gap`
+    bytes into bigger ranges, so they could be read with fewer requests.
+    Empty ranges are skipped
+    """
+
+    order = sorted(
+        (idx for idx, (_, size) in enumerate(ranges) if size > 0),
+        key=lambda idx: ranges[idx][0],
+    )
+
+    merged: List[MergedRange] = []
+
+    for idx in order:
+        offset, size = ranges[idx]
+
+        if merged and offset - merged[-1].end <= max_gap:
+            last = merged[-1]
+            end = max(last.end, offset + size)
+            merged[-1] = MergedRange(last.offset, end - last.offset, last.indexes)
+            last.indexes.append(idx)
+        else:
+            merged.append(MergedRange(offset, size, [idx]))
+
+    return merged
+
+
+def split_merged(
+    ranges: Sequence[ByteRange], merged: Sequence[MergedRange], data: Sequence[Buffer]
+) -> List[Buffer]:
+    """
+    Slice the data of merged ranges back into the data of the original ranges.
+    Result has the same order as `ranges`
+    """
+
+    result: List[Buffer] = [b""] * len(ranges)
+
+    for merged_range, merged_data in zip(merged, data):
+        for idx in merged_range.indexes:
+            offset, size = ranges[idx]
+            start = offset - merged_range.offset
+            result[idx] = merged_data[start : start + size]
+
+    return result
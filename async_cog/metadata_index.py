@@ -0,0 +1,245 @@
+from dataclasses import dataclass
+from fractions import Fraction
+from hashlib import sha256
+from json import dumps, loads
+from os import PathLike, replace, utime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, List, Literal, Optional, Union
+
+import numpy as np
+
+from async_cog.ifd import IFD
+from async_cog.tags import BytesTag, FractionsTag, ListTag, NumberTag, StringTag, Tag
+
+TAG_CLASSES = {
+    cls.__name__: cls for cls in (BytesTag, FractionsTag, ListTag, NumberTag, StringTag)
+}
+
+# Version of the entries format, entries of other versions are ignored
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Metadata:
+    """
+    Parsed state of COGReader which is enough to open the file without reading it
+    """
+
+    version: Literal[42, 43]
+    byte_order_fmt: Literal["<", ">"]
+    first_ifd_pointer: int
+    gdal_metadata: Dict[str, str]
+    ifds: List[IFD]
+
+
+@dataclass
+class MetadataIndexStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class MetadataIndex:
+    """
+    Directory with parsed metadata of files, one .npz file per URL. An entry is
+    used only while the file has the same fingerprint (ETag, Last-Modified and
+    size for HTTP). Least recently used entries are removed when their total size
+    exceeds `max_bytes`. The directory could be shared by many processes
+    """
+
+    def __init__(self, path: Union[str, PathLike], max_bytes: int = 256 * 2**20):
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self.stats = MetadataIndexStats()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of entries in bytes
+        """
+
+        return sum(path.stat().st_size for path in self._entries())
+
+    def get(self, url: str, fingerprint: str) -> Optional[Metadata]:
+        path = self._entry_path(url)
+
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                header = loads(str(entry["header"]))
+                valid = (header["format"], header["url"], header["fingerprint"]) == (
+                    FORMAT_VERSION,
+                    url,
+                    fingerprint,
+                )
+                metadata = _decode_metadata(header, entry) if valid else None
+
+        except FileNotFoundError:
+            metadata = None
+
+        except Exception:
+            # Broken entry, e.g. written by another version of the library
+            path.unlink(missing_ok=True)
+            metadata = None
+
+        if metadata is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        # Modification time is the time of the last use for eviction
+        utime(path)
+
+        return metadata
+
+    def put(self, url: str, fingerprint: str, metadata: Metadata) -> None:
+        header = {"format": FORMAT_VERSION, "url": url, "fingerprint": fingerprint}
+        arrays: Dict[str, np.ndarray] = {}
+        header.update(_encode_metadata(metadata, arrays))
+        # Any, so mypy doesn't match arrays with savez()'s own keyword arguments
+        entry: Dict[str, Any] = {"header": np.array(dumps(header)), **arrays}
+
+        # Write into a temporary file and rename it, so concurrent readers
+        # never see a partially written entry
+        with NamedTemporaryFile(dir=self._path, suffix=".tmp", delete=False) as file:
+            try:
+                np.savez(file, **entry)
+            except Exception:
+                Path(file.name).unlink()
+                raise
+
+        replace(file.name, self._entry_path(url))
+        self._evict()
+
+    def clear(self) -> None:
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+
+    def _entry_path(self, url: str) -> Path:
+        return self._path / f"{sha256(url.encode()).hexdigest()}.npz"
+
+    def _entries(self) -> List[Path]:
+        return list(self._path.glob("*.npz"))
+
+    def _evict(self) -> None:
+        entries = []
+
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+
+        for _, entry_size, path in sorted(entries, key=lambda entry: entry[:2]):
+            if size <= self._max_bytes:
+                break
+
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            self.stats.evictions += 1
+
+
+def _encode_value(value: Any, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Represent tag value as JSON. Arrays and bytes are stored separately
+    """
+
+    if isinstance(value, np.ndarray):
+        key = f"array_{len(arrays)}"
+        arrays[key] = value
+        return {"array": key}
+
+    if isinstance(value, bytes):
+        key = f"array_{len(arrays)}"
+        arrays[key] = np.frombuffer(value, dtype=np.uint8)
+        return {"bytes": key}
+
+    if isinstance(value, list) and value and isinstance(value[0], Fraction):
+        return {"fractions": [[item.numerator, item.denominator] for item in value]}
+
+    return {"value": value}
+
+
+def _decode_value(encoded: Dict[str, Any], arrays: Any) -> Any:
+    if "array" in encoded:
+        return arrays[encoded["array"]]
+
+    if "bytes" in encoded:
+        return arrays[encoded["bytes"]].tobytes()
+
+    if "fractions" in encoded:
+        return [Fraction(*item) for item in encoded["fractions"]]
+
+    return encoded["value"]
+
+
+def _encode_metadata(
+    metadata: Metadata, arrays: Dict[str, np.ndarray]
+) -> Dict[str, Any]:
+    return {
+        "version": metadata.version,
+        "byte_order_fmt": metadata.byte_order_fmt,
+        "first_ifd_pointer": metadata.first_ifd_pointer,
+        "gdal_metadata": metadata.gdal_metadata,
+        "ifds": [
+            {
+                "pointer": ifd.pointer,
+                "n_tags": ifd.n_tags,
+                "next_ifd_pointer": ifd.next_ifd_pointer,
+                "tags": [_encode_tag(tag, arrays) for tag in ifd.tags.values()],
+            }
+            for ifd in metadata.ifds
+        ],
+    }
+
+
+def _encode_tag(tag: Tag, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    return {
+        "class": type(tag).__name__,
+        "code": int(tag.code),
+        "type": int(tag.type),
+        "length": tag.length,
+        "data_pointer": tag.data_pointer,
+        **_encode_value(tag.value, arrays),
+    }
+
+
+def _decode_metadata(header: Dict[str, Any], arrays: Any) -> Metadata:
+    ifds = []
+
+    for encoded_ifd in header["ifds"]:
+        tags = [
+            TAG_CLASSES[encoded["class"]](
+                code=encoded["code"],
+                type=encoded["type"],
+                length=encoded["length"],
+                data_pointer=encoded["data_pointer"],
+                value=_decode_value(encoded, arrays),
+            )
+            for encoded in encoded_ifd["tags"]
+        ]
+        ifd = IFD(
+            pointer=encoded_ifd["pointer"],
+            n_tags=encoded_ifd["n_tags"],
+            next_ifd_pointer=encoded_ifd["next_ifd_pointer"],
+            tags={tag.name: tag for tag in tags},
+        )
+        ifd.parse_geokeys()
+        ifds.append(ifd)
+
+    return Metadata(
+        version=header["version"],
+        byte_order_fmt=header["byte_order_fmt"],
+        first_ifd_pointer=header["first_ifd_pointer"],
+        gdal_metadata=header.get("gdal_metadata", {}),
+        ifds=ifds,
+    )
@@ -0,0 +1,115 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Literal, Optional, Sequence
+
+# Part of the reading a request is made for
+Phase = Literal["header", "ifd", "tag_data", "tile"]
+PHASES: Sequence[Phase] = ("header", "ifd", "tag_data", "tile")
+
+# Upper bounds of latency histogram buckets in seconds, the last one is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class ReadEvent:
+    phase: Phase
+    offset: int
+    # Total size of requested ranges in bytes
+    size: int
+    # Number of ranges requested with the request
+    ranges: int
+    # Size of the received data in bytes
+    bytes_read: int
+    # Seconds from the start of the request till the data is received
+    duration: float
+
+
+@dataclass
+class PhaseStats:
+    requests: int = 0
+    # Byte ranges requested, one request could ask for several of them
+    ranges: int = 0
+    bytes_requested: int = 0
+    # Bytes which were actually needed. It's less than requested when
+    # requests are merged with gaps or the data is prefetched
+    bytes_used: int = 0
+    retries: int = 0
+    # Duplicates of slow requests, see HedgePolicy
+    hedges: int = 0
+    latency_sum: float = 0
+    # Number of requests in each of LATENCY_BUCKETS and one more for slower ones
+    latency_buckets: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+    def observe_latency(self, duration: float) -> None:
+        self.latency_sum += duration
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+
+ReadCallback = Callable[[ReadEvent], None]
+RetryCallback = Callable[[Phase], None]
+
+
+class IOStats:
+    """
+    Statistics of reader's I/O by phase. Every request is passed to `on_read`
+    callbacks and every retry to `on_retry` ones, e.g. to export them to
+    Prometheus. The same stats could be shared by many readers
+    """
+
+    def __init__(
+        self,
+        on_read: Optional[Sequence[ReadCallback]] = None,
+        on_retry: Optional[Sequence[RetryCallback]] = None,
+    ):
+        self.phases: Dict[Phase, PhaseStats] = {phase: PhaseStats() for phase in PHASES}
+        self.on_read: List[ReadCallback] = list(on_read or [])
+        self.on_retry: List[RetryCallback] = list(on_retry or [])
+
+    def __getitem__(self, phase: Phase) -> PhaseStats:
+        return self.phases[phase]
+
+    @property
+    def total(self) -> PhaseStats:
+        """
+        Sum of stats of all phases
+        """
+
+        total = PhaseStats()
+
+        for stats in self.phases.values():
+            total.requests += stats.requests
+            total.ranges += stats.ranges
+            total.bytes_requested += stats.bytes_requested
+            total.bytes_used += stats.bytes_used
+            total.retries += stats.retries
+            total.hedges += stats.hedges
+            total.latency_sum += stats.latency_sum
+            total.latency_buckets = [
+                a + b for a, b in zip(total.latency_buckets, stats.latency_buckets)
+            ]
+
+        return total
+
+    def record_read(self, event: ReadEvent) -> None:
+        stats = self.phases[event.phase]
+        stats.requests += 1
+        stats.ranges += event.ranges
+        stats.bytes_requested += event.size
+        stats.observe_latency(event.duration)
+
+        for callback in self.on_read:
+            callback(event)
+
+    def record_used(self, phase: Phase, size: int) -> None:
+        self.phases[phase].bytes_used += size
+
+    def record_hedge(self, phase: Phase) -> None:
+        self.phases[phase].hedges += 1
+
+    def record_retry(self, phase: Phase) -> None:
+        self.phases[phase].retries += 1
+
+        for callback in self.on_retry:
+            callback(phase)
@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, NonNegativeInt, PositiveInt
+
+
+class TagModel(BaseModel):
+    code: NonNegativeInt
+    name: str
+    type: PositiveInt
+    length: NonNegativeInt
+    data_pointer: Optional[NonNegativeInt]
+    value: Optional[Any]
+
+
+class GeoKeyModel(BaseModel):
+    code: NonNegativeInt
+    name: str
+    value: Optional[Any]
+
+
+class IFDModel(BaseModel):
+    """
+    Export view of parsed IFD for validation and serialization, e.g.
+    reader._ifds[0].to_model().json(). The reader itself doesn't use models
+    """
+
+    pointer: NonNegativeInt
+    n_tags: NonNegativeInt
+    next_ifd_pointer: NonNegativeInt
+    tags: Dict[str, TagModel] = {}
+    geokeys: Dict[str, GeoKeyModel] = {}
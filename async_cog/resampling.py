@@ -0,0 +1,123 @@
+from math import floor
+from typing import Callable, Dict, Literal, Optional, Tuple
+
+import numpy as np
+
+Resampling = Literal["nearest", "average", "bilinear"]
+
+
+def _nearest(
+    image: np.ndarray, axis: int, start: float, step: float, size: int
+) -> np.ndarray:
+    centers = start + (np.arange(size) + 0.5) * step
+    idxs = np.clip(np.floor(centers).astype(int), 0, image.shape[axis] - 1)
+
+    return np.take(image, idxs, axis=axis)
+
+
+def _bilinear(
+    image: np.ndarray, axis: int, start: float, step: float, size: int
+) -> np.ndarray:
+    # Pixel values are in pixel centers, so shift coordinates by half of a pixel
+    positions = start + (np.arange(size) + 0.5) * step - 0.5
+    lower = np.floor(positions)
+    fractions = positions - lower
+
+    last = image.shape[axis] - 1
+    lower_idxs = np.clip(lower.astype(int), 0, last)
+    upper_idxs = np.clip(lower.astype(int) + 1, 0, last)
+
+    shape = [1] * image.ndim
+    shape[axis] = size
+    fractions = fractions.reshape(shape)
+
+    lower_values = np.take(image, lower_idxs, axis=axis)
+    upper_values = np.take(image, upper_idxs, axis=axis)
+
+    return lower_values * (1 - fractions) + upper_values * fractions
+
+
+def _average(
+    image: np.ndarray, axis: int, start: float, step: float, size: int
+) -> np.ndarray:
+    # Weight of every source pixel in every result pixel is the length of their
+    # intersection, so (size, source size) matrix averages all pixels at once
+    edges = start + np.arange(size + 1) * step
+    pixels = np.arange(image.shape[axis])
+
+    weights = np.minimum(edges[1:, None], pixels + 1) - np.maximum(
+        edges[:-1, None], pixels
+    )
+    weights = np.maximum(weights, 0)
+    weights /= np.maximum(weights.sum(axis=1, keepdims=True), np.finfo(float).tiny)
+
+    result = np.tensordot(weights, image, axes=([1], [axis]))
+
+    return np.moveaxis(result, 0, axis)
+
+
+Kernel = Callable[[np.ndarray, int, float, float, int], np.ndarray]
+
+KERNELS: Dict[str, Kernel] = {
+    "nearest": _nearest,
+    "average": _average,
+    "bilinear": _bilinear,
+}
+
+
+def resample(
+    image: np.ndarray,
+    window: Tuple[float, float, float, float],
+    out_shape: Tuple[int, int],
+    resampling: Resampling = "nearest",
+) -> np.ndarray:
+    """
+    Resample (left, top, right, bottom) `window` of (height, width, bands) image
+    into (height, width) `out_shape`. Window coordinates are in image pixels and
+    could be fractional. Kernels are separable, rows and columns are resampled
+    one after another
+    """
+
+    if resampling not in KERNELS:
+        raise ValueError(f"Unknown resampling {resampling!r}")
+
+    kernel = KERNELS[resampling]
+    left, top, right, bottom = window
+    height, width = out_shape
+
+    result = kernel(image, 0, top, (bottom - top) / height, height)
+    result = kernel(result, 1, left, (right - left) / width, width)
+
+    if result.dtype == image.dtype:
+        return result
+
+    if np.issubdtype(image.dtype, np.integer):
+        result = np.rint(result)
+
+    return result.astype(image.dtype)
+
+
+def floor_window(
+    window: Tuple[float, float, float, float],
+    margin: int = 0,
+    image_size: Optional[Tuple[int, int]] = None,
+) -> Tuple[int, int, int, int]:
+    """
+    Smallest (x_off, y_off, width, height) pixel window covering the fractional
+    (left, top, right, bottom) `window` with `margin` pixels around it. The margin
+    doesn't go beyond the image of (width, height) `image_size`, so kernels clamp
+    samples to the image edge instead of taking zeros outside of it
+    """
+
+    left, top, right, bottom = window
+    x_off = max(floor(left) - margin, 0)
+    y_off = max(floor(top) - margin, 0)
+    x_end = -floor(-right) + margin
+    y_end = -floor(-bottom) + margin
+
+    if image_size is not None:
+        image_width, image_height = image_size
+        x_end = max(min(x_end, image_width), -floor(-right))
+        y_end = max(min(y_end, image_height), -floor(-bottom))
+
+    return x_off, y_off, x_end - x_off, y_end - y_off
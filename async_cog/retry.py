@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from asyncio import FIRST_COMPLETED, Future, TimeoutError, ensure_future, wait
+from collections import deque
+from dataclasses import dataclass
+from random import uniform
+from typing import Any, Awaitable, Callable, Deque, Optional, TypeVar
+
+import numpy as np
+from aiohttp import ClientConnectionError, ClientPayloadError
+
+from async_cog.sources.range_source import RangeReadError
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying besides 5xx: Request Timeout and Too Many Requests
+RETRYABLE_STATUSES = (408, 429)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Failed requests are retried up to `retries` times after jittered exponential
+    backoff: random delay up to `backoff` * 2 ** attempt, but no more than
+    `max_backoff` seconds. Only transient failures are retried: 5xx, 408 and 429
+    responses, connection errors, timeouts and short reads
+    """
+
+    retries: int = 3
+    backoff: float = 0.1
+    max_backoff: float = 10.0
+
+    def get_delay(self, attempt: int) -> float:
+        return uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        if isinstance(error, RangeReadError):
+            status = error.status
+            return status is None or status >= 500 or status in RETRYABLE_STATUSES
+
+        return isinstance(
+            error,
+            (ClientConnectionError, ClientPayloadError, TimeoutError, ConnectionError),
+        )
+
+
+NO_RETRIES = RetryPolicy(retries=0)
+
+
+class HedgePolicy:
+    """
+    When a request takes longer than `quantile` of latencies of the last `window`
+    requests, the same request is sent once more and the first response is used.
+    Requests aren't hedged until `min_samples` latencies are known. Fixed `delay`
+    in seconds could be used instead of the quantile
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 256,
+        delay: Optional[float] = None,
+    ):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.delay = delay
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def observe(self, duration: float) -> None:
+        self._latencies.append(duration)
+
+    def get_delay(self) -> Optional[float]:
+        """
+        Seconds to wait for the response before hedging, None for no hedging
+        """
+
+        if self.delay is not None:
+            return self.delay
+
+        if len(self._latencies) < self.min_samples:
+            return None
+
+        return float(np.quantile(self._latencies, self.quantile))
+
+
+async def first_successful(
+    request: Callable[[], Awaitable[T]], delay: float, on_hedge: Callable[[], Any]
+) -> T:
+    """
+    Make the request and one more identical request if the first one isn't done
+    in `delay` seconds. Get the result of the first successful one and cancel
+    the other. The error of the first request is raised if both fail
+    """
+
+    first: Future = ensure_future(request())
+    pending = {first}
+
+    try:
+        done, pending = await wait(pending, timeout=delay)
+
+        if not done:
+            on_hedge()
+            pending.add(ensure_future(request()))
+
+        while True:
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+
+            if not pending:
+                return first.result()
+
+            done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
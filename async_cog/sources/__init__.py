@@ -0,0 +1,22 @@
+from async_cog.sources.concurrency import (
+    DEFAULT_CONCURRENCY,
+    AdaptiveLimiter,
+    ConcurrencyController,
+)
+from async_cog.sources.file_source import FileSource
+from async_cog.sources.http_pool import HTTPConnectionPool
+from async_cog.sources.http_source import HTTPSource
+from async_cog.sources.memory_source import MemorySource
+from async_cog.sources.range_source import RangeReadError, RangeSource
+
+__all__ = [
+    "RangeSource",
+    "RangeReadError",
+    "HTTPSource",
+    "HTTPConnectionPool",
+    "MemorySource",
+    "FileSource",
+    "AdaptiveLimiter",
+    "ConcurrencyController",
+    "DEFAULT_CONCURRENCY",
+]
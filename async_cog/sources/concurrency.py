@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from asyncio import AbstractEventLoop, CancelledError, Future, get_running_loop
+from collections import deque
+from threading import Lock
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+from async_cog.sources.range_source import RangeReadError
+
+T = TypeVar("T")
+
+# Responses of servers asking to slow down, e.g. S3 answers 503 SlowDown
+THROTTLING_STATUSES = (429, 503)
+
+
+class AdaptiveLimiter:
+    """
+    Limit of simultaneous requests to a host adjusted with AIMD (additive
+    increase, multiplicative decrease) like TCP congestion window. Every
+    successful request increases the limit by `increase` / limit, so it grows by
+    `increase` per round of requests. Throttling responses and requests slower than
+    `latency_tolerance` times the fastest of the last `window` requests of similar
+    size (the same power of two bytes) multiply the limit by `decrease`. Requests
+    started before the last decrease don't decrease it again, so a burst of
+    throttled requests counts once.
+    Limiters aren't thread-safe, they are used by one event loop
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 32,
+        min_limit: float = 1,
+        max_limit: float = 256,
+        increase: float = 1,
+        decrease: float = 0.5,
+        latency_tolerance: Optional[float] = 10,
+        window: int = 100,
+    ):
+        self._limit = initial_limit
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._increase = increase
+        self._decrease = decrease
+        self._latency_tolerance = latency_tolerance
+        self._window = window
+        # Latencies of the last requests by their size class, see _size_class()
+        self._latencies: Dict[int, Deque[float]] = {}
+        self._last_decrease = float("-inf")
+        self._in_flight = 0
+        self._waiters: List[Future] = []
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), 1)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def run(self, request: Callable[[], Awaitable[T]], size: int = 0) -> T:
+        """
+        Make the request of `size` bytes when the number of running requests is
+        below the limit and adjust the limit by its outcome
+        """
+
+        await self._acquire()
+        start = perf_counter()
+
+        try:
+            result = await request()
+        except RangeReadError as error:
+            if error.status in THROTTLING_STATUSES:
+                self._on_congestion(start)
+
+            raise
+        finally:
+            self._release()
+
+        self._on_success(start, perf_counter() - start, size)
+
+        return result
+
+    async def _acquire(self) -> None:
+        while self._in_flight >= self.limit:
+            waiter = get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+            try:
+                await waiter
+            except CancelledError:
+                # The slot was given to this waiter already, pass it on
+                if waiter.done() and not waiter.cancelled():
+                    self._waiters.remove(waiter)
+                    self._wake_waiters()
+
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+        self._in_flight += 1
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        free_slots = self.limit - self._in_flight
+
+        for waiter in self._waiters[:free_slots]:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _on_success(self, start: float, duration: float, size: int) -> None:
+        tolerance = self._latency_tolerance
+        latencies = self._latencies.setdefault(
+            _size_class(size), deque(maxlen=self._window)
+        )
+
+        if tolerance is not None and latencies:
+            if duration > tolerance * min(latencies):
+                latencies.append(duration)
+                self._on_congestion(start)
+                return
+
+        latencies.append(duration)
+        self._limit = min(self._limit + self._increase / self._limit, self._max_limit)
+        self._wake_waiters()
+
+    def _on_congestion(self, start: float) -> None:
+        if start < self._last_decrease:
+            return
+
+        self._limit = max(self._limit * self._decrease, self._min_limit)
+        self._last_decrease = perf_counter()
+
+
+def _size_class(size: int) -> int:
+    """
+    Requests of sizes within the same power of two are compared by latency
+    """
+
+    return size.bit_length()
+
+
+class ConcurrencyController:
+    """
+    Adaptive limits of simultaneous requests by host, see AdaptiveLimiter.
+    One controller is shared by all HTTPSources (and so all COGReaders) by
+    default, so readers of files on the same host respect the same limit.
+    Every event loop, e.g. one of every thread, has its own limiters.
+    `limiter_options` are passed to every AdaptiveLimiter
+    """
+
+    def __init__(self, **limiter_options: Any):
+        self._limiter_options = limiter_options
+        self._limiters: WeakKeyDictionary[
+            AbstractEventLoop, Dict[str, AdaptiveLimiter]
+        ] = WeakKeyDictionary()
+        self._lock = Lock()
+
+    def __getitem__(self, url: str) -> AdaptiveLimiter:
+        """
+        Get the limiter of URL's host for the running event loop
+        """
+
+        host = urlsplit(url).netloc
+        loop = get_running_loop()
+
+        with self._lock:
+            limiters = self._limiters.setdefault(loop, {})
+
+            if host not in limiters:
+                limiters[host] = AdaptiveLimiter(**self._limiter_options)
+
+            return limiters[host]
+
+
+DEFAULT_CONCURRENCY = ConcurrencyController()
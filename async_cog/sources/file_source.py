@@ -0,0 +1,54 @@
+from mmap import ACCESS_READ, mmap
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union
+
+from async_cog.sources.range_source import RangeSource
+
+
+class FileSource(RangeSource):
+    """
+    Local file. It's memory-mapped, so reads return views of the mapping without
+    copying and without loading the whole file into memory
+    """
+
+    _mmap: Optional[mmap] = None
+    _view: memoryview
+
+    def __init__(self, path: Union[str, PathLike]):
+        self._path = Path(path)
+
+    @property
+    def url(self) -> str:
+        return str(self._path)
+
+    async def open(self) -> None:
+        with open(self._path, "rb") as file:
+            # Empty files can't be mapped
+            if file.seek(0, 2) == 0:
+                self._view = memoryview(b"")
+                return
+
+            self._mmap = mmap(file.fileno(), 0, access=ACCESS_READ)
+            self._view = memoryview(self._mmap)
+
+    async def close(self) -> None:
+        self._view.release()
+
+        if self._mmap is None:
+            return
+
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Returned views are still in use, the mapping will be closed when
+            # the last of them is garbage collected
+            pass
+
+    async def fingerprint(self) -> Optional[str]:
+        stat = self._path.stat()
+
+        return f"{stat.st_size}|{stat.st_mtime_ns}"
+
+    async def read(self, offset: int, size: int) -> memoryview:
+        return self._view[offset : offset + size]
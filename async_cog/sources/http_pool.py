@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from aiohttp import ClientSession, TCPConnector
+
+
+class HTTPConnectionPool:
+    """
+    Client session to share connections, keep-alive and DNS cache between many
+    HTTPSources (and so between many COGReaders).
+    The pool owns the session: sources using it never close it, call close() or
+    use the pool as an async context manager when it's no longer needed
+    """
+
+    _session: Optional[ClientSession] = None
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 32,
+        keepalive_timeout: float = 60,
+        ttl_dns_cache: Optional[int] = 300,
+    ):
+        """
+        `limit` and `limit_per_host` are the maximum numbers of simultaneous
+        connections in total and to the same host (0 for no limit),
+        `keepalive_timeout` is the number of seconds idle connections are kept open,
+        and `ttl_dns_cache` is the number of seconds resolved hosts are cached for
+        (None to cache forever)
+        """
+
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._ttl_dns_cache = ttl_dns_cache
+
+    @property
+    def session(self) -> ClientSession:
+        """
+        Session of the pool. It's created on the first use, since it has to be
+        created inside of the running event loop
+        """
+
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=self._ttl_dns_cache,
+                use_dns_cache=True,
+            )
+            self._session = ClientSession(connector=connector)
+
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self) -> HTTPConnectionPool:
+        return self
+
+    async def __aexit__(self, *args: Any, **kwargs: Any) -> None:
+        await self.close()
@@ -0,0 +1,197 @@
+from asyncio import gather
+from functools import partial
+from typing import List, Optional, Sequence, Tuple, Union
+
+from aiohttp import ClientResponse, ClientSession
+
+from async_cog.sources.concurrency import (
+    DEFAULT_CONCURRENCY,
+    AdaptiveLimiter,
+    ConcurrencyController,
+)
+from async_cog.sources.http_pool import HTTPConnectionPool
+from async_cog.sources.multipart import (
+    Part,
+    get_boundary,
+    parse_byteranges,
+    parse_content_range,
+    slice_parts,
+)
+from async_cog.sources.range_source import Buffer, RangeReadError, RangeSource
+
+
+class HTTPSource(RangeSource):
+    """
+    File on HTTP server supporting range requests
+    """
+
+    _client: ClientSession
+
+    def __init__(
+        self,
+        url: str,
+        session: Union[ClientSession, HTTPConnectionPool, None] = None,
+        multi_range: bool = False,
+        max_ranges_per_request: int = 32,
+        concurrency: Optional[ConcurrencyController] = None,
+    ):
+        """
+        Requests are sent with `session` which could be either aiohttp session or
+        HTTPConnectionPool shared with other sources. They are managed by the
+        caller and aren't closed by the source. When `session` is None, the source
+        creates its own session on open() and closes it on close().
+
+        With `multi_range` read_many() requests up to `max_ranges_per_request`
+        ranges at once (Range: bytes=a-b,c-d) and splits multipart/byteranges
+        response. It works with servers answering with a single range or the
+        whole file as well, but such servers make it slower.
+
+        Every request waits for a free slot of the host's adaptive limiter from
+        `concurrency`. All sources share DEFAULT_CONCURRENCY when it's None
+        """
+
+        self._url = url
+        self._session = session
+        self._multi_range = multi_range
+        self._max_ranges_per_request = max_ranges_per_request
+        self._concurrency = concurrency or DEFAULT_CONCURRENCY
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def _limiter(self) -> AdaptiveLimiter:
+        return self._concurrency[self._url]
+
+    @property
+    def ranges_per_request(self) -> int:
+        return self._max_ranges_per_request if self._multi_range else 1
+
+    @property
+    def owns_session(self) -> bool:
+        return self._session is None
+
+    async def open(self) -> None:
+        if isinstance(self._session, HTTPConnectionPool):
+            self._client = self._session.session
+        elif self._session is not None:
+            self._client = self._session
+        else:
+            self._client = ClientSession()
+
+    async def close(self) -> None:
+        if self.owns_session:
+            await self._client.close()
+
+    async def fingerprint(self) -> Optional[str]:
+        """
+        ETag, Last-Modified and Content-Length from the response to HEAD request.
+        It waits for a slot of the host's limiter like reads do
+        """
+
+        return await self._limiter.run(self._fingerprint)
+
+    async def _fingerprint(self) -> Optional[str]:
+        async with self._client.head(self.url) as response:
+            self._check_response(response)
+            headers = [
+                response.headers.get(name)
+                for name in ("ETag", "Last-Modified", "Content-Length")
+            ]
+
+        if not any(headers):
+            return None
+
+        return "|".join(header or "" for header in headers)
+
+    async def read(self, offset: int, size: int) -> bytes:
+        """
+        Get the data from URL within the specific byte range
+        """
+
+        return await self._limiter.run(partial(self._read, offset, size), size)
+
+    async def _read(self, offset: int, size: int) -> bytes:
+        header = {"Range": f"bytes={offset}-{offset + size - 1}"}
+
+        async with self._client.get(self.url, headers=header) as response:
+            self._check_response(response)
+            data = await response.read()
+            content_range = response.headers.get("Content-Range")
+
+        if response.status == 206 and content_range is not None:
+            first, last = parse_content_range(content_range)
+
+            if len(data) < last - first + 1:
+                raise RangeReadError(
+                    f"Short read of {self.url}: {len(data)} bytes "
+                    f"instead of {last - first + 1}"
+                )
+
+        return data
+
+    def _check_response(self, response: ClientResponse) -> None:
+        if not response.ok:
+            raise RangeReadError(
+                f"Reading of {self.url} failed with HTTP {response.status}",
+                status=response.status,
+            )
+
+    async def read_many(self, ranges: Sequence[Tuple[int, int]]) -> List[Buffer]:
+        if not self._multi_range or len(ranges) < 2:
+            return await super().read_many(ranges)
+
+        step = self._max_ranges_per_request
+        chunks = [ranges[idx : idx + step] for idx in range(0, len(ranges), step)]
+        results = await gather(
+            *(
+                self._limiter.run(
+                    partial(self._read_multi_range, chunk),
+                    sum(size for _, size in chunk),
+                )
+                for chunk in chunks
+            )
+        )
+
+        return [data for chunk_data in results for data in chunk_data]
+
+    async def _read_multi_range(self, ranges: Sequence[Tuple[int, int]]) -> List[bytes]:
+        """
+        Read several ranges with a single request. Ranges which are missing in the
+        response are read with separate requests
+        """
+
+        ranges_str = ",".join(
+            f"{offset}-{offset + size - 1}" for offset, size in ranges if size > 0
+        )
+        header = {"Range": f"bytes={ranges_str}"}
+
+        async with self._client.get(self.url, headers=header) as response:
+            self._check_response(response)
+            body = await response.read()
+            boundary = get_boundary(response.headers.get("Content-Type", ""))
+            content_range = response.headers.get("Content-Range")
+
+        parts: List[Part]
+
+        if boundary is not None:
+            parts = parse_byteranges(body, boundary)
+        elif response.status == 206 and content_range is not None:
+            parts = [(parse_content_range(content_range)[0], body)]
+        else:
+            # The whole file
+            parts = [(0, body)]
+
+        result: List[Optional[bytes]] = [
+            slice_parts(parts, offset, size) if size > 0 else b""
+            for offset, size in ranges
+        ]
+        missing = [idx for idx, data in enumerate(result) if data is None]
+        # The slot of the limiter is already taken by this request
+        missing_data = await gather(*(self._read(*ranges[idx]) for idx in missing))
+
+        for idx, data in zip(missing, missing_data):
+            result[idx] = data
+
+        return result  # type: ignore
@@ -0,0 +1,24 @@
+from typing import Optional
+from zlib import crc32
+
+from async_cog.sources.range_source import RangeSource
+
+
+class MemorySource(RangeSource):
+    """
+    File which is already loaded into memory
+    """
+
+    def __init__(self, data: bytes, url: str = ""):
+        self._data = memoryview(data)
+        self._url = url or f"memory://{id(self)}"
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    async def fingerprint(self) -> Optional[str]:
+        return f"{len(self._data)}|{crc32(self._data)}"
+
+    async def read(self, offset: int, size: int) -> memoryview:
+        return self._data[offset : offset + size]
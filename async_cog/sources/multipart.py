@@ -0,0 +1,102 @@
+from re import fullmatch
+from typing import List, Optional, Sequence, Tuple
+
+# (offset of the first byte, data) of a part of the response
+Part = Tuple[int, bytes]
+
+
+def parse_content_range(header: str) -> Tuple[int, int]:
+    """
+    Get (first byte, last byte) from Content-Range header like "bytes 0-50/1270"
+    """
+
+    match = fullmatch(r"\s*bytes\s+(\d+)-(\d+)/(\d+|\*)\s*", header)
+
+    if match is None:
+        raise ValueError(f"Invalid Content-Range: {header}")
+
+    return int(match.group(1)), int(match.group(2))
+
+
+def get_boundary(content_type: str) -> Optional[str]:
+    """
+    Get boundary of the multipart/byteranges content type, None for other types
+    """
+
+    media_type, *params = content_type.split(";")
+
+    if media_type.strip().lower() != "multipart/byteranges":
+        return None
+
+    for param in params:
+        name, _, value = param.strip().partition("=")
+
+        if name.lower() == "boundary":
+            return value.strip('"')
+
+    raise ValueError(f"No boundary in Content-Type: {content_type}")
+
+
+def parse_byteranges(body: bytes, boundary: str) -> List[Part]:
+    """
+    Split multipart/byteranges response body into parts. Body structure:
+
+        --boundary
+        Content-Type: image/tiff
+        Content-Range: bytes 0-50/1270
+
+        <51 bytes of data>
+        --boundary
+        ...
+        --boundary--
+
+    Lines are separated with CRLF. Part size is taken from its Content-Range,
+    so the data may contain anything including the boundary itself
+    """
+
+    delimiter = f"--{boundary}".encode()
+    parts = []
+    position = body.find(delimiter)
+
+    while position >= 0:
+        position += len(delimiter)
+
+        # Closing delimiter
+        if body[position : position + 2] == b"--":
+            break
+
+        headers_end = body.find(b"\r\n\r\n", position)
+
+        if headers_end < 0:
+            raise ValueError("Invalid multipart/byteranges body")
+
+        content_range = None
+
+        for line in body[position:headers_end].decode("latin-1").split("\r\n"):
+            name, _, value = line.partition(":")
+
+            if name.strip().lower() == "content-range":
+                content_range = parse_content_range(value)
+
+        if content_range is None:
+            raise ValueError("No Content-Range in the part of multipart body")
+
+        start, end = content_range
+        data_start = headers_end + 4
+        parts.append((start, body[data_start : data_start + end - start + 1]))
+
+        position = body.find(delimiter, data_start + end - start + 1)
+
+    return parts
+
+
+def slice_parts(parts: Sequence[Part], offset: int, size: int) -> Optional[bytes]:
+    """
+    Get the range from the part which contains it entirely, None if there is none
+    """
+
+    for start, data in parts:
+        if start <= offset and offset + size <= start + len(data):
+            return data[offset - start : offset - start + size]
+
+    return None
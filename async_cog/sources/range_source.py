@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from asyncio import gather
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+# Data returned by sources. memoryview lets them to avoid copying
+Buffer = Union[bytes, memoryview]
+
+
+class RangeReadError(IOError):
+    """
+    Reading of a byte range has failed. `status` is HTTP status of the response,
+    None for failures without response, e.g. short reads
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class RangeSource(ABC):
+    """
+    Something COGReader reads bytes from by their offset and size
+    """
+
+    @property
+    @abstractmethod
+    def url(self) -> str:
+        """
+        Identifier of the file, used as a part of cache keys
+        """
+
+    async def open(self) -> None:
+        """
+        Prepare the source for reading
+        """
+
+    async def close(self) -> None:
+        """
+        Release resources acquired by open()
+        """
+
+    async def fingerprint(self) -> Optional[str]:
+        """
+        Cheap identifier of the current content of the file, e.g. its size and
+        modification time. It changes when the file changes. None if unknown
+        """
+
+        return None
+
+    @property
+    def ranges_per_request(self) -> int:
+        """
+        Number of ranges read_many() reads with a single request. Readers pass it
+        no more ranges at once, so every call of read_many() is one request
+        """
+
+        return 1
+
+    async def __aenter__(self) -> RangeSource:
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args: Any, **kwargs: Any) -> None:
+        await self.close()
+
+    @abstractmethod
+    async def read(self, offset: int, size: int) -> Buffer:
+        """
+        Get `size` bytes starting from `offset`.
+        Less data is returned if the file ends before the end of the range
+        """
+
+    async def read_many(self, ranges: Sequence[Tuple[int, int]]) -> List[Buffer]:
+        """
+        Get data of several (offset, size) byte ranges. Result has the same order
+        as `ranges`. Sources could override it to read them more efficiently
+        """
+
+        return await gather(*(self.read(offset, size) for offset, size in ranges))
@@ -1,12 +1,22 @@
 from typing import Literal, Optional
 
 from async_cog.tags.tag import Tag
-from async_cog.tags.tag_type import TagType
 
 
 class BytesTag(Tag):
+    __slots__ = ()
+
     value: Optional[bytes]
-    type = TagType(7)
+
+    def __init__(
+        self,
+        code: int,
+        length: int,
+        data_pointer: Optional[int] = None,
+        value: Optional[bytes] = None,
+        type: int = 7,
+    ):
+        super().__init__(code, type, length, data_pointer, value)
 
     def parse_data(self, data: bytes, byte_order_fmt: Literal["<", ">"]) -> None:
         self.value = data
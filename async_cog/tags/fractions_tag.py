@@ -6,10 +6,9 @@ from async_cog.tags.tag import Tag
 
 
 class FractionsTag(Tag):
-    value: Optional[List[Fraction]]
+    __slots__ = ()
 
-    class Config:
-        arbitrary_types_allowed = True
+    value: Optional[List[Fraction]]
 
     def parse_data(self, data: bytes, byte_order_fmt: Literal["<", ">"]) -> None:
         """
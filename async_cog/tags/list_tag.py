@@ -1,11 +1,29 @@
 from struct import unpack
-from typing import List, Literal, Union
+from typing import Any, List, Literal, Union
+
+import numpy as np
 
 from async_cog.tags.tag import Tag
+from async_cog.tags.tag_code import ARRAY_TAGS
 
 
 class ListTag(Tag):
-    value: Union[List[int], List[float], None]
+    __slots__ = ()
+
+    value: Union[List[int], List[float], np.ndarray, None]
 
     def parse_data(self, data: bytes, byte_order_fmt: Literal["<", ">"]) -> None:
+        if self.code in ARRAY_TAGS:
+            # One array instead of millions of Python ints for big files
+            dtype = np.dtype(f"{byte_order_fmt}{self.type.format}")
+            self.value = np.frombuffer(data, dtype=dtype, count=self.length)
+            return
+
         self.value = list(unpack(f"{byte_order_fmt}{self.format_str}", data))
+
+    def parse_values(self, values: List[Any]) -> None:
+        if self.code in ARRAY_TAGS:
+            self.value = np.array(values, dtype=self.type.format)
+            return
+
+        self.value = values
@@ -1,14 +1,26 @@
 from struct import unpack
-from typing import Literal, Union
-
-from pydantic import PositiveInt
+from typing import Any, List, Literal, Optional, Union
 
 from async_cog.tags.tag import Tag
 
 
 class NumberTag(Tag):
+    __slots__ = ()
+
     value: Union[int, float, None]
-    length: PositiveInt = 1
+
+    def __init__(
+        self,
+        code: int,
+        type: int,
+        length: int = 1,
+        data_pointer: Optional[int] = None,
+        value: Union[int, float, None] = None,
+    ):
+        super().__init__(code, type, length, data_pointer, value)
 
     def parse_data(self, data: bytes, byte_order_fmt: Literal["<", ">"]) -> None:
         (self.value,) = unpack(f"{byte_order_fmt}{self.format_str}", data)
+
+    def parse_values(self, values: List[Any]) -> None:
+        (self.value,) = values
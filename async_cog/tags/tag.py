@@ -1,20 +1,72 @@
 from abc import ABC
-from struct import calcsize
-from typing import Any, Literal, Optional
+from typing import Any, List, Literal, Optional
 
-from pydantic import BaseModel, PositiveInt
+import numpy as np
 
+from async_cog.models import TagModel
 from async_cog.tags.tag_code import TagCode
 from async_cog.tags.tag_type import TagType
 
 
-class Tag(BaseModel, ABC):
+def values_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+
+    return bool(a == b)
+
+
+def export_value(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    return value
+
+
+class Tag(ABC):
+    """
+    Tags are created for every entry of every IFD, so they are plain slotted
+    objects without validation. Use to_model() to get pydantic model of the tag
+    """
+
+    __slots__ = ("code", "type", "length", "data_pointer", "value")
+
     code: TagCode
     type: TagType
-    length: PositiveInt
-    data_pointer: Optional[PositiveInt]
+    length: int
+    data_pointer: Optional[int]
     value: Optional[Any]
 
+    def __init__(
+        self,
+        code: int,
+        type: int,
+        length: int,
+        data_pointer: Optional[int] = None,
+        value: Optional[Any] = None,
+    ):
+        self.code = TagCode.get(code)
+        self.type = TagType.get(type)
+        self.length = length
+        self.data_pointer = data_pointer
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Tag):
+            return NotImplemented
+
+        # Values could be NumPy arrays, which are compared elementwise
+        fields = (self.code, self.type, self.length, self.data_pointer)
+        other_fields = (other.code, other.type, other.length, other.data_pointer)
+
+        return fields == other_fields and values_equal(self.value, other.value)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(code={int(self.code)}, type={int(self.type)}, "
+            f"length={self.length}, data_pointer={self.data_pointer}, "
+            f"value={self.value!r})"
+        )
+
     def __str__(self) -> str:
         return f"{self.name}: {str(self.value)}"
 
@@ -24,15 +76,32 @@ class Tag(BaseModel, ABC):
 
     @property
     def data_size(self) -> int:
-        return calcsize(self.format_str)
+        return self.length * self.type.size
 
     @property
     def name(self) -> str:
         return self.code.name
 
+    def to_model(self) -> TagModel:
+        return TagModel(
+            code=self.code,
+            name=self.name,
+            type=self.type,
+            length=self.length,
+            data_pointer=self.data_pointer,
+            value=export_value(self.value),
+        )
+
     def parse_data(self, data: bytes, byte_order_fmt: Literal["<", ">"]) -> None:
         """
         Parse binary self.data and store values into self.value
         """
 
         raise NotImplementedError
+
+    def parse_values(self, values: List[Any]) -> None:
+        """
+        Store already decoded numeric values into self.value
+        """
+
+        raise NotImplementedError
@@ -1,20 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Iterator
+from functools import lru_cache
 
 
 class TagCode(int):
     name: str
     is_list: bool
 
-    # pydantic needs this function for validation, see:
-    # https://pydantic-docs.helpmanual.io/usage/types/#classes-with-__get_validators__
     @classmethod
-    def __get_validators__(cls) -> Iterator[Any]:
-        yield cls.validate
+    @lru_cache(maxsize=None)
+    def get(cls, code: int) -> TagCode:
+        """
+        Instances are immutable, so they are created once for every value
+        """
 
-    @classmethod
-    def validate(cls, code: int) -> TagCode:
         return cls(code)
 
     def __init__(self, code: int):
@@ -124,3 +123,9 @@ LIST_TAG_NAMES = {
 
 
 GEOKEY_TAGS = [34735, 34736, 34737]
+
+# Numeric list tags which could be huge and are stored as NumPy arrays:
+# StripOffsets, StripByteCounts, TileOffsets and TileByteCounts
+ARRAY_TAGS = [273, 279, 324, 325]
+# StripByteCounts and TileByteCounts
+BYTE_COUNTS_TAGS = [279, 325]
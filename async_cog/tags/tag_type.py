@@ -1,19 +1,21 @@
 from __future__ import annotations
 
-from typing import Any, Iterator
+from functools import lru_cache
+from struct import calcsize
 
 
 class TagType(int):
     format: str
+    # Size of a single value in bytes
+    size: int
 
-    # pydantic needs this function for validation, see:
-    # https://pydantic-docs.helpmanual.io/usage/types/#classes-with-__get_validators__
     @classmethod
-    def __get_validators__(cls) -> Iterator[Any]:
-        yield cls.validate
+    @lru_cache(maxsize=None)
+    def get(cls, type_code: int) -> TagType:
+        """
+        Instances are immutable, so they are created once for every value
+        """
 
-    @classmethod
-    def validate(cls, type_code: int) -> TagType:
         return cls(type_code)
 
     def __init__(self, type_code: int):
@@ -21,6 +23,7 @@ class TagType(int):
             raise ValueError(f"Tag with type {type_code} is not supported")
 
         self.format = TAG_TYPES[type_code]
+        self.size = calcsize(self.format)
 
 
 # https://docs.python.org/3/library/struct.html#format-characters
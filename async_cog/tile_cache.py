@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from asyncio import Future, ensure_future, shield
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from typing import Awaitable, Callable, Dict, Hashable
+
+import numpy as np
+
+
+@dataclass
+class TileCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class TileCache:
+    """
+    LRU cache of decoded tiles limited by the total size of arrays in bytes.
+    One cache could be shared by many readers, since keys contain URL.
+    Cached arrays are read-only, because every reader of the tile gets the same one
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._tiles: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._loading: Dict[Hashable, Future] = {}
+        self.stats = TileCacheStats()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Is the tile cached or being loaded right now
+        """
+
+        return key in self._tiles or key in self._loading
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of cached arrays in bytes
+        """
+
+        return self._size
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    async def get_or_load(
+        self, key: Hashable, load: Callable[[], Awaitable[np.ndarray]]
+    ) -> np.ndarray:
+        """
+        Get the tile from the cache or load and put it there.
+        Concurrent calls for the same missing key wait for a single loading
+        """
+
+        if key in self._tiles:
+            self.stats.hits += 1
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        if key in self._loading:
+            self.stats.hits += 1
+            return await shield(self._loading[key])
+
+        self.stats.misses += 1
+        loading = ensure_future(load())
+        self._loading[key] = loading
+        loading.add_done_callback(partial(self._on_loaded, key))
+
+        # Cancellation of one caller must not cancel loading for the others
+        return await shield(loading)
+
+    def _on_loaded(self, key: Hashable, loading: Future) -> None:
+        """
+        Put the loaded tile into the cache. Failed loading isn't cached
+        """
+
+        del self._loading[key]
+
+        if not loading.cancelled() and loading.exception() is None:
+            self._put(key, loading.result())
+
+    def _put(self, key: Hashable, tile: np.ndarray) -> None:
+        if tile.nbytes > self._max_bytes:
+            return
+
+        tile.flags.writeable = False
+        self._tiles[key] = tile
+        self._size += tile.nbytes
+
+        while self._size > self._max_bytes:
+            _, evicted = self._tiles.popitem(last=False)
+            self._size -= evicted.nbytes
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._tiles.clear()
+        self._size = 0
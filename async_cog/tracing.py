@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from time import perf_counter
+from typing import Any, ContextManager, Dict, Iterator, Tuple
+
+
+class Tracer(ABC):
+    """
+    Receives timing spans of reader's stages: fill_metadata, fetch, decode_queue
+    (waiting for a decoding slot), decode, decompress, unpredict, reshape,
+    jpeg_tables and resample. Spans of decoding stages are opened in executor
+    threads with the context of the decode span, so they are its children
+    """
+
+    @abstractmethod
+    def span(self, name: str, **attributes: Any) -> ContextManager[Any]:
+        """
+        Context manager which measures the stage running inside of it
+        """
+
+
+class NoopTracer(Tracer):
+    def span(self, name: str, **attributes: Any) -> ContextManager[Any]:
+        return nullcontext()
+
+
+class TimingTracer(Tracer):
+    """
+    Sums up durations of spans by their names
+    """
+
+    def __init__(self) -> None:
+        # name: (number of spans, total duration in seconds)
+        self.timings: Dict[str, Tuple[int, float]] = {}
+        self._lock = Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        start = perf_counter()
+
+        try:
+            yield
+        finally:
+            duration = perf_counter() - start
+
+            with self._lock:
+                count, total = self.timings.get(name, (0, 0.0))
+                self.timings[name] = (count + 1, total + duration)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Adapter emitting spans to OpenTelemetry tracer, e.g.
+    OpenTelemetryTracer(opentelemetry.trace.get_tracer("async_cog"))
+    """
+
+    def __init__(self, tracer: Any, prefix: str = "async_cog."):
+        self._tracer = tracer
+        self._prefix = prefix
+
+    def span(self, name: str, **attributes: Any) -> ContextManager[Any]:
+        return self._tracer.start_as_current_span(
+            f"{self._prefix}{name}", attributes=attributes
+        )
+
+
+NOOP_TRACER = NoopTracer()
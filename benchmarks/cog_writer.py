@@ -0,0 +1,334 @@
+# Minimal writer of Cloud Optimized GeoTIFFs for benchmark and test data.
+# It supports only the features async_cog is able to read.
+
+from struct import calcsize, pack
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from imagecodecs import (
+    delta_encode,
+    jpeg_encode,
+    lzw_encode,
+    packbits_encode,
+    zlib_encode,
+)
+
+COMPRESSIONS = {"raw": 1, "lzw": 5, "jpeg": 7, "deflate": 8, "packbits": 32773}
+
+# Tag type codes and struct format characters
+SHORT, LONG, UNDEFINED, LONG8 = 3, 4, 7, 16
+TYPE_FORMATS = {SHORT: "H", LONG: "I", UNDEFINED: "s", LONG8: "Q"}
+
+GHOST_CONTENT = (
+    "LAYOUT=IFDS_BEFORE_DATA\n"
+    "BLOCK_ORDER=ROW_MAJOR\n"
+    "BLOCK_LEADER=SIZE_AS_UINT4\n"
+    "BLOCK_TRAILER=LAST_4_BYTES_REPEATED\n"
+    "KNOWN_INCOMPATIBLE_EDITION=NO\n "
+)
+
+# SOI + EOI — JPEG tables without any tables, every tile is a full JPEG stream
+EMPTY_JPEG_TABLES = b"\xff\xd8\xff\xd9"
+
+TagValue = Union[bytes, Sequence[int]]
+
+
+def _encode(block: np.ndarray, compression: str, predictor: bool) -> bytes:
+    # Bilevel samples are packed by 8 into bytes, rows are padded to whole bytes
+    if block.dtype == bool:
+        block = np.packbits(block.reshape(block.shape[0], -1), axis=1)
+
+    if predictor:
+        block = delta_encode(block, axis=-2)
+
+    if compression == "raw":
+        return block.tobytes()
+    if compression == "lzw":
+        return lzw_encode(block.tobytes())
+    if compression == "deflate":
+        return zlib_encode(block.tobytes())
+    if compression == "packbits":
+        return packbits_encode(block.tobytes())
+    if compression == "jpeg":
+        return jpeg_encode(block, level=90)
+
+    raise ValueError(f"Unknown compression {compression}")
+
+
+def _split_tiles(image: np.ndarray, tile_size: int) -> List[np.ndarray]:
+    """
+    Split (height, width, bands) image into row-major padded tiles
+    """
+
+    height, width, bands = image.shape
+    tiles = []
+
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            tile = np.zeros((tile_size, tile_size, bands), dtype=image.dtype)
+            part = image[y : y + tile_size, x : x + tile_size]
+            tile[: part.shape[0], : part.shape[1]] = part
+            tiles.append(tile)
+
+    return tiles
+
+
+def _split_strips(image: np.ndarray, rows_per_strip: int) -> List[np.ndarray]:
+    return [
+        image[y : y + rows_per_strip] for y in range(0, image.shape[0], rows_per_strip)
+    ]
+
+
+class _Image:
+    def __init__(
+        self,
+        data: np.ndarray,
+        subfile_type: int,
+        compression: str,
+        tile_size: Optional[int],
+        rows_per_strip: Optional[int],
+        predictor: bool,
+        sparse: bool,
+    ):
+        if data.ndim == 2:
+            data = data[:, :, np.newaxis]
+
+        self.data = data
+        self.subfile_type = subfile_type
+        self.compression = compression
+        self.tile_size = tile_size
+        self.rows_per_strip = rows_per_strip
+        self.predictor = predictor
+
+        if tile_size:
+            blocks = _split_tiles(data, tile_size)
+        else:
+            blocks = _split_strips(data, rows_per_strip or data.shape[0])
+
+        # Empty blocks of sparse files aren't written, like GDAL's SPARSE_OK does
+        self.blocks = [
+            (
+                b""
+                if sparse and not block.any()
+                else _encode(block, compression, predictor)
+            )
+            for block in blocks
+        ]
+        self.offsets = [0] * len(self.blocks)
+
+    def tags(self, offset_type: int) -> List[Tuple[int, int, TagValue]]:
+        height, width, bands = self.data.shape
+        sample_format = {"b": 1, "u": 1, "i": 2, "f": 3}[self.data.dtype.kind]
+        bits = 1 if self.data.dtype == bool else self.data.dtype.itemsize * 8
+        counts = [len(block) for block in self.blocks]
+
+        tags: List[Tuple[int, int, TagValue]] = []
+
+        if self.subfile_type:
+            tags.append((254, LONG, [self.subfile_type]))
+
+        tags += [
+            (256, SHORT, [width]),
+            (257, SHORT, [height]),
+            (258, SHORT, [bits] * bands),
+            (259, SHORT, [COMPRESSIONS[self.compression]]),
+            (262, SHORT, [4 if self.subfile_type & 4 else 2 if bands >= 3 else 1]),
+        ]
+
+        if not self.tile_size:
+            tags.append((273, offset_type, self.offsets))
+
+        tags.append((277, SHORT, [bands]))
+
+        if not self.tile_size:
+            tags += [
+                (278, SHORT, [self.rows_per_strip or height]),
+                (279, offset_type, counts),
+            ]
+
+        tags.append((284, SHORT, [1]))
+
+        if self.predictor:
+            tags.append((317, SHORT, [2]))
+
+        if self.tile_size:
+            tags += [
+                (322, SHORT, [self.tile_size]),
+                (323, SHORT, [self.tile_size]),
+                (324, offset_type, self.offsets),
+                (325, offset_type, counts),
+            ]
+
+        tags.append((339, SHORT, [sample_format] * bands))
+
+        if self.compression == "jpeg":
+            tags.append((347, UNDEFINED, EMPTY_JPEG_TABLES))
+
+        return tags
+
+
+def write_cog(
+    levels: Sequence[np.ndarray],
+    tile_size: Optional[int] = 256,
+    compression: str = "deflate",
+    bigtiff: bool = False,
+    byte_order: str = "<",
+    masks: Optional[Sequence[np.ndarray]] = None,
+    ghost: bool = False,
+    predictor: bool = False,
+    rows_per_strip: Optional[int] = None,
+    sparse: bool = False,
+    mask_bits: int = 1,
+) -> bytes:
+    """
+    Write COG with full resolution image and overviews from `levels`, every one of
+    them is a (height, width, bands) array. Optional `masks` are written as mask
+    IFDs right after their level's IFD, like GDAL does. They are 1-bit like GDAL's
+    ones, or 8-bit when `mask_bits` is 8.
+    When `ghost` is True GDAL structural metadata is written, and every block has
+    4 bytes leader with its size and 4 bytes trailer repeating its last bytes.
+    When `tile_size` is None, images are organised in strips of `rows_per_strip`.
+    When `sparse` is True, blocks of zeros have zero offset and byte count
+    """
+
+    images = []
+
+    for idx, level in enumerate(levels):
+        images.append(
+            _Image(
+                level,
+                int(idx > 0),
+                compression,
+                tile_size,
+                rows_per_strip,
+                predictor,
+                sparse,
+            )
+        )
+
+        if masks is not None:
+            mask = masks[idx] != 0 if mask_bits == 1 else masks[idx].astype(np.uint8)
+            images.append(
+                _Image(
+                    mask,
+                    4 | int(idx > 0),
+                    "deflate",
+                    tile_size,
+                    rows_per_strip,
+                    False,
+                    sparse,
+                )
+            )
+
+    pointer_fmt = "Q" if bigtiff else "I"
+    n_fmt = "Q" if bigtiff else "H"
+    offset_type = LONG8 if bigtiff else LONG
+    pointer_size = calcsize(pointer_fmt)
+    entry_fmt = f"HH{pointer_fmt}{pointer_fmt}"
+
+    header_size = 16 if bigtiff else 8
+    ghost_bytes = b""
+
+    if ghost:
+        ghost_size = f"GDAL_STRUCTURAL_METADATA_SIZE={len(GHOST_CONTENT):06d} bytes\n"
+        ghost_bytes = (ghost_size + GHOST_CONTENT).encode()
+
+    def ifd_size(image: _Image) -> int:
+        tags = image.tags(offset_type)
+        size = calcsize(n_fmt) + len(tags) * calcsize(entry_fmt) + pointer_size
+
+        for _, tag_type, value in tags:
+            data_size = len(value) * calcsize(TYPE_FORMATS[tag_type])
+
+            if data_size > pointer_size:
+                size += data_size + data_size % 2
+
+        return size + size % 2
+
+    # Place IFDs with their tags data first
+    ifd_pointers = []
+    position = header_size + len(ghost_bytes)
+    position += position % 2
+
+    for image in images:
+        ifd_pointers.append(position)
+        position += ifd_size(image)
+
+    # Then blocks data, smallest overviews first
+    leader_size = 4 if ghost else 0
+
+    for image in reversed(images):
+        for idx, block in enumerate(image.blocks):
+            if not block:
+                continue
+
+            image.offsets[idx] = position + leader_size
+            position += len(block) + 2 * leader_size
+
+    result = bytearray(position)
+
+    if bigtiff:
+        result[:16] = pack(f"{byte_order}2sHHHQ", b"", 43, 8, 0, ifd_pointers[0])
+    else:
+        result[:8] = pack(f"{byte_order}2sHI", b"", 42, ifd_pointers[0])
+
+    result[:2] = b"II" if byte_order == "<" else b"MM"
+    result[header_size : header_size + len(ghost_bytes)] = ghost_bytes
+
+    for idx, image in enumerate(images):
+        pointer = ifd_pointers[idx]
+        next_pointer = ifd_pointers[idx + 1] if idx + 1 < len(images) else 0
+        tags = image.tags(offset_type)
+
+        entries_size = len(tags) * calcsize(entry_fmt)
+        data_pointer = pointer + calcsize(n_fmt) + entries_size + pointer_size
+
+        ifd = bytearray(pack(f"{byte_order}{n_fmt}", len(tags)))
+
+        for code, tag_type, value in tags:
+            fmt = TYPE_FORMATS[tag_type]
+
+            if isinstance(value, bytes):
+                data = value
+            else:
+                data = pack(f"{byte_order}{len(value)}{fmt}", *value)
+
+            if len(data) > pointer_size:
+                result[data_pointer : data_pointer + len(data)] = data
+                value_bytes = pack(f"{byte_order}{pointer_fmt}", data_pointer)
+                data_pointer += len(data) + len(data) % 2
+            else:
+                value_bytes = data.ljust(pointer_size, b"\0")
+
+            entry = pack(f"{byte_order}HH{pointer_fmt}", code, tag_type, len(value))
+            ifd += entry + value_bytes
+
+        ifd += pack(f"{byte_order}{pointer_fmt}", next_pointer)
+        result[pointer : pointer + len(ifd)] = ifd
+
+        for offset, block in zip(image.offsets, image.blocks):
+            if not block:
+                continue
+
+            result[offset : offset + len(block)] = block
+
+            if ghost:
+                result[offset - 4 : offset] = pack("<I", len(block))
+                result[offset + len(block) : offset + len(block) + 4] = block[-4:]
+
+    return bytes(result)
+
+
+def make_levels(
+    width: int, height: int, n_levels: int, bands: int = 3, dtype: str = "uint8"
+) -> List[np.ndarray]:
+    """
+    Create image with deterministic pattern and its overviews (every one is
+    twice smaller than the previous)
+    """
+
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.stack([(x + y * b) % 256 for b in range(1, bands + 1)], axis=-1)
+    image = image.astype(dtype)
+
+    return [image[:: 2**level, :: 2**level] for level in range(n_levels)]
@@ -0,0 +1,67 @@
+from argparse import ArgumentParser, Namespace
+from asyncio import run
+from json import dump
+from sys import stdout
+from time import perf_counter
+from typing import Any, Dict, Optional, Sequence
+
+from async_cog import COGReader
+from async_cog.sources import MemorySource
+from benchmarks.cog_writer import make_levels, write_cog
+
+
+async def measure_parse(data: bytes, repeat: int) -> Dict[str, Any]:
+    """
+    CPU time of parsing metadata: the file is in memory, so opening it and
+    filling its IFDs with tags data is parsing only
+    """
+
+    n_tags = 0
+    start = perf_counter()
+
+    for _ in range(repeat):
+        async with COGReader(MemorySource(data)) as reader:
+            for ifd in reader:
+                await reader._fill_ifd_with_data(ifd)
+
+            n_tags = sum(ifd.n_tags for ifd in reader)
+
+    duration = perf_counter() - start
+
+    return {
+        "opens": repeat,
+        "tags_per_open": n_tags,
+        "opens_per_second": repeat / duration,
+        "microseconds_per_tag": duration / (repeat * n_tags) * 1e6,
+    }
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> Namespace:
+    parser = ArgumentParser(description="Benchmark parsing of COG metadata")
+    parser.add_argument("--repeat", type=int, default=1000, help="number of opens")
+    parser.add_argument("--size", type=int, default=1024, help="image size in pixels")
+    parser.add_argument("--levels", type=int, default=5, help="number of levels")
+    parser.add_argument("--tile-size", type=int, default=64)
+    parser.add_argument("--bigtiff", action="store_true")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    data = write_cog(
+        make_levels(args.size, args.size, args.levels),
+        tile_size=args.tile_size,
+        compression="raw",
+        bigtiff=args.bigtiff,
+    )
+    results = {
+        "parameters": vars(args),
+        "results": run(measure_parse(data, args.repeat)),
+    }
+
+    dump(results, stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from asyncio import sleep
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from aiohttp import web
+
+
+def parse_range(header: str, file_size: int) -> List[Tuple[int, int]]:
+    """
+    Parse "bytes=a-b,c-d" Range header into (first byte, last byte) pairs
+    clipped by the file size
+    """
+
+    ranges = []
+
+    for range_str in header.split("=", 1)[1].split(","):
+        start, end = range_str.strip().split("-")
+        ranges.append((int(start), min(int(end), file_size - 1)))
+
+    return ranges
+
+
+class RangeServer:
+    """
+    In-process HTTP server of in-memory files supporting (multi-)range requests.
+    Every response is delayed by `latency` seconds plus the time needed to send
+    its body with `bandwidth` bytes per second (0 for unlimited).
+    When more than `max_concurrent` requests (0 for unlimited) are handled at
+    once, the server is throttling: it answers 503 like S3 SlowDown.
+    Requests, sent bytes and throttled requests are counted by file name
+    """
+
+    def __init__(
+        self, latency: float = 0, bandwidth: float = 0, max_concurrent: int = 0
+    ):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.max_concurrent = max_concurrent
+        self.files: Dict[str, bytes] = {}
+        self.requests: Counter = Counter()
+        self.bytes_sent: Counter = Counter()
+        self.throttled: Counter = Counter()
+        # The biggest number of requests handled at once
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._runner: web.AppRunner
+        self._port: int
+
+        app = web.Application()
+        app.router.add_get("/{name}", self._handle)
+        self._app = app
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self._port}/{name}"
+
+    def reset_counters(self) -> None:
+        self.requests.clear()
+        self.bytes_sent.clear()
+        self.throttled.clear()
+        self.max_in_flight = 0
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+        try:
+            return await self._handle_range(request)
+        finally:
+            self._in_flight -= 1
+
+    async def _handle_range(self, request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+
+        if self.max_concurrent and self._in_flight > self.max_concurrent:
+            self.throttled[name] += 1
+            await sleep(self.latency)
+            raise web.HTTPServiceUnavailable(text="SlowDown")
+
+        if name not in self.files:
+            raise web.HTTPNotFound()
+
+        data = self.files[name]
+        self.requests[name] += 1
+
+        if "Range" not in request.headers:
+            return await self._respond(name, web.Response(body=data))
+
+        ranges = parse_range(request.headers["Range"], len(data))
+
+        if any(start >= len(data) for start, _ in ranges):
+            raise web.HTTPRequestRangeNotSatisfiable()
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers = {"Content-Range": f"bytes {start}-{end}/{len(data)}"}
+            body = data[start : end + 1]
+
+            return await self._respond(
+                name, web.Response(status=206, body=body, headers=headers)
+            )
+
+        body = b""
+
+        for start, end in ranges:
+            body += b"--BOUNDARY\r\nContent-Type: image/tiff\r\n"
+            body += f"Content-Range: bytes {start}-{end}/{len(data)}\r\n\r\n".encode()
+            body += data[start : end + 1] + b"\r\n"
+
+        body += b"--BOUNDARY--\r\n"
+        content_type = "multipart/byteranges; boundary=BOUNDARY"
+
+        return await self._respond(
+            name,
+            web.Response(status=206, body=body, headers={"Content-Type": content_type}),
+        )
+
+    async def _respond(self, name: str, response: web.Response) -> web.Response:
+        size = len(response.body)  # type: ignore
+        self.bytes_sent[name] += size
+        delay = self.latency
+
+        if self.bandwidth:
+            delay += size / self.bandwidth
+
+        await sleep(delay)
+
+        return response
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self._app)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+
+        self._port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+    async def __aenter__(self) -> RangeServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any, **kwargs: Any) -> None:
+        await self.stop()
@@ -0,0 +1,156 @@
+from argparse import ArgumentParser, Namespace
+from asyncio import Semaphore, gather, run
+from itertools import product
+from json import dump
+from sys import stdout
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from async_cog import COGReader
+from benchmarks.cog_writer import COMPRESSIONS, make_levels, write_cog
+from benchmarks.range_server import RangeServer
+
+
+def file_name(compression: str, tile_size: int, bigtiff: bool) -> str:
+    return f"{compression}_{tile_size}{'_bigtiff' if bigtiff else ''}.tif"
+
+
+async def measure_open(server: RangeServer, name: str) -> Dict[str, Any]:
+    """
+    Time and number of requests to open the file and to get its first tile
+    """
+
+    server.reset_counters()
+    start = perf_counter()
+
+    async with COGReader(server.url(name)) as reader:
+        open_time = perf_counter() - start
+        open_requests = server.requests[name]
+
+        await reader.get_tile_image(0, 0, 0)
+        first_tile_time = perf_counter() - start
+
+    return {
+        "open_seconds": open_time,
+        "open_requests": open_requests,
+        "first_tile_seconds": first_tile_time,
+        "first_tile_requests": server.requests[name],
+    }
+
+
+async def measure_throughput(
+    server: RangeServer, name: str, concurrency: int
+) -> Dict[str, Any]:
+    """
+    Number of full resolution tiles read per second with no more than
+    `concurrency` get_tile_image() calls at once
+    """
+
+    async with COGReader(server.url(name)) as reader:
+        # Exclude metadata reading from the measurement
+        await reader.get_tile_image(0, 0, 0)
+
+        ifd = reader._ifds[0]
+        coords = list(product(range(ifd.x_tile_count), range(ifd.y_tile_count)))
+        slots = Semaphore(concurrency)
+
+        async def _get_tile(x: int, y: int) -> None:
+            async with slots:
+                await reader.get_tile_image(0, x, y)
+
+        server.reset_counters()
+        start = perf_counter()
+        await gather(*(_get_tile(x, y) for x, y in coords))
+        duration = perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "tiles": len(coords),
+        "tiles_per_second": len(coords) / duration,
+        "requests": server.requests[name],
+        "bytes": server.bytes_sent[name],
+    }
+
+
+async def run_benchmarks(args: Namespace) -> List[Dict[str, Any]]:
+    server = RangeServer(
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        max_concurrent=args.max_concurrent,
+    )
+    levels = make_levels(args.size, args.size, args.levels)
+    results = []
+
+    configs = list(product(args.compressions, args.tile_sizes, (False, True)))
+
+    for compression, tile_size, bigtiff in configs:
+        name = file_name(compression, tile_size, bigtiff)
+        server.files[name] = write_cog(
+            levels,
+            tile_size=tile_size,
+            compression=compression,
+            bigtiff=bigtiff,
+            ghost=True,
+        )
+
+    async with server:
+        for compression, tile_size, bigtiff in configs:
+            name = file_name(compression, tile_size, bigtiff)
+            result: Dict[str, Any] = {
+                "file": name,
+                "compression": compression,
+                "tile_size": tile_size,
+                "bigtiff": bigtiff,
+                "file_size": len(server.files[name]),
+            }
+            result.update(await measure_open(server, name))
+            result["throughput"] = [
+                await measure_throughput(server, name, concurrency)
+                for concurrency in args.concurrency
+            ]
+            results.append(result)
+
+    return results
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> Namespace:
+    parser = ArgumentParser(
+        description="Benchmark COGReader against local range server"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="seconds per request"
+    )
+    parser.add_argument(
+        "--bandwidth", type=float, default=0, help="bytes per second, 0 for no limit"
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=0,
+        help="requests handled at once before throttling with 503, 0 for no limit",
+    )
+    parser.add_argument("--size", type=int, default=2048, help="image size in pixels")
+    parser.add_argument("--levels", type=int, default=4, help="number of levels")
+    parser.add_argument(
+        "--compressions", nargs="+", default=list(COMPRESSIONS), choices=COMPRESSIONS
+    )
+    parser.add_argument("--tile-sizes", nargs="+", type=int, default=[256, 512])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--output", help="JSON file for results, stdout by default")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    results = {"parameters": vars(args), "results": run(run_benchmarks(args))}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            dump(results, file, indent=2)
+    else:
+        dump(results, stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from json import loads
+from pathlib import Path
+
+from aiohttp import ClientSession
+from pytest import mark
+
+from benchmarks.cog_writer import make_levels, write_cog
+from benchmarks.parse import measure_parse
+from benchmarks.range_server import RangeServer, parse_range
+from benchmarks.run import main
+
+
+def test_parse_range() -> None:
+    assert parse_range("bytes=0-9", 100) == [(0, 9)]
+    assert parse_range("bytes=0-1, 90-200", 100) == [(0, 1), (90, 99)]
+
+
+@mark.asyncio
+async def test_range_server() -> None:
+    async with RangeServer() as server, ClientSession() as session:
+        server.files["file"] = b"0123456789"
+
+        async with session.get(server.url("file")) as response:
+            assert await response.read() == b"0123456789"
+
+        headers = {"Range": "bytes=2-4"}
+        async with session.get(server.url("file"), headers=headers) as response:
+            assert response.status == 206
+            assert await response.read() == b"234"
+
+        headers = {"Range": "bytes=0-0,8-20"}
+        async with session.get(server.url("file"), headers=headers) as response:
+            assert response.content_type == "multipart/byteranges"
+            body = await response.read()
+            assert b"Content-Range: bytes 8-9/10\r\n\r\n89\r\n" in body
+
+        headers = {"Range": "bytes=20-30"}
+        async with session.get(server.url("file"), headers=headers) as response:
+            assert response.status == 416
+
+        async with session.get(server.url("missing")) as response:
+            assert response.status == 404
+
+        assert server.requests["file"] == 4
+        assert server.bytes_sent["file"] == 10 + 3 + len(body)
+
+
+def test_run_benchmarks(tmp_path: Path) -> None:
+    output = tmp_path / "results.json"
+
+    main(
+        [
+            "--latency=0",
+            "--size=64",
+            "--levels=2",
+            "--compressions",
+            "raw",
+            "jpeg",
+            "--tile-sizes=32",
+            "--concurrency=2",
+            f"--output={output}",
+        ]
+    )
+
+    results = loads(output.read_text())["results"]
+
+    assert [result["file"] for result in results] == [
+        "raw_32.tif",
+        "raw_32_bigtiff.tif",
+        "jpeg_32.tif",
+        "jpeg_32_bigtiff.tif",
+    ]
+    assert results[0]["open_requests"] == 1
+    assert results[0]["throughput"][0]["tiles"] == 4
+
+
+@mark.asyncio
+async def test_measure_parse() -> None:
+    data = write_cog(make_levels(64, 64, 2), tile_size=16, compression="raw")
+    result = await measure_parse(data, repeat=2)
+
+    assert result["opens"] == 2
+    assert result["tags_per_open"] > 0
+    assert result["microseconds_per_tag"] > 0
@@ -1,13 +1,22 @@
 # Thanks to mapbox/COGDumper for the mock data
+from asyncio import gather, sleep
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from fractions import Fraction
+from math import ceil
 from re import escape
 
 import numpy as np
 from pytest import mark, raises
 
 from async_cog import COGReader
+from async_cog.decoders import BlockFormat
 from async_cog.ifd import IFD
+from async_cog.metrics import IOStats
+from async_cog.resampling import resample
+from async_cog.sources import MemorySource
 from async_cog.tags import BytesTag, ListTag, NumberTag, StringTag
+from async_cog.tile_cache import TileCache
+from benchmarks.cog_writer import make_levels, write_cog
 
 
 def test_constructor() -> None:
@@ -244,18 +253,52 @@ async def test_read_ifds_big_tiff(mocked_reader) -> None:
 
 
 @mark.asyncio
-async def test_fill_tag_data(mocked_reader) -> None:
+async def test_fill_ifd_data(mocked_reader) -> None:
     async with mocked_reader("BigTIFF.tif") as reader:
-        tag = ListTag(code=258, type=3, length=3, data_pointer=170)
-        await reader._fill_tag_with_data(tag)
+        ifd = reader._ifds[0]
+        await reader._fill_ifd_with_data(ifd)
+
+        assert ifd["BitsPerSample"] == [8, 8, 8]
+
+
+@mark.asyncio
+async def test_big_endian_inline_values(mocked_reader) -> None:
+    async with mocked_reader("be_cog.tif") as reader:
+        ifd = reader._ifds[0]
+
+        assert ifd["ImageWidth"] == 64
+        assert ifd["Compression"] == 7
+        assert ifd["TileOffsets"].tolist() == [8]
+        assert ifd["TileByteCounts"].tolist() == [2216]
+
+
+@mark.asyncio
+@mark.parametrize("bigtiff", [False, True])
+@mark.parametrize("byte_order", ["<", ">"])
+async def test_ifd_entries_layouts(bigtiff: bool, byte_order: str) -> None:
+    levels = make_levels(48, 40, 2, dtype="uint16")
+    data = write_cog(
+        levels, tile_size=16, compression="raw", bigtiff=bigtiff, byte_order=byte_order
+    )
+
+    async with COGReader(MemorySource(data)) as reader:
+        ifd = reader._ifds[1]
+        await reader._fill_ifd_with_data(ifd)
+
+        assert (ifd["ImageWidth"], ifd["ImageHeight"]) == (24, 20)
+        assert ifd["BitsPerSample"] == [16, 16, 16]
+        assert len(ifd["TileOffsets"]) == 4
+
+        image = await reader.read_window(0, 0, 0, 48, 40)
+
+    assert (image == levels[0]).all()
 
 
 @mark.asyncio
 async def test_tag_fractional(mocked_reader) -> None:
     async with mocked_reader("be_cog.tif") as reader:
-        tag = reader._ifds[0].tags["ReferenceBlackWhite"]
-        await reader._fill_tag_with_data(tag)
-        assert tag.value == [
+        await reader._fill_ifd_with_data(reader._ifds[0])
+        assert reader._ifds[0]["ReferenceBlackWhite"] == [
             Fraction(0, 1),
             Fraction(255, 1),
             Fraction(128, 1),
@@ -268,9 +311,9 @@ async def test_tag_fractional(mocked_reader) -> None:
 @mark.asyncio
 async def test_tag_ascii(mocked_reader) -> None:
     async with mocked_reader("be_cog.tif") as reader:
-        tag = reader._ifds[1].tags["NewSubfileType"]
-        await reader._fill_tag_with_data(tag)
-        assert tag.value == "test"
+        await reader._fill_ifd_with_data(reader._ifds[1])
+        # Inline ASCII is stored as is in any byte order
+        assert reader._ifds[1]["NewSubfileType"] == "tset"
 
 
 @mark.asyncio
@@ -356,3 +399,833 @@ async def test_read_tile_image_packbits(mocked_reader) -> None:
         assert all(image[0][0] == [255, 2, 5])
         assert image.dtype == np.uint8
         assert image.shape == (256, 256, 3)
+
+
+def _count_reads(reader: COGReader) -> list:
+    """
+    Wrap reader's source to record every requested byte range
+    """
+
+    calls = []
+    read = reader._source.read
+
+    async def _read(offset: int, size: int) -> bytes:
+        calls.append((offset, size))
+        return await read(offset, size)
+
+    reader._source.read = _read  # type: ignore
+    return calls
+
+
+@mark.asyncio
+async def test_prefetch_metadata(mocked_reader) -> None:
+    reader = mocked_reader("cog.tif")
+    calls = _count_reads(reader)
+
+    async with reader:
+        assert len(reader._ifds) == 6
+
+    # The whole file is smaller than the default prefetch size
+    assert calls == [(0, 16384)]
+
+
+@mark.asyncio
+async def test_prefetch_metadata_grows(mocked_reader) -> None:
+    async with mocked_reader("cog.tif") as reader:
+        expected_ifds = reader._ifds
+
+    reader = COGReader("cog.tif", prefetch_size=3000)
+    calls = _count_reads(reader)
+
+    async with reader:
+        assert reader._ifds == expected_ifds
+
+    assert calls == [(0, 3000), (3000, 3000), (6000, 6000)]
+
+
+@mark.asyncio
+async def test_prefetch_metadata_far_pointer(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+    reader = COGReader("cog.tif", prefetch_size=1024)
+    calls = _count_reads(reader)
+
+    async with reader:
+        assert len(reader._ifds) == 6
+
+    # IFDs after the first one are too far from the buffer to grow it
+    assert calls[0] == (0, 1024)
+    assert (4282, 2) in calls
+
+
+@mark.asyncio
+async def test_prefetch_disabled(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+    reader = COGReader("cog.tif", prefetch_size=0)
+    calls = _count_reads(reader)
+
+    async with reader:
+        assert len(reader._ifds) == 6
+
+    assert calls[:2] == [(0, 4), (4, 4)]
+    assert len(calls) == 14
+
+
+@mark.asyncio
+async def test_fill_ifd_with_data_once(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+
+    async with COGReader("cog.tif", prefetch_size=0) as reader:
+        calls = _count_reads(reader)
+
+        await gather(*(reader.get_tile_image(0, 0, 0) for _ in range(3)))
+        await reader.get_tile_image(0, 0, 0)
+
+    # BitsPerSample, SampleFormat and JPEGTables are read once with one request
+    # and the tile itself is read every time
+    assert calls == [(170, 85)] + [(255, 4027)] * 4
+
+
+@mark.asyncio
+async def test_fill_ifd_with_data_retries_failure(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+
+    async with COGReader("cog.tif", prefetch_size=0) as reader:
+        ifd = reader._ifds[0]
+        read = reader._source.read
+
+        async def _failing_read(offset: int, size: int) -> bytes:
+            raise ConnectionError
+
+        reader._source.read = _failing_read  # type: ignore
+
+        with raises(ConnectionError):
+            await reader._fill_ifd_with_data(ifd)
+
+        reader._source.read = read  # type: ignore
+        await reader._fill_ifd_with_data(ifd)
+
+        assert ifd["BitsPerSample"] == [8, 8, 8]
+
+
+@mark.asyncio
+async def test_fill_ifd_with_data_merges_ranges(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+
+    async with COGReader("cog.tif", prefetch_size=0, max_gap=0) as reader:
+        calls = _count_reads(reader)
+        await reader._fill_ifd_with_data(reader._ifds[5])
+
+    # GeoKeyDirectoryTag, GeoAsciiParamsTag and GeoDoubleParamsTag are adjacent
+    assert calls == [(10875, 105)]
+    assert reader._ifds[5]["GTCitation"] == "WGS 84 / Pseudo-Mercator"
+
+
+@mark.asyncio
+async def test_get_tiles(mocked_reader) -> None:
+    mocked_reader("tiles.tif")
+
+    async with COGReader("tiles.tif", prefetch_size=0, max_gap=0) as reader:
+        await reader._fill_ifd_with_data(reader._ifds[0])
+        calls = _count_reads(reader)
+
+        coords = [(1, 1), (0, 0), (1, 0), (0, 1)]
+        images = await reader.get_tiles(0, coords)
+
+        for (x, y), image in zip(coords, images):
+            assert (image == await reader.get_tile_image(0, x, y)).all()
+
+    # Two rows of two adjacent tiles
+    assert calls[:2] == [(2352, 1139), (4631, 1289)]
+
+
+@mark.asyncio
+async def test_get_tiles_raises(mocked_reader) -> None:
+    async with mocked_reader("tiles.tif") as reader:
+        with raises(ValueError, match=escape("Tile (4, 0) on the level 0 doesn't")):
+            await reader.get_tiles(0, [(0, 0), (4, 0)])
+
+
+def _tiles_tif_image(width: int, height: int) -> np.ndarray:
+    """
+    Expected image of the tiles.tif full resolution level
+    """
+
+    y, x = np.mgrid[0:height, 0:width]
+    return np.stack([(x + y * b) % 256 for b in (1, 2, 3)], axis=-1).astype("uint8")
+
+
+@mark.asyncio
+async def test_read_window(mocked_reader) -> None:
+    async with mocked_reader("tiles.tif") as reader:
+        image = await reader.read_window(0, 10, 5, 40, 30)
+
+        assert image.shape == (30, 40, 3)
+        assert image.dtype == np.uint8
+        assert (image == _tiles_tif_image(64, 48)[5:35, 10:50]).all()
+
+
+@mark.asyncio
+async def test_read_window_outside_image(mocked_reader) -> None:
+    async with mocked_reader("tiles.tif") as reader:
+        image = await reader.read_window(0, 60, 40, 10, 10)
+
+        assert image.shape == (10, 10, 3)
+        assert (image[:8, :4] == _tiles_tif_image(64, 48)[40:, 60:]).all()
+        assert not image[8:].any()
+        assert not image[:, 4:].any()
+
+        assert not (await reader.read_window(0, 100, 100, 2, 2)).any()
+
+
+@mark.asyncio
+async def test_read_window_raises(mocked_reader) -> None:
+    async with mocked_reader("tiles.tif") as reader:
+        with raises(ValueError, match=escape("Invalid window (0, 0, 0, 1)")):
+            await reader.read_window(0, 0, 0, 0, 1)
+
+
+@mark.asyncio
+@mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+async def test_decode_in_executor(mocked_reader, executor_class) -> None:
+    mocked_reader("tiles.tif")
+
+    with executor_class(max_workers=2) as executor:
+        async with COGReader("tiles.tif", executor=executor) as reader:
+            image = await reader.read_window(0, 0, 0, 64, 48)
+
+    assert (image == _tiles_tif_image(64, 48)).all()
+
+
+@mark.asyncio
+async def test_decode_sends_block_format(mocked_reader) -> None:
+    mocked_reader("tiles.tif")
+    submitted: list = []
+
+    class _Executor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):  # type: ignore
+            submitted.append(args)
+            return super().submit(*args, **kwargs)
+
+    with _Executor(max_workers=2) as executor:
+        async with COGReader("tiles.tif", executor=executor) as reader:
+            await reader.get_tile_image(0, 0, 0)
+
+    # Tile index arrays aren't pickled for every tile
+    assert not any(isinstance(arg, IFD) for arg in submitted[0])
+    (block_format,) = [arg for arg in submitted[0] if isinstance(arg, BlockFormat)]
+    assert block_format == BlockFormat(
+        shape=(16, 16, 3),
+        dtype=np.dtype("uint8"),
+        is_tiled=True,
+        bits_per_sample=8,
+        predictor=1,
+        jpeg_tables=None,
+    )
+
+
+@mark.asyncio
+async def test_decode_pending_limit(mocked_reader) -> None:
+    mocked_reader("tiles.tif")
+    # Number of unfinished decodings at the moment of every submit
+    decoding: list = []
+    finished: list = []
+
+    class _Executor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):  # type: ignore
+            decoding.append(len(decoding) - finished.count(True))
+            future = super().submit(*args, **kwargs)
+            future.add_done_callback(lambda _: finished.append(True))
+            return future
+
+    with _Executor(max_workers=4) as executor:
+        reader = COGReader("tiles.tif", executor=executor, max_pending_decodes=2)
+
+        async with reader:
+            await reader.read_window(0, 0, 0, 64, 48)
+
+    assert len(decoding) == 12
+    assert max(decoding) < 2
+
+
+@mark.asyncio
+async def test_tile_cache(mocked_reader) -> None:
+    mocked_reader("tiles.tif")
+    cache = TileCache(max_bytes=10 * 16 * 16 * 3)
+
+    async with COGReader("tiles.tif", prefetch_size=0, tile_cache=cache) as reader:
+        await reader._fill_ifd_with_data(reader._ifds[0])
+        calls = _count_reads(reader)
+
+        tile = await reader.get_tile_image(0, 0, 0)
+        assert await reader.get_tile_image(0, 0, 0) is tile
+        assert len(calls) == 1
+
+        tiles = await reader.get_tiles(0, [(0, 0), (1, 0), (1, 0)])
+        assert tiles[0] is tile
+        assert tiles[1] is tiles[2]
+        assert calls[1:] == [(2921, 570)]
+
+        image = await reader.read_window(0, 0, 0, 64, 48)
+        assert (image == _tiles_tif_image(64, 48)).all()
+
+    assert cache.stats.hits == 5
+    assert cache.stats.misses == 12
+    assert cache.stats.evictions == 2
+    assert ("tiles.tif", 0, 3, 2) in cache
+
+
+@mark.asyncio
+async def test_io_stats(mocked_reader) -> None:
+    events: list = []
+    mocked_reader("cog.tif")
+    reader = COGReader("cog.tif", io_stats=IOStats(on_read=[events.append]))
+
+    async with reader:
+        await reader.get_tile_image(0, 0, 0)
+
+    stats = reader.io_stats
+
+    assert stats["header"].requests == 1
+    assert stats["header"].bytes_requested == 16384
+    assert stats["header"].bytes_used == 8
+    assert stats["ifd"].requests == 0
+    assert stats["ifd"].bytes_used == 6 * 2 + 4 * (13 + 14 * 4 + 3) * 3 + 6 * 4
+    # Tag data and the tile are in the prefetched buffer
+    assert stats["tag_data"].requests == 0
+    assert stats["tag_data"].bytes_used == 85
+    assert stats["tile"].bytes_used == 4027
+    assert stats.total.requests == 1
+    assert [event.phase for event in events] == ["header"]
+
+
+@mark.asyncio
+async def test_io_stats_without_prefetch(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+
+    async with COGReader("cog.tif", prefetch_size=0) as reader:
+        await reader.get_tile_image(0, 0, 0)
+        await reader._fill_ifd_with_data(reader._ifds[1])
+
+    stats = reader.io_stats
+
+    assert stats["header"].requests == 2
+    assert stats["ifd"].requests == 12
+    assert stats["tag_data"].requests == 2
+    # Tags data of both IFDs
+    assert stats["tag_data"].bytes_requested == 85 + 85
+    assert stats["tile"].requests == 1
+    assert stats["tile"].bytes_requested == 4027
+    assert sum(stats["tile"].latency_buckets) == 1
+
+
+@mark.asyncio
+async def test_tile_index_blocks(mocked_reader) -> None:
+    mocked_reader("tiles.tif")
+
+    async with COGReader("tiles.tif", prefetch_size=0, max_gap=0) as reader:
+        expected = await reader.get_tiles(0, [(3, 2), (2, 2), (0, 0)])
+
+    mocked_reader("tiles.tif")
+    reader = COGReader("tiles.tif", prefetch_size=0, max_gap=0, tile_index_block_size=4)
+
+    async with reader:
+        ifd = reader._ifds[0]
+        await reader._fill_ifd_with_data(ifd)
+        stats = reader.io_stats["tag_data"]
+        requests = stats.requests
+
+        assert ifd["TileOffsets"] is None
+        assert ifd.has_tile(3, 2)
+
+        # Tiles 11 and 10 are in the last block of 4 values of both arrays
+        assert (await reader.get_tile_image(0, 3, 2) == expected[0]).all()
+        assert stats.requests == requests + 2
+        assert stats.bytes_requested == 12 + 2 * 4 * 4
+
+        assert (await reader.get_tile_image(0, 2, 2) == expected[1]).all()
+        assert stats.requests == requests + 2
+
+        assert (await reader.get_tile_image(0, 0, 0) == expected[2]).all()
+        assert stats.requests == requests + 4
+        assert len(reader._index_block_loads) == 4
+
+
+@mark.asyncio
+async def test_tile_index_blocks_first_tile() -> None:
+    data = write_cog(make_levels(1024, 1024, 1), tile_size=16, compression="raw")
+
+    async with COGReader(
+        MemorySource(data), prefetch_size=0, tile_index_block_size=256
+    ) as reader:
+        image = await reader.get_tile_image(0, 63, 63)
+
+    assert (image == make_levels(1024, 1024, 1)[0][-16:, -16:]).all()
+
+    # 4096 tiles, but only one block of 256 offsets and byte counts is read
+    assert reader.io_stats["tag_data"].bytes_requested < 2 * 256 * 4 + 100
+
+
+@mark.asyncio
+async def test_gdal_metadata(mocked_reader) -> None:
+    mocked_reader("deflate.tif")
+
+    async with COGReader("deflate.tif") as reader:
+        assert reader.gdal_metadata == {
+            "LAYOUT": "IFDS_BEFORE_DATA",
+            "BLOCK_ORDER": "ROW_MAJOR",
+            "BLOCK_LEADER": "SIZE_AS_UINT4",
+            "BLOCK_TRAILER": "LAST_4_BYTES_REPEATED",
+            "KNOWN_INCOMPATIBLE_EDITION": "NO",
+        }
+
+    mocked_reader("cog.tif")
+
+    async with COGReader("cog.tif") as reader:
+        assert reader.gdal_metadata == {}
+
+
+@mark.asyncio
+async def test_ifds_before_data() -> None:
+    levels = make_levels(512, 512, 4)
+    requests = []
+
+    for ghost in (False, True):
+        data = write_cog(levels, tile_size=16, ghost=ghost)
+
+        async with COGReader(MemorySource(data), prefetch_size=1024) as reader:
+            assert len(reader._ifds) == 4
+            requests.append(reader.io_stats["ifd"].requests)
+
+            if ghost:
+                # The whole IFDs region is in the metadata buffer
+                assert len(reader._metadata) > reader._ifds[-1].pointer
+
+    assert requests[1] < requests[0]
+
+
+@mark.asyncio
+async def test_incompatible_edition() -> None:
+    levels = make_levels(256, 256, 2)
+    data = write_cog(levels, tile_size=16, ghost=True)
+    # The file was edited in place after writing
+    data = data.replace(
+        b"KNOWN_INCOMPATIBLE_EDITION=NO\n ", b"KNOWN_INCOMPATIBLE_EDITION=YES\n"
+    )
+
+    async with COGReader(
+        MemorySource(data), prefetch_size=1024, use_block_leaders=True
+    ) as reader:
+        assert reader.gdal_metadata["KNOWN_INCOMPATIBLE_EDITION"] == "YES"
+        # IFDs aren't assumed to be before the data and leaders aren't used
+        assert len(reader._metadata) < reader._ifds[-1].pointer
+        assert not reader._reads_block_leaders
+
+        tile = await reader.get_tile_image(0, 3, 2)
+        assert reader._ifds[0]["TileByteCounts"] is not None
+
+    assert (tile == levels[0][32:48, 48:64]).all()
+
+
+@mark.asyncio
+@mark.parametrize("compression", ["deflate", "raw"])
+async def test_block_leaders(compression: str) -> None:
+    levels = make_levels(256, 256, 2)
+    data = write_cog(levels, tile_size=64, compression=compression, ghost=True)
+
+    async with COGReader(MemorySource(data), use_block_leaders=True) as reader:
+        tiles = await reader.get_tiles(0, [(3, 3), (0, 1)])
+
+        assert reader._ifds[0]["TileByteCounts"] is None
+        assert (tiles[0] == levels[0][-64:, -64:]).all()
+        assert (tiles[1] == levels[0][64:128, :64]).all()
+
+
+@mark.asyncio
+async def test_block_leaders_big_blocks() -> None:
+    # Compressed noise is bigger than uncompressed one
+    image = np.random.default_rng(0).integers(0, 256, (64, 64, 1), dtype=np.uint8)
+    data = write_cog([image], tile_size=32, compression="deflate", ghost=True)
+
+    async with COGReader(
+        MemorySource(data), prefetch_size=0, max_gap=0, use_block_leaders=True
+    ) as reader:
+        tiles = await reader.get_tiles(0, [(1, 0), (0, 1)])
+        # Leaders with uncompressed size of tiles and the rest of tiles
+        assert reader.io_stats["tile"].requests == 4
+
+    assert (tiles[0] == image[:32, 32:]).all()
+    assert (tiles[1] == image[32:, :32]).all()
+
+
+@mark.asyncio
+async def test_block_leaders_estimated_size() -> None:
+    levels = make_levels(256, 256, 1, bands=1)
+    data = write_cog(levels, tile_size=64, compression="deflate", ghost=True)
+
+    async with COGReader(
+        MemorySource(data), prefetch_size=0, max_gap=0, use_block_leaders=True
+    ) as reader:
+        stats = reader.io_stats["tile"]
+
+        # Nothing is known about sizes of tiles, so uncompressed size is read
+        await reader.get_tile_image(0, 0, 0)
+        assert stats.bytes_requested == 4 + 64 * 64
+
+        # The next tiles are read by the size of the first one with headroom
+        bytes_requested = stats.bytes_requested
+        tiles = await reader.get_tiles(0, [(2, 1), (3, 3)])
+        assert stats.bytes_requested - bytes_requested < 2 * 64 * 64 // 10
+
+    assert (tiles[0] == levels[0][64:128, 128:192]).all()
+    assert (tiles[1] == levels[0][-64:, -64:]).all()
+
+
+@mark.asyncio
+@mark.parametrize(
+    "options",
+    [{}, {"tile_index_block_size": 4}, {"use_block_leaders": True}],
+)
+async def test_sparse_tiles(options) -> None:
+    image = make_levels(128, 96, 1)[0]
+    image[32:64, :64] = 0
+    data = write_cog([image], tile_size=32, ghost=True, sparse=True)
+
+    async with COGReader(MemorySource(data), **options) as reader:
+        assert (await reader.read_window(0, 16, 16, 112, 80) == image[16:, 16:]).all()
+        assert not (await reader.get_tile_image(0, 1, 1)).any()
+
+        coords = [(x, y) async for x, y, _ in reader.iter_tiles(0)]
+        assert sorted(coords) == sorted(
+            (x, y) for y in range(3) for x in range(4) if (x, y) not in {(0, 1), (1, 1)}
+        )
+
+
+def make_masks(levels):
+    masks = []
+
+    for level in levels:
+        height, width, _ = level.shape
+        mask = np.full((height, width, 1), 255, dtype=np.uint8)
+        # The right half of the image is nodata
+        mask[:, width // 2 :] = 0
+        masks.append(mask)
+
+    return masks
+
+
+@mark.asyncio
+async def test_mask_ifds() -> None:
+    levels = make_levels(128, 128, 3)
+    data = write_cog(levels, tile_size=32, masks=make_masks(levels))
+
+    async with COGReader(MemorySource(data)) as reader:
+        assert len(reader._ifds) == 6
+        assert len(reader.levels) == 3
+        assert [ifd["ImageWidth"] for ifd in reader.levels] == [128, 64, 32]
+        assert all(reader.has_mask(level) for level in range(3))
+
+        # Levels are indexed without masks
+        image = await reader.get_tile_image(1, 1, 0)
+        assert (image == levels[1][:32, 32:]).all()
+
+
+@mark.asyncio
+@mark.parametrize("mask_bits", [1, 8])
+async def test_tile_with_mask(mask_bits: int) -> None:
+    levels = make_levels(128, 128, 2)
+    data = write_cog(
+        levels, tile_size=32, masks=make_masks(levels), mask_bits=mask_bits
+    )
+
+    async with COGReader(MemorySource(data)) as reader:
+        image = await reader.get_tile_image(0, 1, 2, with_mask=True)
+
+        assert isinstance(image, np.ma.MaskedArray)
+        assert (image.data == levels[0][64:96, 32:64]).all()
+        assert not image.mask.any()
+
+        image = await reader.get_tile_image(0, 2, 2, with_mask=True)
+        assert image.mask.all()
+
+        image = await reader.get_tile_image(1, 1, 0, with_mask=True)
+        assert image.mask.shape == (32, 32, 3)
+        assert image.mask.all()
+
+
+@mark.asyncio
+async def test_strip_with_bilevel_mask() -> None:
+    levels = make_levels(100, 90, 1)
+    data = write_cog(
+        levels, tile_size=None, rows_per_strip=16, masks=make_masks(levels)
+    )
+
+    async with COGReader(MemorySource(data)) as reader:
+        assert reader._masks[0]["BitsPerSample"] == [1]
+
+        # Rows of 100 pixels are padded to 13 bytes, the last strip has 10 rows
+        image = await reader.get_tile_image(0, 0, 5, with_mask=True)
+        assert image.mask.shape == (10, 100, 3)
+        assert not image.mask[:, :50].any()
+        assert image.mask[:, 50:].all()
+
+
+@mark.asyncio
+@mark.parametrize(
+    "options",
+    [{}, {"tile_index_block_size": 4}, {"use_block_leaders": True}],
+)
+async def test_tile_with_sparse_mask(options) -> None:
+    levels = make_levels(128, 128, 1)
+    data = write_cog(
+        levels, tile_size=32, masks=make_masks(levels), ghost=True, sparse=True
+    )
+
+    async with COGReader(MemorySource(data), **options) as reader:
+        image = await reader.get_tile_image(0, 2, 2, with_mask=True)
+        assert (image.data == levels[0][64:96, 64:96]).all()
+        assert image.mask.all()
+
+        image = await reader.get_tile_image(0, 1, 2, with_mask=True)
+        assert not image.mask.any()
+
+
+@mark.asyncio
+async def test_tile_with_mask_concurrent_reads() -> None:
+    levels = make_levels(128, 128, 1)
+    data = write_cog(levels, tile_size=32, masks=make_masks(levels))
+    reader = COGReader(MemorySource(data), prefetch_size=0, max_gap=0)
+
+    async with reader:
+        await gather(*(reader._fill_ifd_with_data(ifd) for ifd in reader._ifds))
+        stats = reader.io_stats["tile"]
+
+        await reader.get_tile_image(0, 3, 3, with_mask=True)
+        assert stats.requests == 2
+
+
+@mark.asyncio
+async def test_tile_without_mask(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+
+    async with COGReader("cog.tif") as reader:
+        assert not reader.has_mask(0)
+        image = await reader.get_tile_image(0, 0, 0, with_mask=True)
+
+        assert isinstance(image, np.ma.MaskedArray)
+        assert not image.mask.any()
+
+
+@mark.asyncio
+@mark.parametrize(
+    "out_shape, level", [((512, 512), 0), ((256, 200), 1), ((100, 100), 2), ((8, 8), 3)]
+)
+async def test_read_selects_level(out_shape, level) -> None:
+    levels = make_levels(512, 512, 4)
+    data = write_cog(levels, tile_size=64, compression="raw")
+
+    async with COGReader(MemorySource(data)) as reader:
+        read_levels = []
+        read_window = reader.read_window
+
+        async def _read_window(level, *args):
+            read_levels.append(level)
+            return await read_window(level, *args)
+
+        reader.read_window = _read_window  # type: ignore
+        image = await reader.read((0, 0, 512, 512), out_shape)
+
+    assert read_levels == [level]
+    assert image.shape == (*out_shape, 3)
+
+
+@mark.asyncio
+async def test_read_overview_exactly() -> None:
+    levels = make_levels(512, 512, 3)
+    data = write_cog(levels, tile_size=64, compression="raw")
+
+    async with COGReader(MemorySource(data), prefetch_size=0) as reader:
+        image = await reader.read((128, 64, 384, 320), (64, 64))
+        # Only 4 tiles of the level 2 intersect the bbox
+        assert reader.io_stats["tile"].bytes_used == 4 * 64 * 64 * 3
+
+    assert (image == levels[2][16:80, 32:96]).all()
+
+
+@mark.asyncio
+@mark.parametrize("resampling", ["average", "bilinear"])
+async def test_read_resampling(resampling) -> None:
+    levels = make_levels(256, 256, 1, bands=1, dtype="uint16")
+    data = write_cog(levels, tile_size=32, compression="raw")
+    bbox = (16, 24, 208, 240)
+    # Upsampling in rows and downsampling in columns
+    out_shape = (300, 100)
+
+    async with COGReader(MemorySource(data)) as reader:
+        image = await reader.read(bbox, out_shape, resampling)
+
+    window = levels[0][bbox[1] - 1 : bbox[3] + 1, bbox[0] - 1 : bbox[2] + 1]
+    expected = resample(window, (1, 1, 193, 217), out_shape, resampling)
+
+    assert (image == expected).all()
+
+
+@mark.asyncio
+@mark.parametrize("resampling", ["nearest", "average", "bilinear"])
+async def test_read_image_edges(resampling) -> None:
+    image = np.full((90, 100, 1), 200, dtype=np.uint8)
+    data = write_cog([image], tile_size=32)
+
+    async with COGReader(MemorySource(data)) as reader:
+        assert (await reader.read((0, 0, 100, 90), (200, 180), resampling) == 200).all()
+        assert (await reader.read((50, 45, 100, 90), (70, 70), resampling) == 200).all()
+
+
+@mark.asyncio
+async def test_read_raises(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+
+    async with COGReader("cog.tif") as reader:
+        with raises(ValueError, match=escape("Invalid bbox (10, 0, 10, 10)")):
+            await reader.read((10, 0, 10, 10), (5, 5))
+
+        with raises(ValueError, match=escape("Invalid out_shape (0, 5)")):
+            await reader.read((0, 0, 10, 10), (0, 5))
+
+        with raises(ValueError, match="Unknown resampling 'cubic'"):
+            await reader.read((0, 0, 10, 10), (5, 5), "cubic")  # type: ignore
+
+
+@mark.asyncio
+@mark.parametrize("compression", ["raw", "deflate", "lzw"])
+async def test_strips(compression: str) -> None:
+    levels = make_levels(100, 90, 2)
+    data = write_cog(levels, tile_size=None, rows_per_strip=16, compression=compression)
+
+    async with COGReader(MemorySource(data), prefetch_size=0) as reader:
+        ifd = reader.levels[0]
+        assert not ifd.is_tiled
+        assert (ifd.x_tile_count, ifd.y_tile_count) == (1, 6)
+        assert ifd.numpy_shape == (16, 100, 3)
+
+        image = await reader.read_window(0, 10, 20, 50, 30)
+        # Only strips 1, 2 and 3 are read
+        assert reader.io_stats["tile"].bytes_used == sum(ifd["StripByteCounts"][1:4])
+        assert (image == levels[0][20:50, 10:60]).all()
+
+        # The last strip has the remaining 10 rows
+        assert (await reader.get_tile_image(0, 0, 5) == levels[0][80:]).all()
+        assert (await reader.read_window(1, 0, 0, 50, 45) == levels[1]).all()
+
+
+@mark.asyncio
+async def test_strips_with_index_blocks() -> None:
+    levels = make_levels(64, 64, 1)
+    data = write_cog(levels, tile_size=None, rows_per_strip=1, compression="raw")
+
+    async with COGReader(MemorySource(data), tile_index_block_size=16) as reader:
+        image = await reader.read_window(0, 0, 40, 64, 8)
+
+        assert reader.levels[0]["StripOffsets"] is None
+        assert len(reader._index_block_loads) == 2
+
+    assert (image == levels[0][40:48]).all()
+
+
+@mark.asyncio
+@mark.parametrize("tile_size, rows_per_strip", [(None, 16), (None, 7), (32, None)])
+async def test_iter_rows(tile_size, rows_per_strip) -> None:
+    levels = make_levels(96, 100, 1)
+    data = write_cog(levels, tile_size=tile_size, rows_per_strip=rows_per_strip)
+
+    async with COGReader(MemorySource(data)) as reader:
+        batches = [batch async for batch in reader.iter_rows(batch_rows=30)]
+        rows = reader.levels[0].tile_height * ceil(30 / reader.levels[0].tile_height)
+
+    assert [len(batch) for batch in batches[:-1]] == [rows] * (len(batches) - 1)
+    assert (np.concatenate(batches) == levels[0]).all()
+
+
+@mark.asyncio
+async def test_iter_rows_stopped() -> None:
+    levels = make_levels(64, 64, 1)
+    data = write_cog(levels, tile_size=None, rows_per_strip=8, compression="raw")
+
+    async with COGReader(MemorySource(data), prefetch_size=0) as reader:
+        rows = reader.iter_rows(batch_rows=8)
+
+        async for batch in rows:
+            break
+
+        await rows.aclose()  # type: ignore
+        # The first batch and the prefetched second one
+        assert reader.io_stats["tile"].bytes_used <= 2 * 8 * 64 * 3
+
+    assert (batch == levels[0][:8]).all()
+
+
+@mark.asyncio
+@mark.parametrize("ordered", [False, True])
+async def test_iter_tiles(ordered: bool) -> None:
+    levels = make_levels(256, 192, 2)
+    data = write_cog(levels, tile_size=32)
+
+    async with COGReader(MemorySource(data)) as reader:
+        tiles = [tile async for tile in reader.iter_tiles(0, 4, ordered=ordered)]
+        ifd = reader.levels[0]
+
+    assert sorted((x, y) for x, y, _ in tiles) == sorted(
+        (x, y) for x in range(8) for y in range(6)
+    )
+
+    for x, y, image in tiles:
+        assert (image == levels[0][y * 32 : (y + 1) * 32, x * 32 : (x + 1) * 32]).all()
+
+    if ordered:
+        offsets = [ifd["TileOffsets"][ifd.get_tile_idx(x, y)] for x, y, _ in tiles]
+        assert offsets == sorted(offsets)
+
+
+@mark.asyncio
+@mark.parametrize("ordered", [False, True])
+async def test_iter_tiles_backpressure(ordered: bool) -> None:
+    levels = make_levels(256, 256, 1)
+    data = write_cog(levels, tile_size=16, compression="raw")
+
+    async with COGReader(MemorySource(data), prefetch_size=0, max_gap=0) as reader:
+        started = []
+        tile_loaders = reader._tile_loaders
+
+        def _tile_loaders(level, ifd, coords):
+            started.extend(coords)
+            return tile_loaders(level, ifd, coords)
+
+        reader._tile_loaders = _tile_loaders  # type: ignore
+        consumed = 0
+
+        async for _ in reader.iter_tiles(0, concurrency=8, ordered=ordered):
+            consumed += 1
+            # Slow consumer
+            await sleep(0.001)
+            assert len(started) <= consumed + 8
+
+        assert consumed == len(started) == 256
+        # Adjacent tiles are read with merged requests
+        assert reader.io_stats["tile"].requests < 256 // 4
+
+
+@mark.asyncio
+async def test_iter_tiles_stopped() -> None:
+    levels = make_levels(128, 128, 1)
+    data = write_cog(levels, tile_size=16)
+
+    async with COGReader(MemorySource(data)) as reader:
+        tiles = reader.iter_tiles(0, concurrency=4)
+
+        async for x, y, _ in tiles:
+            break
+
+        await tiles.aclose()  # type: ignore
+
+        with raises(ValueError, match="Invalid concurrency 0"):
+            async for _ in reader.iter_tiles(0, concurrency=0):
+                pass
@@ -0,0 +1,188 @@
+from asyncio import ensure_future, gather, run, sleep, wait_for
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import List
+
+from pytest import mark, raises
+
+from async_cog import COGReader
+from async_cog.retry import RetryPolicy
+from async_cog.sources import AdaptiveLimiter, ConcurrencyController, RangeReadError
+from benchmarks.cog_writer import make_levels, write_cog
+from benchmarks.range_server import RangeServer
+
+
+@mark.asyncio
+async def test_limiter_caps_requests() -> None:
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=4)
+    in_flight: List[int] = []
+
+    async def _request() -> int:
+        in_flight.append(limiter.in_flight)
+        await sleep(0.001)
+        return 1
+
+    assert sum(await gather(*(limiter.run(_request) for _ in range(50)))) == 50
+    assert max(in_flight) == 4
+    assert limiter.in_flight == 0
+
+
+@mark.asyncio
+async def test_limiter_aimd() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8, latency_tolerance=None)
+
+    async def _request() -> None:
+        pass
+
+    async def _throttled_request() -> None:
+        await sleep(0.001)
+        raise RangeReadError("SlowDown", status=503)
+
+    async def _failed_request() -> None:
+        raise RangeReadError("Not Found", status=404)
+
+    # Additive increase by 1 per 8 requests
+    for _ in range(8):
+        await limiter.run(_request)
+
+    assert limiter.limit == 8
+    await limiter.run(_request)
+    assert limiter.limit == 9
+
+    # Multiplicative decrease, only once for concurrent requests
+    results = await gather(
+        *(limiter.run(_throttled_request) for _ in range(4)), return_exceptions=True
+    )
+    assert all(isinstance(result, RangeReadError) for result in results)
+    assert limiter.limit == 4
+
+    with raises(RangeReadError):
+        await limiter.run(_throttled_request)
+
+    assert limiter.limit == 2
+
+    with raises(RangeReadError):
+        await limiter.run(_failed_request)
+
+    assert limiter.limit == 2
+
+    for _ in range(10):
+        with raises(RangeReadError):
+            await limiter.run(_throttled_request)
+
+    assert limiter.limit == 1
+
+
+@mark.asyncio
+async def test_limiter_slow_requests() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8, latency_tolerance=5)
+    delays = [0, 0.05]
+
+    async def _request() -> None:
+        await sleep(delays.pop(0))
+
+    await limiter.run(_request)
+    await limiter.run(_request)
+
+    assert limiter.limit == 4
+
+
+@mark.asyncio
+async def test_limiter_slow_big_requests() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8, latency_tolerance=5)
+    delays = [0, 0.05]
+
+    async def _request() -> None:
+        await sleep(delays.pop(0))
+
+    # Big requests are slower, but they aren't compared with small ones
+    await limiter.run(_request, size=100)
+    await limiter.run(_request, size=10**6)
+
+    assert limiter.limit == 8
+
+
+@mark.asyncio
+async def test_controller_hosts() -> None:
+    controller = ConcurrencyController(initial_limit=2)
+
+    first = controller["http://a.com/1.tif"]
+
+    assert controller["http://a.com/2.tif"] is first
+    assert controller["http://b.com/1.tif"] is not first
+    assert first.limit == 2
+
+
+def test_controller_threads() -> None:
+    controller = ConcurrencyController(initial_limit=1)
+
+    async def _request() -> AdaptiveLimiter:
+        limiter = controller["http://a.com/1.tif"]
+        await limiter.run(partial(sleep, 0.2))
+        return limiter
+
+    # Event loops of threads don't wait for each other's slots
+    start = perf_counter()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        limiters = list(executor.map(run, [_request(), _request()]))
+
+    assert limiters[0] is not limiters[1]
+    assert perf_counter() - start < 0.35
+
+
+@mark.asyncio
+async def test_reader_with_throttling_server() -> None:
+    levels = make_levels(512, 512, 1)
+    server = RangeServer(latency=0.005, max_concurrent=4)
+    server.files["image.tif"] = write_cog(levels, tile_size=32, compression="raw")
+    controller = ConcurrencyController(initial_limit=32)
+
+    async with server:
+        async with COGReader(
+            server.url("image.tif"),
+            concurrency=controller,
+            retry=RetryPolicy(retries=10, backoff=0.001),
+        ) as reader:
+            coords = [(x, y) for y in range(16) for x in range(16)]
+            # Every tile is read with a separate request
+            tiles = await gather(*(reader.get_tile_image(0, x, y) for x, y in coords))
+            limiter = controller[server.url("image.tif")]
+
+            for (x, y), tile in zip(coords, tiles):
+                assert (
+                    tile == levels[0][y * 32 : (y + 1) * 32, x * 32 : (x + 1) * 32]
+                ).all()
+            # The limit went down to what the server handles without throttling
+            assert limiter.limit <= 8
+
+            server.reset_counters()
+            await gather(
+                *(reader._read_tile(reader.levels[0], x, y) for x, y in coords)
+            )
+
+            assert server.max_in_flight <= 8
+            assert server.throttled["image.tif"] < server.requests["image.tif"] // 5
+
+
+@mark.asyncio
+async def test_limiter_cancelled_after_wake() -> None:
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+
+    async def _request() -> None:
+        pass
+
+    await limiter._acquire()
+    woken = ensure_future(limiter.run(_request))
+    waiting = ensure_future(limiter.run(_request))
+    await sleep(0)
+
+    # The slot is given to the first waiter, which is cancelled before it takes it
+    limiter._release()
+    woken.cancel()
+
+    await wait_for(waiting, timeout=1)
+
+    assert woken.cancelled()
+    assert limiter.in_flight == 0
@@ -1,6 +1,9 @@
+from json import loads
+
 import pytest
 
-from async_cog.tags import Tag
+from async_cog.ifd import IFD
+from async_cog.tags import NumberTag, StringTag, Tag
 
 
 @pytest.mark.asyncio
@@ -73,3 +76,60 @@ async def test_ifd_has_tile(mocked_reader) -> None:
         assert not reader._ifds[4].has_tile(0, 7)
 
         assert not reader._ifds[5].has_tile(0, 0)
+
+
+@pytest.mark.asyncio
+async def test_ifd_has_tile_out_of_row(mocked_reader) -> None:
+    async with mocked_reader("tiles.tif") as reader:
+        await reader._fill_ifd_with_data(reader._ifds[0])
+
+        assert reader._ifds[0].has_tile(3, 2)
+        assert not reader._ifds[0].has_tile(4, 0)
+
+
+@pytest.mark.asyncio
+async def test_ifd_tile_lookups(mocked_reader) -> None:
+    async with mocked_reader("tiles.tif") as reader:
+        ifd = reader._ifds[0]
+        await reader._fill_ifd_with_data(ifd)
+
+        assert ifd.has_tiles([(0, 0), (3, 2), (4, 0), (0, 3)]).tolist() == [
+            True,
+            True,
+            False,
+            False,
+        ]
+        assert ifd.get_tile_idxs([(1, 0), (0, 0), (3, 2)]).tolist() == [1, 0, 11]
+        assert await reader._get_tile_ranges(ifd, [(1, 0), (0, 0)]) == [
+            (2921, 570),
+            (2352, 569),
+        ]
+        assert await reader._get_tile_ranges(ifd, []) == []
+
+
+@pytest.mark.asyncio
+async def test_ifd_to_model(mocked_reader) -> None:
+    async with mocked_reader("cog.tif") as reader:
+        ifd = reader._ifds[5]
+        await reader._fill_ifd_with_data(ifd)
+
+    model = ifd.to_model()
+
+    assert model.pointer == 10833
+    assert model.tags["GeoAsciiParamsTag"].length == 33
+    assert model.geokeys["GTCitation"].value == "WGS 84 / Pseudo-Mercator"
+    assert loads(model.json())["n_tags"] == 3
+
+
+def test_ifd_is_mask() -> None:
+    ifd = IFD(pointer=8, n_tags=1, next_ifd_pointer=0)
+    assert not ifd.is_mask
+
+    ifd["NewSubfileType"] = NumberTag(code=254, type=4, value=5)
+    assert ifd.is_mask
+
+    ifd["NewSubfileType"] = NumberTag(code=254, type=4, value=1)
+    assert not ifd.is_mask
+
+    ifd["NewSubfileType"] = StringTag(code=254, length=4, value="tset")
+    assert not ifd.is_mask
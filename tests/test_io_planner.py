@@ -0,0 +1,35 @@
+from async_cog.io_planner import MergedRange, merge_ranges, split_merged
+
+
+def test_merge_ranges() -> None:
+    ranges = [(100, 10), (0, 10), (10, 5), (120, 5), (300, 1), (50, 0)]
+
+    assert merge_ranges(ranges, max_gap=0) == [
+        MergedRange(0, 15, [1, 2]),
+        MergedRange(100, 10, [0]),
+        MergedRange(120, 5, [3]),
+        MergedRange(300, 1, [4]),
+    ]
+    assert merge_ranges(ranges, max_gap=10) == [
+        MergedRange(0, 15, [1, 2]),
+        MergedRange(100, 25, [0, 3]),
+        MergedRange(300, 1, [4]),
+    ]
+
+
+def test_merge_overlapping_ranges() -> None:
+    assert merge_ranges([(0, 10), (2, 3), (5, 10)], max_gap=0) == [
+        MergedRange(0, 15, [0, 1, 2])
+    ]
+
+
+def test_split_merged() -> None:
+    ranges = [(4, 2), (0, 3), (10, 1), (7, 0)]
+    merged = merge_ranges(ranges, max_gap=1)
+
+    assert split_merged(ranges, merged, [b"abcdef", b"k"]) == [
+        b"ef",
+        b"abc",
+        b"k",
+        b"",
+    ]
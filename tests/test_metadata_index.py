@@ -0,0 +1,214 @@
+from pathlib import Path
+from typing import Any
+
+from aioresponses import aioresponses
+from pytest import mark
+
+from async_cog import COGReader
+from async_cog.metadata_index import MetadataIndex
+from async_cog.sources import FileSource, MemorySource
+from tests.conftest import response_read
+
+MOCK_DATA = Path(__file__).parent / "mock_data"
+
+
+@mark.asyncio
+@mark.parametrize(
+    "file_name", ["cog.tif", "tiles.tif", "BigTIFF.tif", "be_cog.tif", "deflate.tif"]
+)
+async def test_reopen_from_index(tmp_path: Path, file_name: str) -> None:
+    index = MetadataIndex(tmp_path / "index")
+
+    async with COGReader(FileSource(MOCK_DATA / file_name)) as reader:
+        for ifd in reader:
+            await reader._fill_ifd_with_data(ifd)
+
+        if file_name != "be_cog.tif":
+            tile = await reader.get_tile_image(0, 0, 0)
+
+    async with COGReader(
+        FileSource(MOCK_DATA / file_name), metadata_index=index
+    ) as first_reader:
+        assert first_reader._ifds == reader._ifds
+
+    async with COGReader(
+        FileSource(MOCK_DATA / file_name), metadata_index=index
+    ) as second_reader:
+        # Only the fingerprint is requested
+        assert second_reader.io_stats.total.requests == 1
+        assert second_reader.io_stats.total.bytes_requested == 0
+        assert second_reader.is_bigtiff == reader.is_bigtiff
+        assert second_reader.gdal_metadata == reader.gdal_metadata
+        assert second_reader._ifds == reader._ifds
+        assert [ifd.geokeys for ifd in second_reader] == [ifd.geokeys for ifd in reader]
+
+        if file_name != "be_cog.tif":
+            assert (await second_reader.get_tile_image(0, 0, 0) == tile).all()
+
+    assert index.stats.hits == 1
+    assert index.stats.misses == 1
+
+
+@mark.asyncio
+async def test_index_invalidation(tmp_path: Path) -> None:
+    index = MetadataIndex(tmp_path)
+    data = (MOCK_DATA / "cog.tif").read_bytes()
+
+    async with COGReader(MemorySource(data, "file"), metadata_index=index):
+        pass
+
+    # The file has changed
+    changed = data[:-1] + b"\x00"
+
+    async with COGReader(MemorySource(changed, "file"), metadata_index=index) as reader:
+        assert reader.io_stats.total.requests > 0
+
+    assert index.stats.hits == 0
+    assert index.stats.misses == 2
+
+
+@mark.asyncio
+async def test_index_broken_entry(tmp_path: Path) -> None:
+    index = MetadataIndex(tmp_path)
+    data = (MOCK_DATA / "cog.tif").read_bytes()
+
+    async with COGReader(MemorySource(data, "file"), metadata_index=index):
+        pass
+
+    (entry,) = tmp_path.glob("*.npz")
+    entry.write_bytes(b"broken")
+
+    async with COGReader(MemorySource(data, "file"), metadata_index=index) as reader:
+        assert reader.io_stats.total.requests > 0
+
+    assert index.stats.misses == 2
+    assert index.size > len(b"broken")
+
+
+@mark.asyncio
+async def test_index_size_limit(tmp_path: Path) -> None:
+    data = (MOCK_DATA / "cog.tif").read_bytes()
+
+    async with COGReader(
+        MemorySource(data, "first"), metadata_index=MetadataIndex(tmp_path)
+    ):
+        pass
+
+    # Enough for two entries
+    index = MetadataIndex(tmp_path, max_bytes=MetadataIndex(tmp_path).size * 5 // 2)
+
+    for url in ("first", "second", "third"):
+        async with COGReader(MemorySource(data, url), metadata_index=index):
+            pass
+
+    assert index.size <= index.max_bytes
+    assert index.stats.evictions == 1
+    assert index.stats.hits == 1
+
+    # The least recently used "first" entry was evicted
+    for url in ("second", "third", "first"):
+        async with COGReader(MemorySource(data, url), metadata_index=index):
+            pass
+
+    assert index.stats.hits == 3
+    assert index.stats.misses == 3
+
+    index.clear()
+    assert index.size == 0
+
+
+@mark.asyncio
+async def test_index_with_http(tmp_path: Path) -> None:
+    index = MetadataIndex(tmp_path)
+    headers = {"ETag": '"abc"', "Content-Length": "10970"}
+
+    with aioresponses() as mocked:
+        mocked.head("cog.tif", headers=headers, repeat=True)
+        mocked.get("cog.tif", callback=response_read, repeat=True)
+
+        async with COGReader("cog.tif", metadata_index=index):
+            pass
+
+        async with COGReader("cog.tif", metadata_index=index) as reader:
+            # Only the fingerprint is requested
+            assert reader.io_stats.total.requests == 1
+            assert reader.io_stats.total.bytes_requested == 0
+            assert reader._ifds[5]["GTCitation"] == "WGS 84 / Pseudo-Mercator"
+
+    assert index.stats.hits == 1
+
+
+@mark.asyncio
+async def test_index_fingerprint_retry(tmp_path: Path) -> None:
+    index = MetadataIndex(tmp_path)
+    headers = {"ETag": '"abc"'}
+
+    with aioresponses() as mocked:
+        mocked.head("cog.tif", headers=headers)
+        mocked.get("cog.tif", callback=response_read, repeat=True)
+
+        async with COGReader("cog.tif", metadata_index=index):
+            pass
+
+    with aioresponses() as mocked:
+        mocked.head("cog.tif", status=503)
+        mocked.head("cog.tif", headers=headers)
+
+        async with COGReader("cog.tif", metadata_index=index) as reader:
+            assert reader.io_stats["header"].retries == 1
+            assert reader.io_stats["header"].requests == 1
+
+    assert index.stats.hits == 1
+
+
+@mark.asyncio
+async def test_index_without_fingerprint(tmp_path: Path) -> None:
+    index = MetadataIndex(tmp_path)
+
+    with aioresponses() as mocked:
+        mocked.head("cog.tif", status=405)
+        mocked.get("cog.tif", callback=response_read, repeat=True)
+
+        async with COGReader("cog.tif", metadata_index=index):
+            pass
+
+    assert index.size == 0
+
+
+@mark.asyncio
+async def test_index_with_block_leaders(tmp_path: Path) -> None:
+    index = MetadataIndex(tmp_path)
+    source = FileSource(MOCK_DATA / "deflate.tif")
+
+    async with COGReader(source, metadata_index=index, use_block_leaders=True):
+        pass
+
+    # TileByteCounts weren't saved, so they are read when needed
+    async with COGReader(
+        FileSource(MOCK_DATA / "deflate.tif"), metadata_index=index
+    ) as reader:
+        # Only the fingerprint is requested
+        assert reader.io_stats.total.requests == 1
+        assert reader.io_stats.total.bytes_requested == 0
+        await reader.get_tile_image(0, 0, 0)
+        assert reader._ifds[0]["TileByteCounts"] is not None
+
+    assert index.stats.hits == 1
+
+
+@mark.asyncio
+async def test_index_put_failure(tmp_path: Path, monkeypatch) -> None:
+    index = MetadataIndex(tmp_path)
+
+    def _put(*args: Any) -> None:
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(index, "put", _put)
+
+    async with COGReader(
+        FileSource(MOCK_DATA / "cog.tif"), metadata_index=index
+    ) as reader:
+        assert len(reader.levels) == 6
+        await reader.get_tile_image(0, 0, 0)
+
+    assert index.size == 0
@@ -0,0 +1,49 @@
+from async_cog.metrics import LATENCY_BUCKETS, IOStats, PhaseStats, ReadEvent
+
+
+def test_phase_stats_latency() -> None:
+    stats = PhaseStats()
+
+    stats.observe_latency(0.001)
+    stats.observe_latency(0.01)
+    stats.observe_latency(100)
+
+    assert stats.latency_sum == 100.011
+    assert len(stats.latency_buckets) == len(LATENCY_BUCKETS) + 1
+    assert stats.latency_buckets[0] == 1
+    assert stats.latency_buckets[1] == 1
+    assert stats.latency_buckets[-1] == 1
+
+
+def test_io_stats() -> None:
+    events: list = []
+    retries: list = []
+    stats = IOStats(on_read=[events.append], on_retry=[retries.append])
+
+    event = ReadEvent(
+        phase="tile", offset=10, size=100, ranges=2, bytes_read=90, duration=0.2
+    )
+    stats.record_read(event)
+    stats.record_used("tile", 80)
+    stats.record_used("ifd", 10)
+    stats.record_retry("tile")
+    stats.record_hedge("tile")
+
+    assert events == [event]
+    assert retries == ["tile"]
+    assert stats["tile"].requests == 1
+    assert stats["tile"].ranges == 2
+    assert stats["tile"].bytes_requested == 100
+    assert stats["tile"].bytes_used == 80
+    assert stats["tile"].retries == 1
+    assert stats["tile"].hedges == 1
+    assert stats["header"] == PhaseStats()
+
+    total = stats.total
+    assert total.requests == 1
+    assert total.ranges == 2
+    assert total.bytes_used == 90
+    assert total.retries == 1
+    assert total.hedges == 1
+    assert total.latency_sum == 0.2
+    assert sum(total.latency_buckets) == 1
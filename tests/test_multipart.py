@@ -0,0 +1,62 @@
+from re import escape
+
+from pytest import raises
+
+from async_cog.sources.multipart import (
+    get_boundary,
+    parse_byteranges,
+    parse_content_range,
+    slice_parts,
+)
+
+BODY = (
+    b"--XYZ\r\n"
+    b"Content-Type: image/tiff\r\n"
+    b"Content-Range: bytes 0-4/100\r\n"
+    b"\r\n"
+    b"01234\r\n"
+    b"--XYZ\r\n"
+    b"content-range: bytes 50-59/*\r\n"
+    b"\r\n"
+    b"--XYZ\r\n--X\r\n"
+    b"--XYZ--\r\n"
+)
+
+
+def test_parse_content_range() -> None:
+    assert parse_content_range("bytes 0-50/1270") == (0, 50)
+    assert parse_content_range(" bytes 10-20/* ") == (10, 20)
+
+    with raises(ValueError, match=escape("Invalid Content-Range: bytes */1270")):
+        parse_content_range("bytes */1270")
+
+
+def test_get_boundary() -> None:
+    assert get_boundary("multipart/byteranges; boundary=XYZ") == "XYZ"
+    assert get_boundary('Multipart/Byteranges; charset=x; boundary="a b"') == "a b"
+    assert get_boundary("image/tiff") is None
+
+    with raises(ValueError, match="No boundary"):
+        get_boundary("multipart/byteranges")
+
+
+def test_parse_byteranges() -> None:
+    # Data of the second part contains the boundary
+    assert parse_byteranges(BODY, "XYZ") == [(0, b"01234"), (50, b"--XYZ\r\n--X")]
+
+
+def test_parse_invalid_byteranges() -> None:
+    with raises(ValueError, match="Invalid multipart/byteranges body"):
+        parse_byteranges(b"--XYZ\r\nContent-Range: bytes 0-4/100\r\n", "XYZ")
+
+    with raises(ValueError, match="No Content-Range"):
+        parse_byteranges(b"--XYZ\r\nContent-Type: image/tiff\r\n\r\n0\r\n", "XYZ")
+
+
+def test_slice_parts() -> None:
+    parts = [(0, b"01234"), (50, b"abcdefghij")]
+
+    assert slice_parts(parts, 1, 3) == b"123"
+    assert slice_parts(parts, 52, 8) == b"cdefghij"
+    assert slice_parts(parts, 3, 3) is None
+    assert slice_parts(parts, 20, 1) is None
@@ -0,0 +1,64 @@
+import numpy as np
+from pytest import mark, raises
+
+from async_cog.resampling import floor_window, resample
+
+
+def test_resample_nearest() -> None:
+    image = np.arange(64, dtype=np.uint8).reshape(8, 8, 1)
+
+    result = resample(image, (0, 0, 8, 8), (4, 4), "nearest")
+
+    assert result.dtype == np.uint8
+    assert (result == image[1::2, 1::2]).all()
+
+
+def test_resample_average() -> None:
+    image = np.random.default_rng(0).integers(0, 256, (8, 12, 3), dtype=np.uint16)
+
+    result = resample(image, (0, 0, 12, 8), (2, 3), "average")
+    expected = image.reshape(2, 4, 3, 4, 3).mean(axis=(1, 3))
+
+    assert result.dtype == np.uint16
+    assert (result == np.rint(expected)).all()
+
+
+def test_resample_average_fractional() -> None:
+    image = np.array([[0.0, 3.0, 6.0]]).reshape(1, 3, 1)
+
+    # Halves of the first and the last pixels
+    result = resample(image, (0.5, 0, 2.5, 1), (1, 1), "average")
+
+    assert result[0, 0, 0] == 3.0
+
+
+def test_resample_bilinear() -> None:
+    # Linear image is reproduced exactly everywhere except its border
+    y, x = np.mgrid[0:16, 0:16]
+    image = (x * 2.0 + y * 3.0).reshape(16, 16, 1)
+
+    result = resample(image, (4, 4, 12, 12), (16, 16), "bilinear")
+    y, x = np.mgrid[0:16, 0:16]
+    expected = (4 + (x + 0.5) / 2 - 0.5) * 2.0 + (4 + (y + 0.5) / 2 - 0.5) * 3.0
+
+    assert np.allclose(result[..., 0], expected)
+
+
+@mark.parametrize("resampling", ["nearest", "average", "bilinear"])
+def test_resample_identity(resampling) -> None:
+    image = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+
+    assert (resample(image, (0, 0, 4, 4), (4, 4), resampling) == image).all()
+
+
+def test_resample_raises() -> None:
+    with raises(ValueError, match="Unknown resampling 'cubic'"):
+        resample(np.zeros((2, 2, 1)), (0, 0, 2, 2), (1, 1), "cubic")  # type: ignore
+
+
+def test_floor_window() -> None:
+    assert floor_window((0.5, 1.5, 2.5, 3)) == (0, 1, 3, 2)
+    assert floor_window((0.5, 1.5, 2.5, 3), margin=1) == (0, 0, 4, 4)
+    # The margin is clamped to the image, but the window itself isn't
+    assert floor_window((0.5, 1.5, 4, 3), margin=1, image_size=(4, 3)) == (0, 0, 4, 3)
+    assert floor_window((0.5, 1.5, 5, 3), margin=1, image_size=(4, 3)) == (0, 0, 5, 3)
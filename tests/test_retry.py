@@ -0,0 +1,183 @@
+from asyncio import TimeoutError, sleep
+from pathlib import Path
+from typing import Any, List
+
+from aiohttp import ClientConnectionError
+from aioresponses import CallbackResult, aioresponses
+from pytest import approx, mark, raises
+
+from async_cog import COGReader
+from async_cog.retry import NO_RETRIES, HedgePolicy, RetryPolicy, first_successful
+from async_cog.sources import MemorySource, RangeReadError
+from tests.conftest import response_read
+
+MOCK_DATA = Path(__file__).parent / "mock_data"
+
+FAST_RETRIES = RetryPolicy(retries=3, backoff=0)
+
+
+def test_retry_policy() -> None:
+    policy = RetryPolicy(backoff=1, max_backoff=5)
+
+    assert all(0 <= policy.get_delay(1) <= 2 for _ in range(100))
+    assert all(0 <= policy.get_delay(10) <= 5 for _ in range(100))
+
+    assert policy.is_retryable(RangeReadError("", status=503))
+    assert policy.is_retryable(RangeReadError("", status=429))
+    assert policy.is_retryable(RangeReadError("short read"))
+    assert policy.is_retryable(ClientConnectionError())
+    assert policy.is_retryable(TimeoutError())
+    assert not policy.is_retryable(RangeReadError("", status=404))
+    assert not policy.is_retryable(ValueError())
+
+
+def test_hedge_policy() -> None:
+    policy = HedgePolicy(min_samples=10)
+    assert policy.get_delay() is None
+
+    for idx in range(100):
+        policy.observe(idx / 100)
+
+    assert policy.get_delay() == approx(0.9405)
+    assert HedgePolicy(delay=0.5).get_delay() == 0.5
+
+
+@mark.asyncio
+async def test_first_successful() -> None:
+    delays = [0.5, 0]
+    hedges: List[int] = []
+
+    async def _request() -> float:
+        delay = delays.pop(0)
+        await sleep(delay)
+        return delay
+
+    assert await first_successful(_request, 0.01, lambda: hedges.append(1)) == 0
+    assert hedges == [1]
+
+    delays = [0, 0.5]
+    assert await first_successful(_request, 0.01, lambda: hedges.append(1)) == 0
+    assert hedges == [1]
+
+
+@mark.asyncio
+async def test_first_successful_failures() -> None:
+    errors = [ConnectionError("first"), ConnectionError("second")]
+
+    async def _request() -> None:
+        error = errors.pop(0)
+        await sleep(0.02 if str(error) == "first" else 0)
+        raise error
+
+    with raises(ConnectionError, match="first"):
+        await first_successful(_request, 0.01, lambda: None)
+
+
+class FlakySource(MemorySource):
+    """
+    Source which fails first `failures` reads and delays reads by `delays`
+    """
+
+    def __init__(self, data: bytes, failures: int = 0, delays: Any = ()):
+        super().__init__(data)
+        self.failures = failures
+        self.delays = list(delays)
+        self.reads = 0
+
+    async def read(self, offset: int, size: int) -> memoryview:
+        self.reads += 1
+
+        if self.delays:
+            await sleep(self.delays.pop(0))
+
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError
+
+        return await super().read(offset, size)
+
+
+@mark.asyncio
+async def test_reader_retries() -> None:
+    data = (MOCK_DATA / "cog.tif").read_bytes()
+    source = FlakySource(data, failures=2)
+
+    async with COGReader(source, retry=FAST_RETRIES) as reader:
+        tile = await reader.get_tile_image(0, 0, 0)
+
+        assert reader.io_stats["header"].retries == 2
+        assert tile.shape == (256, 256, 3)
+
+    with raises(ConnectionError):
+        await COGReader(FlakySource(data, failures=4), retry=FAST_RETRIES).__aenter__()
+
+    with raises(ConnectionError):
+        await COGReader(FlakySource(data, failures=1), retry=NO_RETRIES).__aenter__()
+
+
+@mark.asyncio
+async def test_reader_retries_http_errors() -> None:
+    statuses = [503, 500]
+
+    def _read(url: str, **kwargs: Any) -> CallbackResult:
+        if statuses:
+            return CallbackResult(status=statuses.pop(0))
+
+        return response_read(url, **kwargs)
+
+    with aioresponses() as mocked:
+        mocked.get("cog.tif", callback=_read, repeat=True)
+        mocked.get("missing.tif", status=404, repeat=True)
+
+        async with COGReader("cog.tif", retry=FAST_RETRIES) as reader:
+            assert reader.io_stats.total.retries == 2
+
+        reader = COGReader("missing.tif", retry=FAST_RETRIES)
+
+        with raises(RangeReadError, match="HTTP 404") as error:
+            await reader.__aenter__()
+
+        assert error.value.status == 404
+        assert reader.io_stats.total.retries == 0
+        # The source is closed when the reader fails to open
+        assert reader._source._client.closed  # type: ignore
+
+
+@mark.asyncio
+async def test_reader_retries_short_reads() -> None:
+    data = (MOCK_DATA / "cog.tif").read_bytes()
+    truncated = [True]
+
+    def _read(url: str, **kwargs: Any) -> CallbackResult:
+        start, end = map(int, kwargs["headers"]["Range"][6:].split("-"))
+        end = min(end, len(data) - 1)
+        body = data[start : end + 1]
+
+        if truncated:
+            truncated.pop()
+            body = body[:10]
+
+        return CallbackResult(
+            status=206,
+            body=body,
+            headers={"Content-Range": f"bytes {start}-{end}/{len(data)}"},
+        )
+
+    with aioresponses() as mocked:
+        mocked.get("cog.tif", callback=_read, repeat=True)
+
+        async with COGReader("cog.tif", retry=FAST_RETRIES) as reader:
+            assert reader.io_stats["header"].retries == 1
+            assert len(reader._ifds) == 6
+
+
+@mark.asyncio
+async def test_reader_hedging() -> None:
+    data = (MOCK_DATA / "cog.tif").read_bytes()
+    # The first read is slow, its duplicate is fast
+    source = FlakySource(data, delays=[1, 0])
+
+    async with COGReader(source, hedging=HedgePolicy(delay=0.01)) as reader:
+        assert reader.io_stats["header"].hedges == 1
+        assert reader.io_stats.total.hedges == 1
+        assert source.reads == 2
@@ -0,0 +1,222 @@
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from aiohttp import ClientSession
+from aioresponses import CallbackResult, aioresponses
+from pytest import mark
+
+from async_cog import COGReader
+from async_cog.sources import FileSource, HTTPConnectionPool, HTTPSource, MemorySource
+
+MOCK_DATA = Path(__file__).parent / "mock_data"
+
+
+@mark.asyncio
+async def test_file_source() -> None:
+    source = FileSource(MOCK_DATA / "cog.tif")
+
+    async with source:
+        data = await source.read(0, 4)
+        assert isinstance(data, memoryview)
+        assert data == b"II*\x00"
+        assert len(await source.read(10970, 100)) == 10
+
+    assert source.url == str(MOCK_DATA / "cog.tif")
+    # Views stay valid after the source is closed
+    assert data == b"II*\x00"
+
+
+@mark.asyncio
+async def test_empty_file_source(tmp_path: Path) -> None:
+    path = tmp_path / "empty.tif"
+    path.write_bytes(b"")
+
+    async with FileSource(path) as source:
+        assert await source.read(0, 4) == b""
+
+
+@mark.asyncio
+async def test_memory_source() -> None:
+    source = MemorySource(b"0123456789", url="memory://test")
+
+    async with source:
+        assert await source.read(2, 3) == b"234"
+        assert await source.read_many([(8, 4), (0, 1)]) == [b"89", b"0"]
+
+    assert source.url == "memory://test"
+    assert MemorySource(b"").url.startswith("memory://")
+
+
+@mark.asyncio
+@mark.parametrize("file_name", ["cog.tif", "tiles.tif", "BigTIFF.tif"])
+async def test_reader_with_file_source(mocked_reader, file_name: str) -> None:
+    async with mocked_reader(file_name) as http_reader:
+        http_ifds = http_reader._ifds
+        http_tile = await http_reader.get_tile_image(0, 0, 0)
+
+    async with COGReader(FileSource(MOCK_DATA / file_name)) as reader:
+        assert (await reader.get_tile_image(0, 0, 0) == http_tile).all()
+        assert reader._ifds == http_ifds
+
+
+@mark.asyncio
+async def test_reader_with_memory_source() -> None:
+    data = (MOCK_DATA / "tiles.tif").read_bytes()
+
+    async with COGReader(MemorySource(data), prefetch_size=0) as reader:
+        image = await reader.read_window(0, 0, 0, 64, 48)
+
+    assert image.shape == (48, 64, 3)
+    assert image.dtype == np.uint8
+
+
+@mark.asyncio
+async def test_connection_pool(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+    mocked_reader("tiles.tif")
+
+    async with HTTPConnectionPool(limit_per_host=4) as pool:
+        async with COGReader("cog.tif", session=pool) as reader:
+            await reader.get_tile_image(0, 0, 0)
+
+        async with COGReader("tiles.tif", session=pool) as reader:
+            await reader.get_tile_image(0, 0, 0)
+
+        assert not pool.session.closed
+        assert pool.session.connector.limit_per_host == 4
+
+        session = pool.session
+
+    assert session.closed
+
+
+@mark.asyncio
+async def test_http_source_session_ownership(mocked_reader) -> None:
+    mocked_reader("cog.tif")
+
+    async with ClientSession() as session:
+        source = HTTPSource("cog.tif", session=session)
+
+        async with COGReader(source):
+            pass
+
+        assert not source.owns_session
+        assert not session.closed
+
+    source = HTTPSource("cog.tif")
+
+    async with COGReader(source):
+        pass
+
+    assert source.owns_session
+    assert source._client.closed
+
+
+@mark.asyncio
+async def test_connection_pool_recreates_closed_session() -> None:
+    pool = HTTPConnectionPool()
+    await pool.close()
+
+    session = pool.session
+    await pool.close()
+
+    assert session.closed
+    assert not pool.session.closed
+
+    await pool.close()
+
+
+def _multi_range_read(mode: str) -> Callable[..., CallbackResult]:
+    """
+    Mock of the server answering to multi-range requests with multipart body,
+    with all ranges coalesced into one or with the whole file
+    """
+
+    def _read(url: str, **kwargs: Any) -> CallbackResult:
+        data = (MOCK_DATA / str(url)).read_bytes()
+        ranges = [
+            tuple(map(int, range_str.split("-")))
+            for range_str in kwargs["headers"]["Range"][6:].split(",")
+        ]
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            return CallbackResult(status=206, body=data[start : end + 1])
+
+        if mode == "whole":
+            return CallbackResult(status=200, body=data)
+
+        if mode == "coalesced":
+            start = min(start for start, _ in ranges)
+            end = max(end for _, end in ranges)
+            return CallbackResult(
+                status=206,
+                body=data[start : end + 1],
+                headers={"Content-Range": f"bytes {start}-{end}/{len(data)}"},
+            )
+
+        # Multipart answer omits the last range
+        body = b""
+        for start, end in ranges[:-1]:
+            body += b"--XYZ\r\nContent-Range: bytes "
+            body += f"{start}-{end}/{len(data)}\r\n\r\n".encode()
+            body += data[start : end + 1] + b"\r\n"
+        body += b"--XYZ--\r\n"
+
+        return CallbackResult(
+            status=206,
+            body=body,
+            headers={"Content-Type": "multipart/byteranges; boundary=XYZ"},
+        )
+
+    return _read
+
+
+@mark.asyncio
+@mark.parametrize("mode", ["multipart", "coalesced", "whole"])
+async def test_http_source_multi_range(mode: str) -> None:
+    data = (MOCK_DATA / "cog.tif").read_bytes()
+    ranges = [(0, 4), (100, 10), (50, 0), (2000, 30), (10970, 20)]
+
+    with aioresponses() as mocked_response:
+        mocked_response.get("cog.tif", callback=_multi_range_read(mode), repeat=True)
+        source = HTTPSource("cog.tif", multi_range=True, max_ranges_per_request=3)
+
+        async with source:
+            result = await source.read_many(ranges)
+            assert await source.read_many([(5, 5)]) == [data[5:10]]
+
+    assert result == [data[offset : offset + size] for offset, size in ranges]
+
+
+@mark.asyncio
+async def test_reader_with_multi_range() -> None:
+    with aioresponses() as mocked_response:
+        mocked_response.get(
+            "tiles.tif", callback=_multi_range_read("multipart"), repeat=True
+        )
+        source = HTTPSource("tiles.tif", multi_range=True)
+
+        async with COGReader(source, prefetch_size=0, max_gap=0) as reader:
+            image = await reader.read_window(0, 0, 0, 64, 48)
+
+    assert image.shape == (48, 64, 3)
+
+
+@mark.asyncio
+async def test_reader_multi_range_stats() -> None:
+    with aioresponses() as mocked_response:
+        mocked_response.get(
+            "tiles.tif", callback=_multi_range_read("multipart"), repeat=True
+        )
+        source = HTTPSource("tiles.tif", multi_range=True, max_ranges_per_request=2)
+
+        async with COGReader(source, prefetch_size=0, max_gap=0) as reader:
+            await reader.get_tiles(0, [(0, 0), (2, 0), (0, 2)])
+            stats = reader.io_stats["tile"]
+
+    # Two ranges with one request and one more with another
+    assert stats.requests == 2
+    assert stats.ranges == 3
+    assert sum(stats.latency_buckets) == 2
@@ -1,6 +1,7 @@
+import numpy as np
 from pytest import raises
 
-from async_cog.tags import Tag
+from async_cog.tags import ListTag, NumberTag, Tag
 
 
 def test_tag_format() -> None:
@@ -35,3 +36,63 @@ def test_not_imlemented() -> None:
 
     with raises(NotImplementedError):
         tag.parse_data(b"", "<")
+
+
+def test_list_tag_array() -> None:
+    tag = ListTag(code=324, type=4, length=3)
+    tag.parse_data(b"\x00\x00\x00\x01\x00\x00\x00\x02\x00\x00\x01\x00", ">")
+
+    assert isinstance(tag.value, np.ndarray)
+    assert tag.value.dtype == np.dtype(">u4")
+    assert tag.value.tolist() == [1, 2, 256]
+
+    tag = ListTag(code=325, type=16, length=2)
+    tag.parse_data(b"\x01" + b"\x00" * 7 + b"\x02" + b"\x00" * 7, "<")
+
+    assert tag.value.dtype == np.dtype("<u8")
+    assert tag.value.tolist() == [1, 2]
+
+    # Other list tags are still lists
+    tag = ListTag(code=258, type=3, length=3)
+    tag.parse_data(b"\x08\x00\x08\x00\x08\x00", "<")
+    assert tag.value == [8, 8, 8]
+
+
+def test_list_tag_array_eq() -> None:
+    tag = ListTag(code=324, type=4, length=2, value=[1, 2])
+    array_tag = ListTag(code=324, type=4, length=2)
+    array_tag.parse_data(b"\x01\x00\x00\x00\x02\x00\x00\x00", "<")
+
+    assert array_tag == tag
+    assert array_tag != ListTag(code=324, type=4, length=2, value=[1, 3])
+
+
+def test_tag_to_model() -> None:
+    tag = ListTag(code=324, type=4, length=2, value=np.array([1, 2]))
+    model = tag.to_model()
+
+    assert model.name == "TileOffsets"
+    assert model.value == [1, 2]
+    assert model.dict() == {
+        "code": 324,
+        "name": "TileOffsets",
+        "type": 4,
+        "length": 2,
+        "data_pointer": None,
+        "value": [1, 2],
+    }
+
+
+def test_tag_slots() -> None:
+    tag = NumberTag(code=257, type=3, value=256)
+
+    assert tag.length == 1
+    assert repr(tag) == (
+        "NumberTag(code=257, type=3, length=1, data_pointer=None, value=256)"
+    )
+
+    with raises(AttributeError):
+        tag.extra = 1  # type: ignore
+
+    with raises(ValueError, match="Tag with type 99 is not supported"):
+        Tag(code=257, type=99, length=1)
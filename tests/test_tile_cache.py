@@ -0,0 +1,98 @@
+from asyncio import gather, sleep
+
+import numpy as np
+from pytest import mark, raises
+
+from async_cog.tile_cache import TileCache, TileCacheStats
+
+
+def _loader(value: int, size: int = 10, calls: list = None):  # type: ignore
+    async def _load() -> np.ndarray:
+        if calls is not None:
+            calls.append(value)
+        await sleep(0)
+        return np.full(size, value, dtype=np.uint8)
+
+    return _load
+
+
+@mark.asyncio
+async def test_tile_cache_hit() -> None:
+    cache = TileCache(max_bytes=100)
+
+    tile = await cache.get_or_load("a", _loader(1))
+    assert (await cache.get_or_load("a", _loader(2)) == 1).all()
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 1
+    assert cache.size == 10
+    assert cache.stats == TileCacheStats(hits=1, misses=1, evictions=0)
+
+    with raises(ValueError):
+        tile[0] = 2
+
+
+@mark.asyncio
+async def test_tile_cache_lru_eviction() -> None:
+    cache = TileCache(max_bytes=25)
+
+    await cache.get_or_load("a", _loader(1))
+    await cache.get_or_load("b", _loader(2))
+    await cache.get_or_load("a", _loader(1))
+    await cache.get_or_load("c", _loader(3))
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.size == 20
+    assert cache.stats == TileCacheStats(hits=1, misses=3, evictions=1)
+
+
+@mark.asyncio
+async def test_tile_cache_too_big_tile() -> None:
+    cache = TileCache(max_bytes=5)
+
+    await cache.get_or_load("a", _loader(1))
+
+    assert "a" not in cache
+    assert cache.size == 0
+
+
+@mark.asyncio
+async def test_tile_cache_concurrent_misses() -> None:
+    cache = TileCache(max_bytes=100)
+    calls: list = []
+
+    tiles = await gather(
+        *(cache.get_or_load("a", _loader(1, calls=calls)) for _ in range(3))
+    )
+
+    assert calls == [1]
+    assert tiles[0] is tiles[1] is tiles[2]
+    assert cache.stats == TileCacheStats(hits=2, misses=1, evictions=0)
+
+
+@mark.asyncio
+async def test_tile_cache_failed_loading() -> None:
+    cache = TileCache(max_bytes=100)
+
+    async def _fail() -> np.ndarray:
+        raise ConnectionError
+
+    with raises(ConnectionError):
+        await cache.get_or_load("a", _fail)
+
+    assert "a" not in cache
+    assert (await cache.get_or_load("a", _loader(1)) == 1).all()
+
+
+@mark.asyncio
+async def test_tile_cache_clear() -> None:
+    cache = TileCache(max_bytes=100)
+    await cache.get_or_load("a", _loader(1))
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.size == 0
+    assert cache.max_bytes == 100
@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from pytest import mark
+
+from async_cog import COGReader
+from async_cog.tracing import NoopTracer, OpenTelemetryTracer, TimingTracer
+
+
+def test_noop_tracer() -> None:
+    with NoopTracer().span("decode", level=0) as span:
+        assert span is None
+
+
+def test_timing_tracer() -> None:
+    tracer = TimingTracer()
+
+    with tracer.span("decode"):
+        pass
+
+    with tracer.span("decode"):
+        pass
+
+    count, duration = tracer.timings["decode"]
+    assert count == 2
+    assert duration >= 0
+
+
+def test_open_telemetry_tracer() -> None:
+    spans = []
+
+    class _OTelTracer:
+        @contextmanager
+        def start_as_current_span(self, name: str, attributes: Any) -> Iterator[str]:
+            spans.append((name, attributes))
+            yield name
+
+    with OpenTelemetryTracer(_OTelTracer()).span("fetch", phase="tile") as span:
+        assert span == "async_cog.fetch"
+
+    assert spans == [("async_cog.fetch", {"phase": "tile"})]
+
+
+@mark.asyncio
+@mark.parametrize(
+    "file_name, level, spans",
+    [
+        ("cog.tif", 0, {"jpeg_tables", "decompress"}),
+        ("lzw.tif", 4, {"decompress", "reshape", "unpredict"}),
+        ("deflate.tif", 4, {"decompress", "reshape"}),
+        ("packbits.tif", 4, {"decompress", "reshape"}),
+        ("BigTIFF.tif", 0, {"reshape"}),
+    ],
+)
+async def test_reader_tracing(mocked_reader, file_name, level, spans) -> None:
+    mocked_reader(file_name)
+    tracer = TimingTracer()
+
+    async with COGReader(file_name, tracer=tracer) as reader:
+        await reader.get_tile_image(level, 0, 0)
+
+    reader_spans = {"fill_metadata", "fetch", "decode_queue", "decode"}
+    assert set(tracer.timings) == reader_spans | spans
+    assert tracer.timings["decode"][0] == 1
+
+
+@mark.asyncio
+async def test_reader_tracing_parents(mocked_reader) -> None:
+    mocked_reader("lzw.tif")
+    current: ContextVar[Optional[str]] = ContextVar("current", default=None)
+    parents = {}
+
+    class _OTelTracer:
+        @contextmanager
+        def start_as_current_span(self, name: str, attributes: Any) -> Iterator[str]:
+            parents[name] = current.get()
+            token = current.set(name)
+
+            try:
+                yield name
+            finally:
+                current.reset(token)
+
+    tracer = OpenTelemetryTracer(_OTelTracer(), prefix="")
+
+    async with COGReader("lzw.tif", tracer=tracer) as reader:
+        await reader.get_tile_image(4, 0, 0)
+
+    assert parents["decode_queue"] is None
+    assert parents["decode"] is None
+    assert parents["decompress"] == "decode"
+    assert parents["unpredict"] == "decode"